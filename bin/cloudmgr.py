@@ -11,7 +11,7 @@ from lib.args import Parameters
 from lib.util.envmgr import LogViewer
 from lib.util.namegen import get_random_name
 import lib.config as config
-from lib.util.envmgr import PathMap, CatalogManager, EnvUtil, CatalogRoot
+from lib.util.envmgr import PathMap, EnvUtil, CatalogRoot, get_catalog
 from lib.util.logging import CustomFormatter
 
 VERSION = '3.1'
@@ -26,28 +26,39 @@ def break_signal_handler(signum, frame):
 
 
 class CloudManager(object):
+    NO_CLOUD_COMMANDS = [
+        'logs',
+        'db',
+        'remove'
+    ]
 
     def __init__(self, parameters):
         self.args = parameters
         self.verb = self.args.command
-        config.enable_cloud(self.args.cloud)
+        if self.verb not in CloudManager.NO_CLOUD_COMMANDS:
+            config.enable_cloud(self.args.cloud)
 
     def run(self):
         logger.info(f"Couch Formation ({VERSION})")
-        logger.info(f"Cloud Driver {config.cloud.upper()} version {config.cloud_driver_version}")
-        logger.info(f"Cloud Operator {config.cloud.upper()} version {config.cloud_operator_version}")
+        if config.cloud_base:
+            logger.info(f"Cloud Driver {config.cloud.upper()} version {config.cloud_driver_version}")
+            logger.info(f"Cloud Operator {config.cloud.upper()} version {config.cloud_operator_version}")
 
         if self.verb == 'version':
             sys.exit(0)
 
-        if self.args.verbose:
+        if self.args.verbose and config.cloud_base:
             config.cloud_base().get_info()
 
         if self.verb == 'image':
             config.env_name = config.cloud
             if self.args.image_command == "build":
                 config.catalog_target = CatalogRoot.IMAGE
-                config.cloud_operator().create_image()
+                if self.args.matrix:
+                    from lib.util.imagemgr import ImageMatrix
+                    ImageMatrix.from_file(self.args.matrix).run()
+                else:
+                    config.cloud_operator().create_image()
         elif self.verb == 'create':
             if not config.env_name:
                 config.env_name = get_random_name()
@@ -64,7 +75,7 @@ class CloudManager(object):
                 config.cloud_operator().list_images()
             elif self.args.list_command == "nodes":
                 path_map = PathMap(config.env_name, config.cloud)
-                cm = CatalogManager(path_map.get_root)
+                cm = get_catalog(path_map.get_root)
                 cm.catalog_list()
         elif self.verb == 'show':
             if self.args.show_command == "nodes":
@@ -85,8 +96,18 @@ class CloudManager(object):
         elif self.verb == 'db':
             if self.args.db_command == "check":
                 path_map = PathMap(config.env_name, config.cloud)
-                cm = CatalogManager(path_map.get_root)
+                cm = get_catalog(path_map.get_root)
                 cm.check(fix=self.args.fix)
+            elif self.args.db_command == "migrate":
+                from lib.util.catalogdb import SQLiteCatalogManager
+                cm = SQLiteCatalogManager(config.catalog_root)
+                print(f"Catalog database ready with {len(cm.read_file().get('inventory', {}))} environment(s)")
+            elif self.args.db_command == "prune":
+                from lib.invoke import PluginCache
+                removed = PluginCache().prune(config.catalog_root, dry_run=self.args.dry_run)
+                for path in removed:
+                    print(f"{'Unused' if self.args.dry_run else 'Removed'}: {path}")
+                print(f"{len(removed)} unused provider version(s)")
 
 
 def main():
@@ -30,10 +30,17 @@ class Parameters(object):
         parent_parser.add_argument('-d', '--debug', action='store_true', help="Debug output")
         parent_parser.add_argument('-v', '--verbose', action='store_true', help="Verbose output")
         parent_parser.add_argument('-y', '--yes', action='store_true', help="Assume yes confirmation")
+        parent_parser.add_argument('--refresh', action='store_true', help="Refresh cached cloud metadata", default=False)
+        parent_parser.add_argument('--workers', action='store', help="Stacks to run in parallel", type=int, default=4)
+        parent_parser.add_argument('--keep-going', action='store_true', help="Continue with independent stacks after a failure", default=False)
+        parent_parser.add_argument('--force-init', action='store_true', help="Always run terraform init and validate", default=False)
         image_parser = argparse.ArgumentParser(add_help=False)
         image_parser.add_argument('--image', action='store', help='Image name')
         image_parser.add_argument('--json', action='store_true', help='Output in JSON format', default=False)
         image_parser.add_argument('-h', '--help', action='help', default=argparse.SUPPRESS, help='Show help message')
+        build_parser = argparse.ArgumentParser(add_help=False)
+        build_parser.add_argument('--matrix', action='store', help='JSON file of image targets to build non-interactively')
+        build_parser.add_argument('--rebuild', action='store_true', help='Build a new image even if a matching one exists', default=False)
         net_parser = argparse.ArgumentParser(add_help=False)
         net_parser.add_argument('--list', action='store_true', help='List network database')
         net_parser.add_argument('--domain', action='store_true', help='Add domain')
@@ -49,6 +56,8 @@ class Parameters(object):
 
         db_parser = argparse.ArgumentParser(add_help=False)
         db_parser.add_argument('-f', '--fix', action='store_true', help='Fix issues')
+        prune_parser = argparse.ArgumentParser(add_help=False)
+        prune_parser.add_argument('--dry-run', action='store_true', help='List unused providers without removing them')
 
         subparsers = parser.add_subparsers(dest='command')
 
@@ -57,7 +66,7 @@ class Parameters(object):
         image_mode = subparsers.add_parser('image', help="Manage CB Images", parents=[parent_parser, image_parser], add_help=False)
         image_action = image_mode.add_subparsers(dest='image_command')
         image_action_list = image_action.add_parser('list', help="List images", parents=[parent_parser, image_parser], add_help=False)
-        image_action_build = image_action.add_parser('build', help="Build images", parents=[parent_parser, image_parser], add_help=False)
+        image_action_build = image_action.add_parser('build', help="Build images", parents=[parent_parser, image_parser, build_parser], add_help=False)
         image_action_delete = image_action.add_parser('delete', help="Delete images", parents=[parent_parser, image_parser], add_help=False)
 
         create_mode = subparsers.add_parser('create', help="Create Nodes", parents=[parent_parser], add_help=False)
@@ -120,6 +129,8 @@ class Parameters(object):
         db_mode = subparsers.add_parser('db', help="Catalog manager", parents=[parent_parser], add_help=False)
         db_action = db_mode.add_subparsers(dest='db_command')
         db_action_check = db_action.add_parser('check', help="Check the catalog", parents=[parent_parser, db_parser], add_help=False)
+        db_action_migrate = db_action.add_parser('migrate', help="Migrate the catalog to SQLite", parents=[parent_parser], add_help=False)
+        db_action_prune = db_action.add_parser('prune', help="Remove unused cached Terraform providers", parents=[parent_parser, prune_parser], add_help=False)
 
         self.parser = parser
         self.image_parser = image_mode
@@ -156,6 +167,14 @@ class Parameters(object):
             config.update_dns = self.parameters.dns
         if self.parameters.yes:
             config.assume_yes = self.parameters.yes
+        if self.parameters.refresh:
+            config.cache_refresh = self.parameters.refresh
+        if self.parameters.workers:
+            config.stack_workers = self.parameters.workers
+        if self.parameters.keep_going:
+            config.stack_fail_fast = False
+        if self.parameters.force_init:
+            config.force_init = self.parameters.force_init
         if 'create' in self.parameters:
             if self.parameters.create:
                 config.operating_mode = OperatingMode.CREATE.value
@@ -165,6 +184,9 @@ class Parameters(object):
         if 'build' in self.parameters:
             if self.parameters.build:
                 config.operating_mode = OperatingMode.BUILD.value
+        if 'rebuild' in self.parameters:
+            if self.parameters.rebuild:
+                config.image_rebuild = self.parameters.rebuild
 
         if 'list_command' in self.parameters:
             self.parameters.v3 = True
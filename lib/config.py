@@ -7,6 +7,7 @@ import argparse
 import attr
 from enum import Enum
 from lib.drivers.network import NetworkDriver
+from lib.drivers.session import SessionRegistry
 from lib.util.envmgr import CatalogRoot
 
 
@@ -55,9 +56,15 @@ cloud_zone = None
 cloud_zone_cycle = None
 test_mode = False
 assume_yes = False
+cache_refresh = False
+stack_workers = 4
+stack_fail_fast = True
+force_init = False
+image_rebuild = False
 operating_mode = OperatingMode.CREATE.value
 catalog_target = CatalogRoot.INVENTORY
 cidr_util = NetworkDriver()
+session_registry = SessionRegistry()
 cloud_base = None
 cloud_network = None
 cloud_subnet = None
@@ -77,6 +84,15 @@ if 'CLOUD_MANAGER_DATABASE_LOCATION' in os.environ:
 else:
     catalog_root = f"{package_dir}/db"
 
+if 'CLOUD_MANAGER_CATALOG_ENGINE' in os.environ:
+    catalog_engine = os.environ['CLOUD_MANAGER_CATALOG_ENGINE']
+else:
+    catalog_engine = "json"
+
+tf_rate_limit = os.environ.get('CLOUD_MANAGER_TF_RATE_LIMIT')
+
+plugin_hard_link = os.environ.get('CLOUD_MANAGER_PLUGIN_HARD_LINK', 'false').lower() in ('1', 'true', 'yes')
+
 
 def process_params(parameters: argparse.Namespace) -> None:
     global enable_debug, \
@@ -90,7 +106,12 @@ def process_params(parameters: argparse.Namespace) -> None:
         update_dns, \
         domain_name, \
         operating_mode, \
-        assume_yes
+        assume_yes, \
+        cache_refresh, \
+        stack_workers, \
+        stack_fail_fast, \
+        force_init, \
+        image_rebuild
     if parameters.debug:
         enable_debug = parameters.debug
     if parameters.name:
@@ -107,6 +128,14 @@ def process_params(parameters: argparse.Namespace) -> None:
         update_dns = parameters.dns
     if parameters.yes:
         assume_yes = parameters.yes
+    if parameters.refresh:
+        cache_refresh = parameters.refresh
+    if parameters.workers:
+        stack_workers = parameters.workers
+    if parameters.keep_going:
+        stack_fail_fast = False
+    if parameters.force_init:
+        force_init = parameters.force_init
     if 'create' in parameters:
         if parameters.create:
             operating_mode = OperatingMode.CREATE.value
@@ -116,6 +145,9 @@ def process_params(parameters: argparse.Namespace) -> None:
     if 'build' in parameters:
         if parameters.build:
             operating_mode = OperatingMode.BUILD.value
+    if 'rebuild' in parameters:
+        if parameters.rebuild:
+            image_rebuild = parameters.rebuild
 
 
 def enable_cloud(name: str) -> None:
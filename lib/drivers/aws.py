@@ -11,6 +11,7 @@ from typing import Iterable, Union
 from itertools import cycle
 from lib.exceptions import AWSDriverError, EmptyResultSet
 from lib.util.filemgr import FileManager
+from lib.util.cachemgr import MetadataCache
 import lib.config as config
 
 
@@ -205,13 +206,20 @@ class CloudBase(object):
         else:
             raise AWSDriverError("Can not determine AWS Region. Please export AWS_DEFAULT_REGION and try again.")
 
+        self.session = config.session_registry.session('aws',
+                                                       self.aws_region,
+                                                       os.environ.get('AWS_PROFILE'),
+                                                       os.environ.get('AWS_ACCESS_KEY_ID'))
+        self.ec2_client = self.session.get_or_create('ec2_client', self.connect)
+
+        self.set_zone()
+
+    def connect(self):
         try:
-            self.ec2_client = boto3.client('ec2', region_name=self.aws_region)
+            return boto3.client('ec2', region_name=self.aws_region)
         except Exception as err:
             raise AWSDriverError(f"can not initialize AWS driver: {err}")
 
-        self.set_zone()
-
     def get_info(self):
         self.logger.info(f"Region:          {self.aws_region}")
         self.logger.info(f"Available Zones: {','.join(self.zone_list)}")
@@ -233,6 +241,18 @@ class CloudBase(object):
         block = dict(sorted(block.items()))
         return block
 
+    @staticmethod
+    def tag_filters(filter_tags: Union[dict, None] = None) -> list[dict]:
+        filters = []
+        if not filter_tags:
+            return filters
+        for key, value in filter_tags.items():
+            if value is None:
+                filters.append({'Name': 'tag-key', 'Values': [key]})
+            else:
+                filters.append({'Name': f"tag:{key}", 'Values': [value]})
+        return filters
+
     @staticmethod
     def tag_exists(key, tags):
         for i in range(len(tags)):
@@ -248,20 +268,26 @@ class CloudBase(object):
         return None
 
     def zones(self) -> list:
+        self.zone_list = list(self.session.get_or_create('zone_list', lambda: MetadataCache().get('zones', self.session.key, self.get_zones)))
+        return self.zone_list
+
+    def get_zones(self) -> list:
+        zone_names = []
+
         try:
             zone_list = self.ec2_client.describe_availability_zones()
         except Exception as err:
             raise AWSDriverError(f"error getting availability zones: {err}")
 
         for availability_zone in zone_list['AvailabilityZones']:
-            self.zone_list.append(availability_zone['ZoneName'])
+            zone_names.append(availability_zone['ZoneName'])
 
-        self.zone_list = sorted(set(self.zone_list))
+        zone_names = sorted(set(zone_names))
 
-        if len(self.zone_list) == 0:
+        if len(zone_names) == 0:
             raise AWSDriverError("can not get AWS availability zones")
 
-        return self.zone_list
+        return zone_names
 
     def set_zone(self) -> None:
         zone_list = self.zones()
@@ -274,7 +300,7 @@ class SecurityGroup(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, vpc_id: str, filter_keys_exist: Union[list[str], None] = None) -> list[dict]:
+    def list(self, vpc_id: str, filter_keys_exist: Union[list[str], None] = None, filter_tags: Union[dict, None] = None) -> list[dict]:
         sg_list = []
         sgs = []
         extra_args = {}
@@ -287,7 +313,7 @@ class SecurityGroup(CloudBase):
 
         try:
             while True:
-                result = self.ec2_client.describe_security_groups(**extra_args, Filters=[vpc_filter])
+                result = self.ec2_client.describe_security_groups(**extra_args, Filters=[vpc_filter] + self.tag_filters(filter_tags))
                 sgs.extend(result['SecurityGroups'])
                 if 'NextToken' not in result:
                     break
@@ -328,15 +354,34 @@ class SecurityGroup(CloudBase):
 
 
 class Network(CloudBase):
+    MANAGED_TAG = "Environment"
 
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, filter_keys_exist: Union[list[str], None] = None) -> list[dict]:
+    def cidr_since(self, cursor: Union[list[str], None] = None) -> tuple[list[str], list[str]]:
+        seen = set(cursor) if cursor else set()
+        cidr_list = []
+        # EC2 can not filter VPCs by creation time, so between full scans only VPCs carrying the tag this tool sets are listed
+        filter_tags = {Network.MANAGED_TAG: None} if cursor is not None else None
+        try:
+            vpcs = self.list(filter_tags=filter_tags)
+        except EmptyResultSet:
+            vpcs = []
+        for item in vpcs:
+            if item['id'] in seen:
+                continue
+            cidr_list.append(item['cidr'])
+            seen.add(item['id'])
+        return cidr_list, sorted(seen)
+
+    def list(self, filter_keys_exist: Union[list[str], None] = None, filter_tags: Union[dict, None] = None) -> list[dict]:
         vpc_list = []
         vpcs = []
         extra_args = {}
+        if filter_tags:
+            extra_args['Filters'] = self.tag_filters(filter_tags)
 
         try:
             while True:
@@ -371,6 +416,16 @@ class Network(CloudBase):
         except EmptyResultSet:
             return iter(())
 
+    def get_account_id(self) -> str:
+        try:
+            return boto3.client('sts', region_name=self.aws_region).get_caller_identity()['Account']
+        except Exception as err:
+            raise AWSDriverError(f"can not determine AWS account: {err}")
+
+    @property
+    def scope(self) -> tuple:
+        return self.session.get_or_create('account_id', lambda: MetadataCache().get('account_id', self.session.key, self.get_account_id)), self.aws_region
+
     def create(self, name: str, cidr: str) -> str:
         vpc_tag = [AWSTagStruct.build("vpc").add(AWSTag("Name", name)).as_dict]
         try:
@@ -407,7 +462,11 @@ class Image(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, filter_keys_exist: Union[list[str], None] = None, is_public: bool = False, owner_id: str = None) -> list[dict]:
+    def get_list(self,
+                 filter_keys_exist: Union[list[str], None] = None,
+                 is_public: bool = False,
+                 owner_id: str = None,
+                 filter_tags: Union[dict, None] = None) -> list[dict]:
         image_list = []
         if owner_id:
             owner_filter = [owner_id]
@@ -439,6 +498,8 @@ class Image(CloudBase):
                 }
             ]
 
+        ami_filter.extend(self.tag_filters(filter_tags))
+
         try:
             images = self.ec2_client.describe_images(Filters=ami_filter, Owners=owner_filter)
         except Exception as err:
@@ -462,6 +523,19 @@ class Image(CloudBase):
 
         return image_list
 
+    def list(self,
+             filter_keys_exist: Union[list[str], None] = None,
+             is_public: bool = False,
+             owner_id: str = None,
+             filter_tags: Union[dict, None] = None) -> list[dict]:
+        if is_public:
+            return MetadataCache().get('public_images',
+                                       self.session.key + (owner_id,
+                                                           tuple(filter_keys_exist) if filter_keys_exist else None,
+                                                           tuple(sorted(filter_tags.items())) if filter_tags else None),
+                                       lambda: self.get_list(filter_keys_exist, is_public, owner_id, filter_tags))
+        return self.get_list(filter_keys_exist, is_public, owner_id, filter_tags)
+
     def details(self, ami_id: str) -> dict:
         ami_filter = {
             'Name': 'image-id',
@@ -519,11 +593,11 @@ class SSHKey(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, filter_keys_exist: Union[list[str], None] = None) -> list[dict]:
+    def list(self, filter_keys_exist: Union[list[str], None] = None, filter_tags: Union[dict, None] = None) -> list[dict]:
         key_list = []
 
         try:
-            key_pairs = self.ec2_client.describe_key_pairs()
+            key_pairs = self.ec2_client.describe_key_pairs(Filters=self.tag_filters(filter_tags))
         except Exception as err:
             raise AWSDriverError(f"error getting key pairs: {err}")
 
@@ -755,6 +829,9 @@ class MachineType(CloudBase):
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def list(self) -> list:
+        return MetadataCache().get('machine_types', self.session.key, self.get_list)
+
+    def get_list(self) -> list:
         type_list = []
         types = []
         extra_args = {}
@@ -14,6 +14,7 @@ from azure.mgmt.resource.resources import ResourceManagementClient
 from azure.mgmt.resource.subscriptions import SubscriptionClient
 from azure.core.exceptions import ResourceNotFoundError
 from lib.util.filemgr import FileManager
+from lib.util.cachemgr import MetadataCache
 from itertools import cycle
 from lib.exceptions import AzureDriverError, EmptyResultSet
 import lib.config as config
@@ -105,47 +106,45 @@ class CloudBase(object):
 
         self.read_config()
 
-        if not self.credential:
-            self.credential = AzureCliCredential()
-        self.subscription_client = SubscriptionClient(self.credential)
-
         if 'AZURE_SUBSCRIPTION_ID' in os.environ:
             self.azure_subscription_id = os.environ['AZURE_SUBSCRIPTION_ID']
-        elif not self.azure_subscription_id:
-            try:
-                subscriptions = self.subscription_client.subscriptions.list()
-            except Exception as err:
-                raise AzureDriverError(f"Azure: unauthorized (use az login): {err}")
-            self.azure_subscription_id = list(next(subscriptions, None))[0]
-        elif not self.azure_subscription_id:
-            raise AzureDriverError("can not determine subscription ID, please authenticate with az login")
 
-        self.resource_client = ResourceManagementClient(self.credential, self.azure_subscription_id)
-        self.compute_client = ComputeManagementClient(self.credential, self.azure_subscription_id)
-        self.network_client = NetworkManagementClient(self.credential, self.azure_subscription_id)
+        self.session = config.session_registry.session('azure',
+                                                       self.cloud_name,
+                                                       self.azure_subscription_id,
+                                                       self.local_context,
+                                                       os.environ.get('AZURE_RESOURCE_GROUP'),
+                                                       os.environ.get('AZURE_LOCATION'))
+
+        if not self.credential:
+            self.credential = self.session.get_or_create('credential', AzureCliCredential)
+        self.subscription_client = self.session.get_or_create('subscription_client', lambda: SubscriptionClient(self.credential))
+
+        if not self.azure_subscription_id:
+            self.azure_subscription_id = self.session.get_or_create('subscription_id', self.get_subscription_id)
+
+        self.resource_client = self.session.get_or_create('resource_client', lambda: ResourceManagementClient(self.credential, self.azure_subscription_id))
+        self.compute_client = self.session.get_or_create('compute_client', lambda: ComputeManagementClient(self.credential, self.azure_subscription_id))
+        self.network_client = self.session.get_or_create('network_client', lambda: NetworkManagementClient(self.credential, self.azure_subscription_id))
 
         if 'AZURE_RESOURCE_GROUP' in os.environ:
             self.azure_resource_group = os.environ['AZURE_RESOURCE_GROUP']
         elif self.local_context:
             context_file = self.auth_directory + '/.azure/.local_context_' + self.local_context
             if os.path.exists(context_file):
-                config = configparser.ConfigParser()
+                config_data = configparser.ConfigParser()
                 try:
-                    config.read(context_file)
+                    config_data.read(context_file)
                 except Exception as err:
                     raise AzureDriverError(f"can not read context file {context_file}: {err}")
-                if 'all' in config:
-                    if 'resource_group_name' in config['all']:
-                        self.azure_resource_group = config['all']['resource_group_name']
+                if 'all' in config_data:
+                    if 'resource_group_name' in config_data['all']:
+                        self.azure_resource_group = config_data['all']['resource_group_name']
 
         if 'AZURE_LOCATION' in os.environ:
             self.azure_location = os.environ['AZURE_LOCATION']
         elif self.azure_resource_group:
-            resource_group = self.resource_client.resource_groups.list()
-            for group in list(resource_group):
-                if group.name == self.azure_resource_group:
-                    self.azure_location = group.location
-                    break
+            self.azure_location = self.session.get_or_create(f"location:{self.azure_resource_group}", self.get_rg_location)
 
         if not self.azure_resource_group and not null_init:
             raise AzureDriverError("can not determine resource group, set AZURE_RESOURCE_GROUP or enable persisted parameters")
@@ -189,21 +188,42 @@ class CloudBase(object):
             if self.cloud_name in config:
                 self.azure_subscription_id = config[self.cloud_name].get('subscription', None)
 
+    def get_subscription_id(self) -> str:
+        try:
+            subscriptions = self.subscription_client.subscriptions.list()
+        except Exception as err:
+            raise AzureDriverError(f"Azure: unauthorized (use az login): {err}")
+        return list(next(subscriptions, None))[0]
+
+    def get_rg_location(self) -> Union[str, None]:
+        resource_group = self.resource_client.resource_groups.list()
+        for group in list(resource_group):
+            if group.name == self.azure_resource_group:
+                return group.location
+        return None
+
     def zones(self) -> list:
+        self.azure_availability_zones = list(self.session.get_or_create(f"zone_list:{self.azure_location}",
+                                                                        lambda: MetadataCache().get('zones', self.session.key + (self.azure_location,), self.get_zones)))
+        self.azure_zone = self.azure_availability_zones[0]
+        return self.azure_availability_zones
+
+    def get_zones(self) -> list:
+        zone_names = []
+
         zone_list = self.compute_client.resource_skus.list(filter=f"location eq '{self.azure_location}'")
         for group in list(zone_list):
             if group.resource_type == 'virtualMachines':
                 for resource_location in group.location_info:
                     for zone_number in resource_location.zones:
-                        self.azure_availability_zones.append(zone_number)
+                        zone_names.append(zone_number)
 
-        self.azure_availability_zones = sorted(set(self.azure_availability_zones))
+        zone_names = sorted(set(zone_names))
 
-        if len(self.azure_availability_zones) == 0:
+        if len(zone_names) == 0:
             raise AzureDriverError("can not get Azure availability zones")
 
-        self.azure_zone = self.azure_availability_zones[0]
-        return self.azure_availability_zones
+        return zone_names
 
     def set_zone(self) -> None:
         zone_list = self.zones()
@@ -240,11 +260,14 @@ class CloudBase(object):
 
         return None
 
-    def list_rg(self, location: Union[str, None] = None, filter_keys_exist: Union[list[str], None] = None) -> list[dict]:
+    def list_rg(self,
+                location: Union[str, None] = None,
+                filter_keys_exist: Union[list[str], None] = None,
+                filter_tags: Union[dict, None] = None) -> list[dict]:
         rg_list = []
 
         try:
-            resource_groups = self.resource_client.resource_groups.list()
+            resource_groups = self.resource_client.resource_groups.list(filter=self.tag_filter(filter_tags))
         except Exception as err:
             raise AzureDriverError(f"error getting resource groups: {err}")
 
@@ -252,6 +275,8 @@ class CloudBase(object):
             if location:
                 if group.location != location:
                     continue
+            if not self.tags_match(group.tags, filter_tags):
+                continue
             rg_block = {'location': group.location,
                         'name': group.name,
                         'id': group.id}
@@ -285,6 +310,28 @@ class CloudBase(object):
             location_list.append(location_block)
         return location_list
 
+    @staticmethod
+    def tag_filter(filter_tags: Union[dict, None] = None) -> Union[str, None]:
+        if not filter_tags:
+            return None
+        # ARM $filter accepts a single tagName/tagValue pair, the remaining tags are checked by tags_match
+        key, value = next(iter(filter_tags.items()))
+        if value is None:
+            return f"tagName eq '{key}'"
+        return f"tagName eq '{key}' and tagValue eq '{value}'"
+
+    @staticmethod
+    def tags_match(tags: Union[dict, None], filter_tags: Union[dict, None] = None) -> bool:
+        if not filter_tags:
+            return True
+        tag_block = {k.lower(): v for k, v in tags.items()} if tags else {}
+        for key, value in filter_tags.items():
+            if key.lower() not in tag_block:
+                return False
+            if value is not None and tag_block[key.lower()] != value:
+                return False
+        return True
+
     @staticmethod
     def process_tags(struct: dict) -> dict:
         block = {}
@@ -308,11 +355,45 @@ class CloudBase(object):
 
 
 class Network(CloudBase):
+    MANAGED_TAG = "environment"
+    VNET_TYPE = "Microsoft.Network/virtualNetworks"
 
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def cidr_since(self, cursor: Union[list[str], None] = None) -> tuple[list[str], list[str]]:
+        seen = set(cursor) if cursor else set()
+        cidr_list = []
+        if not self.azure_resource_group:
+            return cidr_list, sorted(seen)
+
+        if cursor is None:
+            try:
+                vnets = [(item['id'], item['cidr']) for item in self.list()]
+            except EmptyResultSet:
+                vnets = []
+        else:
+            # between full scans only vnets with the tag set on every vnet this tool creates are listed
+            vnets = []
+            try:
+                resources = self.resource_client.resources.list_by_resource_group(self.azure_resource_group,
+                                                                                  filter=self.tag_filter({Network.MANAGED_TAG: None}))
+                for resource in resources:
+                    if resource.type != Network.VNET_TYPE or resource.location != self.azure_location or resource.id.lower() in seen:
+                        continue
+                    vnet = self.network_client.virtual_networks.get(self.azure_resource_group, resource.name)
+                    vnets.append((vnet.id, vnet.address_space.address_prefixes))
+            except Exception as err:
+                raise AzureDriverError(f"error listing vnets: {err}")
+
+        for vnet_id, prefixes in vnets:
+            if vnet_id.lower() in seen:
+                continue
+            cidr_list.extend(prefixes)
+            seen.add(vnet_id.lower())
+        return cidr_list, sorted(seen)
+
     def list(self, resource_group: Union[str, None] = None, filter_keys_exist: Union[list[str], None] = None) -> list[dict]:
         if not resource_group:
             if not self.azure_resource_group:
@@ -352,6 +433,10 @@ class Network(CloudBase):
         except EmptyResultSet:
             return iter(())
 
+    @property
+    def scope(self) -> tuple:
+        return self.azure_subscription_id, self.azure_resource_group
+
     def create(self, name: str, cidr: str, resource_group: Union[str, None] = None) -> str:
         if not resource_group:
             resource_group = self.azure_resource_group
@@ -676,6 +761,9 @@ class MachineType(CloudBase):
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def list(self) -> list:
+        return MetadataCache().get('machine_types', self.session.key + (self.azure_location,), self.get_list)
+
+    def get_list(self) -> list:
         machine_type_list = []
 
         try:
@@ -880,12 +968,22 @@ class Image(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, filter_keys_exist: Union[list[str], None] = None, resource_group: Union[str, None] = None) -> list[dict]:
+    def list(self,
+             filter_keys_exist: Union[list[str], None] = None,
+             resource_group: Union[str, None] = None,
+             filter_tags: Union[dict, None] = None) -> list[dict]:
         image_list = []
         if not resource_group:
             resource_group = self.rg_switch()
 
-        images = self.compute_client.images.list_by_resource_group(resource_group)
+        if filter_tags:
+            try:
+                resources = self.resource_client.resources.list_by_resource_group(resource_group, filter=self.tag_filter(filter_tags))
+            except Exception as err:
+                raise AzureDriverError(f"error getting images: {err}")
+            images = [r for r in resources if r.type == 'Microsoft.Compute/images' and self.tags_match(r.tags, filter_tags)]
+        else:
+            images = self.compute_client.images.list_by_resource_group(resource_group)
 
         for image in list(images):
             image_block = {'name': image.name,
@@ -904,6 +1002,9 @@ class Image(CloudBase):
         return image_list
 
     def public(self, location: str, publisher: str):
+        return MetadataCache().get('public_images', (self.azure_subscription_id, location, publisher), lambda: self.get_public(location, publisher))
+
+    def get_public(self, location: str, publisher: str):
         offer_list = []
         pruned_offer_list = []
 
@@ -3,7 +3,9 @@
 
 import logging
 import os
+from typing import Union
 from lib.util.sessionmgr import CapellaSession
+from lib.util.cachemgr import MetadataCache
 from lib.exceptions import CapellaDriverError, CapellaNotImplemented, EmptyResultSet
 
 
@@ -327,7 +329,7 @@ class CloudBase(object):
         projects = []
         capella = CapellaSession()
 
-        result = capella.api_get("/v2/projects")
+        result = MetadataCache().get('projects', ('capella', os.environ['CBC_ACCESS_KEY']), lambda: capella.api_get("/v2/projects"))
 
         try:
             for item in result:
@@ -357,16 +359,27 @@ class Network(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def cidr_since(self, cursor: Union[list[str], None] = None) -> tuple[list[str], list[str]]:
+        seen = set(cursor) if cursor else set()
+        cidr_list = []
+        for item in self.list(seen=seen):
+            cidr_list.append(item['cidr'])
+            seen.add(item['id'])
+        return cidr_list, sorted(seen)
+
     @staticmethod
-    def list() -> list[dict]:
+    def list(seen: Union[set[str], None] = None) -> list[dict]:
         cidr_list = []
         capella = CapellaSession()
         try:
             for item in CloudBase().capella_get_clusters():
+                if seen and item['id'] in seen:
+                    continue
                 try:
                     cluster = capella.api_get(f"/v3/clusters/{item['id']}")
                     network_block = {
-                        'cidr': cluster[0]["place"]["CIDR"]
+                        'cidr': cluster[0]["place"]["CIDR"],
+                        'id': item['id']
                     }
                     cidr_list.append(network_block)
                 except CapellaNotImplemented:
@@ -380,6 +393,10 @@ class Network(CloudBase):
         for item in self.list():
             yield item['cidr']
 
+    @property
+    def scope(self) -> tuple:
+        return 'capella', os.environ.get('CBC_ACCESS_KEY')
+
 
 class Subnet(CloudBase):
 
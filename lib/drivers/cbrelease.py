@@ -10,6 +10,7 @@ import gzip
 import re
 import json
 from lib.exceptions import CBReleaseManagerError
+from lib.util.cachemgr import MetadataCache
 
 
 class CBRelease(object):
@@ -42,9 +43,9 @@ class CBRelease(object):
     def get_cb_version(self, os_name: str, os_rel: str):
         pkg_mgr = self._get_pkg_mgr(os_name)
         if pkg_mgr == 'yum':
-            versions_list = self.get_rpm(os_rel)
+            versions_list = MetadataCache().get('cb_releases', (pkg_mgr, os_rel), lambda: self.get_rpm(os_rel))
         else:
-            versions_list = self.get_apt(os_rel)
+            versions_list = MetadataCache().get('cb_releases', (pkg_mgr, os_rel), lambda: self.get_apt(os_rel))
         release_list = sorted(versions_list, reverse=True)
         return release_list
 
@@ -132,7 +133,7 @@ class CBRelease(object):
         return return_list
 
     def get_sgw_version(self):
-        versions_list = self.get_sgw_versions()
+        versions_list = MetadataCache().get('sgw_releases', ('sync_gateway',), self.get_sgw_versions)
         release_list = sorted(versions_list, reverse=True)
         return release_list
 
@@ -10,6 +10,7 @@ import googleapiclient.discovery
 import googleapiclient.errors
 from google.oauth2 import service_account
 from lib.exceptions import GCPDriverError, EmptyResultSet
+from lib.util.cachemgr import MetadataCache
 from typing import Union
 from itertools import cycle
 import lib.config as config
@@ -187,15 +188,18 @@ class CloudBase(object):
                 print("can not determine GCP project, please set GCP_PROJECT_ID")
                 raise GCPDriverError("can not determine project ID")
 
+        self.session = config.session_registry.session('gcp', self.gcp_account_file, self.gcp_project, self.gcp_region)
+        self.gcp_client = self.session.get_or_create('gcp_client', self.connect)
+
+        self.set_zone()
+
+    def connect(self):
         try:
             credentials = service_account.Credentials.from_service_account_file(self.gcp_account_file)
-            self.gcp_client = googleapiclient.discovery.build('compute', 'v1', credentials=credentials)
+            return googleapiclient.discovery.build('compute', 'v1', credentials=credentials)
         except Exception as err:
             raise GCPDriverError(f"error connecting to GCP: {err}")
 
-        self.zones()
-        self.set_zone()
-
     def get_info(self):
         self.logger.info(f"Account File:    {self.gcp_account_file}")
         self.logger.info(f"Region:          {self.gcp_region}")
@@ -225,22 +229,28 @@ class CloudBase(object):
             self.gcp_account_email = auth_data['client_email']
 
     def zones(self) -> list:
+        self.gcp_zone_list = list(self.session.get_or_create('zone_list', lambda: MetadataCache().get('zones', self.session.key, self.get_zones)))
+        self.gcp_zone = self.gcp_zone_list[0]
+        return self.gcp_zone_list
+
+    def get_zones(self) -> list:
+        zone_names = []
+
         request = self.gcp_client.zones().list(project=self.gcp_project)
         while request is not None:
             response = request.execute()
             for zone in response['items']:
                 if not zone['name'].startswith(self.gcp_region):
                     continue
-                self.gcp_zone_list.append(zone['name'])
+                zone_names.append(zone['name'])
             request = self.gcp_client.zones().list_next(previous_request=request, previous_response=response)
 
-        self.gcp_zone_list = sorted(set(self.gcp_zone_list))
+        zone_names = sorted(set(zone_names))
 
-        if len(self.gcp_zone_list) == 0:
+        if len(zone_names) == 0:
             raise GCPDriverError("can not get GCP availability zones")
 
-        self.gcp_zone = self.gcp_zone_list[0]
-        return self.gcp_zone_list
+        return zone_names
 
     def set_zone(self) -> None:
         zone_list = self.zones()
@@ -258,6 +268,18 @@ class CloudBase(object):
     def project(self):
         return self.gcp_project
 
+    @staticmethod
+    def label_filter(filter_labels: Union[dict, None] = None) -> Union[str, None]:
+        expressions = []
+        if not filter_labels:
+            return None
+        for key, value in filter_labels.items():
+            if value is None:
+                expressions.append(f"(labels.{key.lower()}:*)")
+            else:
+                expressions.append(f"(labels.{key.lower()} = \"{value}\")")
+        return ' '.join(expressions)
+
     @staticmethod
     def process_labels(struct: dict) -> dict:
         block = {}
@@ -310,16 +332,43 @@ class CloudBase(object):
 
 
 class Network(CloudBase):
+    MANAGED_SUBNET = ".*-subnet"
 
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self) -> list[dict]:
+    def cidr_since(self, cursor: Union[list[str], None] = None) -> tuple[list[str], list[str]]:
+        seen = set(cursor) if cursor else set()
+        cidr_list = []
+        extra_args = {}
+        # subnets can not carry labels, so between full scans only subnets named the way this tool names them are listed
+        if cursor is not None:
+            extra_args['filter'] = f"name eq \"{Network.MANAGED_SUBNET}\""
+
+        try:
+            request = self.gcp_client.subnetworks().list(project=self.gcp_project, region=self.gcp_region, **extra_args)
+            while request is not None:
+                response = request.execute()
+                for subnet in response.get('items', []):
+                    if subnet['id'] in seen:
+                        continue
+                    cidr_list.append(subnet['ipCidrRange'])
+                    seen.add(subnet['id'])
+                request = self.gcp_client.subnetworks().list_next(previous_request=request, previous_response=response)
+        except Exception as err:
+            raise GCPDriverError(f"error listing subnets: {err}")
+
+        return cidr_list, sorted(seen)
+
+    def list(self, filter_name: Union[str, None] = None) -> list[dict]:
         network_list = []
+        extra_args = {}
+        if filter_name:
+            extra_args['filter'] = f"name = \"{filter_name}\""
 
         try:
-            request = self.gcp_client.networks().list(project=self.gcp_project)
+            request = self.gcp_client.networks().list(project=self.gcp_project, **extra_args)
             while request is not None:
                 response = request.execute()
 
@@ -356,6 +405,10 @@ class Network(CloudBase):
         except EmptyResultSet:
             return iter(())
 
+    @property
+    def scope(self) -> tuple:
+        return self.gcp_project,
+
     def create(self, name: str) -> str:
         network_body = {
             "name": name,
@@ -490,6 +543,9 @@ class MachineType(CloudBase):
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def list(self) -> list:
+        return MetadataCache().get('machine_types', self.session.key + (self.gcp_zone,), self.get_list)
+
+    def get_list(self) -> list:
         machine_type_list = []
 
         try:
@@ -608,12 +664,18 @@ class Image(CloudBase):
         super().__init__()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def list(self, filter_keys_exist: Union[list[str], None] = None, project: Union[str, None] = None) -> list[dict]:
+    def get_list(self,
+                 filter_keys_exist: Union[list[str], None] = None,
+                 project: Union[str, None] = None,
+                 filter_labels: Union[dict, None] = None) -> list[dict]:
         image_list = []
+        extra_args = {}
         if not project:
             project = self.gcp_project
+        if filter_labels:
+            extra_args['filter'] = self.label_filter(filter_labels)
 
-        request = self.gcp_client.images().list(project=project)
+        request = self.gcp_client.images().list(project=project, **extra_args)
 
         while request is not None:
             try:
@@ -641,6 +703,16 @@ class Image(CloudBase):
 
         return image_list
 
+    def list(self,
+             filter_keys_exist: Union[list[str], None] = None,
+             project: Union[str, None] = None,
+             filter_labels: Union[dict, None] = None) -> list[dict]:
+        if project and project != self.gcp_project:
+            return MetadataCache().get('public_images',
+                                       ('gcp', project, tuple(filter_keys_exist) if filter_keys_exist else None, self.label_filter(filter_labels)),
+                                       lambda: self.get_list(filter_keys_exist, project, filter_labels))
+        return self.get_list(filter_keys_exist, project, filter_labels)
+
     def details(self, image: str, project: Union[str, None] = None) -> dict:
         if not project:
             project = self.gcp_project
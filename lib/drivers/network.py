@@ -4,43 +4,186 @@
 import ipaddress
 from ipaddress import IPv4Network
 import logging
+import bisect
+import json
+import os
 from typing import Union
+from lib.util.filelock import atomic_write
+
+
+class CIDRAllocator(object):
+    SUPERNETS = [
+        "10.0.0.0/8",
+        "172.16.0.0/12",
+        "192.168.0.0/16"
+    ]
+
+    def __init__(self, supernets: Union[list[str], None] = None, state_file: Union[str, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.supernets = [ipaddress.ip_network(s) for s in (supernets if supernets else CIDRAllocator.SUPERNETS)]
+        self.state_file = state_file
+        self.starts = []
+        self.ends = []
+        self.reserved = []
+        if self.state_file:
+            self.load()
+
+    @staticmethod
+    def interval(cidr: Union[str, IPv4Network]) -> tuple[int, int]:
+        network = ipaddress.ip_network(cidr, strict=False)
+        return int(network.network_address), int(network.network_address) + network.num_addresses
+
+    @staticmethod
+    def network(start: int, end: int) -> str:
+        return ipaddress.ip_network((start, 32 - (end - start).bit_length() + 1)).exploded
+
+    def reserve(self, cidr: Union[str, IPv4Network]) -> None:
+        start, end = self.interval(cidr)
+        bisect.insort(self.reserved, (start, end))
+        index = bisect.bisect_left(self.ends, start)
+        last = index
+        while last < len(self.starts) and self.starts[last] <= end:
+            start = min(start, self.starts[last])
+            end = max(end, self.ends[last])
+            last += 1
+        self.starts[index:last] = [start]
+        self.ends[index:last] = [end]
+
+    def release(self, cidr: Union[str, IPv4Network]) -> bool:
+        entry = self.interval(cidr)
+        position = bisect.bisect_left(self.reserved, entry)
+        if position == len(self.reserved) or self.reserved[position] != entry:
+            return False
+        del self.reserved[position]
+        if self.enclosed(entry):
+            return True
+
+        # CIDR blocks either nest or are disjoint, so only blocks inside the released one still cover part of it
+        start, end = entry
+        index = bisect.bisect_right(self.starts, start) - 1
+        span_start, span_end = self.starts[index], self.ends[index]
+        first = bisect.bisect_left(self.reserved, (start, 0))
+        last = bisect.bisect_left(self.reserved, (end, 0))
+        pieces = [(span_start, start)] if span_start < start else []
+        pieces.extend(self.reserved[first:last])
+        if end < span_end:
+            pieces.append((end, span_end))
+        starts = []
+        ends = []
+        for piece_start, piece_end in pieces:
+            if ends and piece_start <= ends[-1]:
+                ends[-1] = max(ends[-1], piece_end)
+            else:
+                starts.append(piece_start)
+                ends.append(piece_end)
+        self.starts[index:index + 1] = starts
+        self.ends[index:index + 1] = ends
+        return True
+
+    def enclosed(self, entry: tuple[int, int]) -> bool:
+        start, end = entry
+        size = end - start
+        while size <= 1 << 32:
+            block_start = start - start % size
+            position = bisect.bisect_left(self.reserved, (block_start, block_start + size))
+            if position < len(self.reserved) and self.reserved[position] == (block_start, block_start + size):
+                return True
+            size <<= 1
+        return False
+
+    def overlaps(self, cidr: Union[str, IPv4Network]) -> bool:
+        start, end = self.interval(cidr)
+        index = bisect.bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def find(self, prefix: int, supernet: IPv4Network) -> Union[str, None]:
+        if prefix < supernet.prefixlen:
+            return None
+        size = 1 << (32 - prefix)
+        limit = int(supernet.network_address) + supernet.num_addresses
+        candidate = int(supernet.network_address)
+        index = bisect.bisect_right(self.ends, candidate)
+        while candidate + size <= limit:
+            if index == len(self.starts) or self.starts[index] >= candidate + size:
+                return self.network(candidate, candidate + size)
+            candidate = -(-self.ends[index] // size) * size
+            index = bisect.bisect_right(self.ends, candidate, index)
+        return None
+
+    def allocate(self, prefix: int = 16, supernet: Union[str, None] = None) -> Union[str, None]:
+        supernets = [ipaddress.ip_network(supernet)] if supernet else self.supernets
+        for network in supernets:
+            cidr = self.find(prefix, network)
+            if cidr:
+                self.reserve(cidr)
+                self.save()
+                return cidr
+        return None
+
+    def free(self, network: Union[str, IPv4Network], prefix: int = 24):
+        network = ipaddress.ip_network(network)
+        net_start, net_end = self.interval(network)
+        first = bisect.bisect_left(self.reserved, (net_start, 0))
+        last = bisect.bisect_left(self.reserved, (net_end, 0))
+        inner = [r for r in self.reserved[first:last] if r != (net_start, net_end) and r[1] <= net_end]
+        size = 1 << (32 - prefix)
+        candidate = net_start
+        position = 0
+        while candidate + size <= net_end:
+            while position < len(inner) and inner[position][1] <= candidate:
+                position += 1
+            if position < len(inner) and inner[position][0] < candidate + size:
+                candidate = -(-inner[position][1] // size) * size
+                continue
+            yield self.network(candidate, candidate + size)
+            candidate += size
+
+    def as_list(self) -> list[str]:
+        return [self.network(start, end) for start, end in self.reserved]
+
+    def load(self) -> None:
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as state_file:
+                reservations = json.load(state_file)
+        except Exception as err:
+            self.logger.warning(f"can not read CIDR reservations {self.state_file}: {err}")
+            return
+        for cidr in reservations:
+            self.reserve(cidr)
+
+    def save(self) -> None:
+        if not self.state_file:
+            return
+        atomic_write(self.state_file, self.as_list())
 
 
 class NetworkDriver(object):
 
-    def __init__(self):
+    def __init__(self, state_file: Union[str, None] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.ip_space = []
         self.active_network: IPv4Network = ipaddress.ip_network("10.1.0.0/16")
         self.super_net: IPv4Network = ipaddress.ip_network("10.0.0.0/8")
+        self.allocator = CIDRAllocator(state_file=state_file)
 
     def add_network(self, cidr: str) -> None:
         cidr_net = ipaddress.ip_network(cidr)
         self.ip_space.append(cidr_net)
+        self.allocator.reserve(cidr_net)
 
     def get_next_subnet(self, prefix=24) -> str:
-        for subnet in self.active_network.subnets(new_prefix=prefix):
-            yield subnet.exploded
-
-    def get_next_network(self) -> Union[str, None]:
-        candidates = list(self.super_net.subnets(new_prefix=16))
-
-        for network in self.ip_space:
-            available = []
-            for n, candidate in enumerate(candidates):
-                try:
-                    if network.prefixlen < 16:
-                        result = list(network.address_exclude(candidate))
-                    else:
-                        result = list(candidate.address_exclude(network))
-                except ValueError:
-                    available.append(candidate)
-            candidates = available
-
-        if len(candidates) == 0:
+        for subnet in self.allocator.free(self.active_network, prefix=prefix):
+            yield subnet
+
+    def get_next_network(self, prefix=16) -> Union[str, None]:
+        cidr = self.allocator.allocate(prefix, self.super_net.exploded)
+        if not cidr:
+            cidr = self.allocator.allocate(prefix)
+        if not cidr:
             return None
 
-        self.active_network = candidates[0]
+        self.active_network = ipaddress.ip_network(cidr)
         self.ip_space.append(self.active_network)
         return self.active_network.exploded
@@ -0,0 +1,61 @@
+##
+##
+
+import logging
+import threading
+from typing import Callable, Union
+
+
+class DriverSession(object):
+
+    def __init__(self, cloud: str, key: tuple):
+        self.cloud = cloud
+        self.key = key
+        self.data = {}
+        self.lock = threading.RLock()
+
+    def get(self, name: str, default=None):
+        return self.data.get(name, default)
+
+    def set(self, name: str, value) -> None:
+        self.data[name] = value
+
+    def contains(self, name: str) -> bool:
+        return name in self.data
+
+    def get_or_create(self, name: str, factory: Callable):
+        with self.lock:
+            if name not in self.data:
+                self.data[name] = factory()
+            return self.data[name]
+
+
+class SessionRegistry(object):
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sessions = {}
+        self.lock = threading.RLock()
+
+    def session(self, cloud: str, *key) -> DriverSession:
+        index = (cloud,) + tuple(key)
+        with self.lock:
+            if index not in self.sessions:
+                self.logger.debug(f"new {cloud} driver session for {key}")
+                self.sessions[index] = DriverSession(cloud, tuple(key))
+            return self.sessions[index]
+
+    def exists(self, cloud: str, *key) -> bool:
+        return (cloud,) + tuple(key) in self.sessions
+
+    def clear(self, cloud: Union[str, None] = None) -> None:
+        with self.lock:
+            if not cloud:
+                self.sessions.clear()
+                return
+            for index in [k for k in self.sessions if k[0] == cloud]:
+                del self.sessions[index]
+
+    @property
+    def count(self) -> int:
+        return len(self.sessions)
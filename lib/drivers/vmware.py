@@ -8,9 +8,12 @@ import base64
 import random
 import string
 import secrets
+import time
+import atexit
+import threading
 from typing import Union
-from pyVim.connect import SmartConnect
-from pyVmomi import vim
+from pyVim.connect import SmartConnect, Disconnect
+from pyVmomi import vim, vmodl
 from passlib.hash import sha512_crypt
 from lib.exceptions import VMwareDriverError
 from lib.util.filemgr import FileManager
@@ -19,6 +22,137 @@ import lib.config as config
 from lib.util.envmgr import CatalogRoot
 
 
+class VMwareConnection(object):
+    KEEPALIVE_INTERVAL = 300
+    SESSION_CHECK_INTERVAL = 60
+    RETRIEVE_PAGE_SIZE = 1000
+
+    def __init__(self, hostname: str, username: str, password: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.si = None
+        self.service_content = None
+        self.generation = 0
+        self.last_used = 0
+        self.cache = {}
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+        self.keepalive_thread = None
+        atexit.register(self.disconnect)
+
+    @classmethod
+    def get(cls, hostname: str, username: str, password: str):
+        session = config.session_registry.session('vmware', hostname, username)
+        connection = session.get_or_create('connection', lambda: cls(hostname, username, password))
+        if connection.password != password:
+            connection.password = password
+            connection.disconnect()
+        return connection
+
+    def connect(self) -> None:
+        with self.lock:
+            self.logger.debug(f"connecting to vSphere host {self.hostname} as {self.username}")
+            try:
+                self.si = SmartConnect(host=self.hostname,
+                                       user=self.username,
+                                       pwd=self.password,
+                                       port=443,
+                                       disableSslCertValidation=True)
+                self.service_content = self.si.RetrieveContent()
+            except Exception as err:
+                self.si = None
+                self.service_content = None
+                raise VMwareDriverError(f"can not connect to vSphere: {err}")
+            self.generation += 1
+            self.last_used = time.time()
+            self.cache.clear()
+            self.start_keepalive()
+
+    def alive(self) -> bool:
+        try:
+            return self.service_content.sessionManager.currentSession is not None
+        except Exception as err:
+            self.logger.debug(f"vSphere session check failed: {err}")
+            return False
+
+    def keepalive(self, stop_event: threading.Event) -> None:
+        while not stop_event.wait(self.KEEPALIVE_INTERVAL):
+            with self.lock:
+                if not self.si:
+                    continue
+                try:
+                    self.si.CurrentTime()
+                except Exception as err:
+                    self.logger.debug(f"vSphere keepalive failed: {err}")
+
+    def start_keepalive(self) -> None:
+        if self.keepalive_thread and self.keepalive_thread.is_alive() and not self.stop_event.is_set():
+            return
+        self.stop_event = threading.Event()
+        self.keepalive_thread = threading.Thread(target=self.keepalive, args=(self.stop_event,), daemon=True)
+        self.keepalive_thread.start()
+
+    def disconnect(self) -> None:
+        self.stop_event.set()
+        with self.lock:
+            if self.si:
+                try:
+                    Disconnect(self.si)
+                except Exception as err:
+                    self.logger.debug(f"vSphere disconnect error: {err}")
+            self.si = None
+            self.service_content = None
+
+    @property
+    def service_instance(self):
+        with self.lock:
+            if not self.si:
+                self.connect()
+            elif time.time() - self.last_used > self.SESSION_CHECK_INTERVAL and not self.alive():
+                self.logger.debug("vSphere session expired, reconnecting")
+                self.connect()
+            self.last_used = time.time()
+            return self.si
+
+    @property
+    def content(self):
+        with self.lock:
+            _ = self.service_instance
+            return self.service_content
+
+    def retrieve(self, obj_type, properties: list[str], root=None) -> list[dict]:
+        content = self.content
+        results = []
+        view = content.viewManager.CreateContainerView(root if root else content.rootFolder, [obj_type], True)
+        try:
+            traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(name='traverseEntities',
+                                                                         path='view',
+                                                                         skip=False,
+                                                                         type=vim.view.ContainerView)
+            object_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal_spec])
+            property_spec = vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=properties, all=False)
+            filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=[property_spec])
+            options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=self.RETRIEVE_PAGE_SIZE)
+            collector = content.propertyCollector
+
+            result = collector.RetrievePropertiesEx([filter_spec], options)
+            while result:
+                for object_content in result.objects:
+                    item = {'obj': object_content.obj}
+                    for prop in object_content.propSet:
+                        item[prop.name] = prop.val
+                    results.append(item)
+                if not result.token:
+                    break
+                result = collector.ContinueRetrievePropertiesEx(result.token)
+        finally:
+            view.Destroy()
+
+        return results
+
+
 class CloudBase(object):
     VERSION = '3.0.0'
     PUBLIC_CLOUD = False
@@ -230,6 +364,10 @@ class CloudBase(object):
 
             return True
 
+    @property
+    def connection(self) -> VMwareConnection:
+        return VMwareConnection.get(self.vmware_hostname, self.vmware_username, self.vmware_password)
+
     def vmware_get_hostname(self) -> str:
         self.vmware_hostname = Inquire().ask_text("vSphere Host Name")
         return self.vmware_hostname
@@ -244,12 +382,11 @@ class CloudBase(object):
 
     def vmware_get_datacenter(self) -> str:
         try:
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
+            connection = self.connection
+            content = connection.content
+            if self.vmware_datacenter and self.vmware_datacenter in connection.cache:
+                self.vmware_dc_folder, self.vmware_network_folder, self.vmware_host_folder = connection.cache[self.vmware_datacenter]
+                return self.vmware_datacenter
             datacenter = []
             container = content.viewManager.CreateContainerView(content.rootFolder, [vim.Datacenter], True)
 
@@ -264,6 +401,7 @@ class CloudBase(object):
                     self.vmware_dc_folder = c
                     self.vmware_network_folder = c.networkFolder
                     self.vmware_host_folder = c.hostFolder
+                    connection.cache[self.vmware_datacenter] = (self.vmware_dc_folder, self.vmware_network_folder, self.vmware_host_folder)
             container.Destroy()
             return self.vmware_datacenter
         except Exception as err:
@@ -273,12 +411,7 @@ class CloudBase(object):
         pg_list = []
 
         try:
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
+            content = self.connection.content
             container = content.viewManager.CreateContainerView(self.vmware_network_folder, [vim.dvs.DistributedVirtualPortgroup], True)
             for managed_object_ref in container.view:
                 if managed_object_ref.config.distributedVirtualSwitch.config.name == dvs_name:
@@ -295,12 +428,7 @@ class CloudBase(object):
         dvs_list = []
 
         try:
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
+            content = self.connection.content
             container = content.viewManager.CreateContainerView(self.vmware_network_folder,
                                                                 [vim.dvs.VmwareDistributedVirtualSwitch],
                                                                 True)
@@ -328,19 +456,13 @@ class CloudBase(object):
     def vmware_get_hosts(self, cluster: str) -> list[dict]:
         try:
             hosts = []
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
-            container = content.viewManager.CreateContainerView(content.rootFolder, [vim.ComputeResource], True)
-            for managed_object_ref in container.view:
-                if managed_object_ref.name == cluster:
-                    for host in managed_object_ref.host:
-                        host_struct = {'name': host.name, 'hostname': host.config.network.dnsConfig.hostName}
-                        hosts.append(host_struct)
-            container.Destroy()
+            connection = self.connection
+            for compute_resource in connection.retrieve(vim.ComputeResource, ['name']):
+                if compute_resource.get('name') != cluster:
+                    continue
+                for host in connection.retrieve(vim.HostSystem, ['name', 'config.network.dnsConfig.hostName'], root=compute_resource['obj']):
+                    host_struct = {'name': host.get('name'), 'hostname': host.get('config.network.dnsConfig.hostName')}
+                    hosts.append(host_struct)
             self.vmware_hosts = hosts
             return self.vmware_hosts
         except Exception as err:
@@ -383,26 +505,18 @@ class CloudBase(object):
 
     def vmware_get_datastore(self) -> str:
         try:
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
             datastore_list = []
-            container = content.viewManager.CreateContainerView(content.rootFolder, [vim.HostSystem], True)
-            esxi_hosts = container.view
-            for esxi_host in esxi_hosts:
-                storage_system = esxi_host.configManager.storageSystem
-                host_file_sys_vol_mount_info = storage_system.fileSystemVolumeInfo.mountInfo
-                for host_mount_info in host_file_sys_vol_mount_info:
+            for esxi_host in self.connection.retrieve(vim.HostSystem, ['config.fileSystemVolume']):
+                file_system_volume = esxi_host.get('config.fileSystemVolume')
+                if not file_system_volume:
+                    continue
+                for host_mount_info in file_system_volume.mountInfo:
                     if host_mount_info.volume.type == 'VFFS' or host_mount_info.volume.type == 'OTHER':
                         continue
                     datastore_struct = {'name': host_mount_info.volume.name,
                                         'type': host_mount_info.volume.type}
                     datastore_list.append(datastore_struct)
             selection = Inquire().ask_list_dict('Select datastore', datastore_list)
-            container.Destroy()
             self.vmware_datastore = selection['name']
             return self.vmware_datastore
         except Exception as err:
@@ -431,21 +545,13 @@ class CloudBase(object):
     def vmware_get_templates(self) -> Union[dict, list[dict]]:
         templates = []
         try:
-            si = SmartConnect(host=self.vmware_hostname,
-                              user=self.vmware_username,
-                              pwd=self.vmware_password,
-                              port=443,
-                              disableSslCertValidation=True)
-            content = si.RetrieveContent()
-            container = content.viewManager.CreateContainerView(content.rootFolder, [vim.VirtualMachine], True)
-            for managed_object_ref in container.view:
-                if managed_object_ref.config.template:
-                    image_block = {'name': managed_object_ref.name, 'datetime': managed_object_ref.config.createDate}
+            for vm in self.connection.retrieve(vim.VirtualMachine, ['name', 'config.template', 'config.createDate']):
+                if vm.get('config.template'):
+                    image_block = {'name': vm.get('name'), 'datetime': vm.get('config.createDate')}
                     if self.check_image_name_format(image_block['name']):
                         image_block['type'] = image_block.get('name').split('-')[0]
                         image_block['release'] = image_block.get('name').split('-')[1]
                         templates.append(image_block)
-            container.Destroy()
 
             self.vmware_templates = templates
             return self.vmware_templates
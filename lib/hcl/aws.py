@@ -3,13 +3,16 @@
 
 import logging
 import json
+from typing import Union
 from lib.util.envmgr import PathMap, PathType, ConfigFile, CatalogManager
 from lib.exceptions import AWSDriverError, EmptyResultSet
 from lib.drivers.cbrelease import CBRelease
 from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
 from lib.util.inquire import Inquire
 from lib.util.filemgr import FileManager
 from lib.invoke import tf_run, packer_run
+from lib.util.imagemgr import ImageTarget, ImageBuildKey
 from lib.util.cfgmgr import ConfigMgr
 from lib.util.aws_data import DataCollect
 from lib.util.common_data import ClusterCollect
@@ -80,6 +83,30 @@ class CloudDriver(object):
 
         cb_release_choice = self.ask.ask_list_basic("Select CBS release", release_list)
 
+        target = ImageTarget.build(config.cloud, os_choice, distro_table.version, cb_release_choice)
+        cfg_file = self.image_config(target)
+
+        image = None if config.image_rebuild else self.find_image(target)
+        if image:
+            print(f"Using existing {os_choice} {distro_table.version} {cb_release_choice} image {image['name']} (use --rebuild to build a new image)")
+            return
+
+        try:
+            print("")
+            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
+            pr = packer_run(working_dir=cfg_file.file_path)
+            pr.init(cfg_file.file_name)
+            pr.build_gen(cfg_file.file_name)
+        except Exception as err:
+            AWSDriverError(f"can not build image: {err}")
+
+    def image_config(self, target: ImageTarget, variant: Union[str, None] = None) -> ConfigFile:
+        region = config.cloud_base().region
+
+        os_choice = target.os
+        distro_table = AWSImageDataRecord.by_version(target.os, target.os_release, self.config.build)
+        cb_release_choice = target.cb_version
+
         var_list = [
             ("os_linux_type", os_choice, "OS Name"),
             ("region_name", region, "Region name"),
@@ -106,7 +133,7 @@ class CloudDriver(object):
         source_block = Source.construct(
             SourceType.construct(
                 NodeType.construct(
-                    NodeElements.construct('os_linux_type', "os_linux_release", "c5.xlarge", "region_name", "os_image_name", "os_image_owner", "os_image_user", "cb_version")
+                    NodeElements.construct('os_linux_type', "os_linux_release", "c5.xlarge", "region_name", "os_image_name", "os_image_owner", "os_image_user", "cb_version", "build_key")
                     .as_dict)
                 .as_key("cb-node"))
             .as_key("amazon-ebs"))
@@ -137,6 +164,11 @@ class CloudDriver(object):
         for item in var_list:
             var_block.add(Variable.construct(item[0], item[1], item[2]).as_dict)
 
+        build_key = ImageBuildKey.compute(distro_table, cb_release_choice, CloudDriver.HOST_PREP_REPO,
+                                          [packer_block.as_dict, locals_block.as_dict, source_block.as_dict, build_block.as_dict, var_block.as_dict])
+        var_block.add(Variable.construct("build_key", build_key, "Build Key").as_dict)
+        target.build_key = build_key
+
         packer_config = ImageMain.build()\
             .add(packer_block.as_dict)\
             .add(locals_block.as_dict)\
@@ -144,7 +176,7 @@ class CloudDriver(object):
             .add(build_block.as_dict)\
             .add(var_block.as_dict).as_dict
 
-        self.path_map.map(PathType.IMAGE)
+        self.path_map.map(PathType.IMAGE, variant)
         cfg_file: ConfigFile
         cfg_file = self.path_map.use(CloudDriver.IMAGE_CONFIG, PathType.IMAGE)
         try:
@@ -153,17 +185,17 @@ class CloudDriver(object):
         except Exception as err:
             raise AWSDriverError(f"can not write to image config file {cfg_file.file_name}: {err}")
 
+        return cfg_file
+
+    def find_image(self, target: ImageTarget) -> Union[dict, None]:
         try:
-            print("")
-            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
-            pr = packer_run(working_dir=cfg_file.file_path)
-            pr.init(cfg_file.file_name)
-            pr.build_gen(cfg_file.file_name)
-        except Exception as err:
-            AWSDriverError(f"can not build image: {err}")
+            image_list = config.cloud_image().list(filter_tags={"BuildKey": target.build_key})
+        except EmptyResultSet:
+            return None
+        return sorted(image_list, key=lambda i: i['date'], reverse=True)[0]
 
     def list_images(self):
-        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_tags={"Release": None, "Type": None, "Version": None})
         self.ask.list_dict(f"Images in cloud {config.cloud}", image_list, sort_key="date")
 
     def create_nodes(self, node_type: str):
@@ -555,10 +587,8 @@ class CloudDriver(object):
         cidr_util = NetworkDriver()
         subnet_count = 0
 
-        for net in config.cloud_network().cidr_list:
-            cidr_util.add_network(net)
-
-        vpc_cidr = cidr_util.get_next_network()
+        ledger = NetworkLedger.from_config()
+        vpc_cidr = ledger.allocate(cidr_util, config.env_name)
         subnet_list = list(cidr_util.get_next_subnet())
         zone_list = config.cloud_base().zones()
         region = config.cloud_base().region
@@ -674,6 +704,7 @@ class CloudDriver(object):
                 raise AWSDriverError("Environment is not configured properly, please check the log and try again.")
             tf.apply()
         except Exception as err:
+            ledger.conflict(vpc_cidr)
             raise AWSDriverError(f"can not create VPC: {err}")
 
     def list_net(self):
@@ -697,6 +728,7 @@ class CloudDriver(object):
                 if not tf.validate():
                     tf.init()
                 tf.destroy()
+                NetworkLedger.from_config().release(config.env_name)
         except Exception as err:
             raise AWSDriverError(f"can not destroy VPC: {err}")
 
@@ -2,6 +2,7 @@
 
 import attr
 from attr.validators import instance_of as io
+from typing import Union
 
 
 @attr.s
@@ -339,19 +340,23 @@ class NodeElements(object):
                   os_image_name: str,
                   os_image_owner: str,
                   os_image_user: str,
-                  cb_version: str):
+                  cb_version: str,
+                  build_key: Union[str, None] = None):
+        tags = {
+            "Name": f"${{var.{os_linux_type}}}-${{var.{os_linux_release}}}-${{var.{cb_version}}}",
+            "Release": f"${{var.{os_linux_release}}}",
+            "Type": f"${{var.{os_linux_type}}}",
+            "Version": f"${{var.{cb_version}}}"
+        }
+        if build_key:
+            tags["BuildKey"] = f"${{var.{build_key}}}"
         return cls(
             f"cf-${{var.{os_linux_type}}}-${{var.{os_linux_release}}}-cbs-${{local.timestamp}}",
             f"{instance_type}",
             f"${{var.{region_var}}}",
             [AMIFilter.construct(os_image_name, os_image_owner).as_dict],
             f"${{var.{os_image_user}}}",
-            {
-                "Name": f"${{var.{os_linux_type}}}-${{var.{os_linux_release}}}-${{var.{cb_version}}}",
-                "Release": f"${{var.{os_linux_release}}}",
-                "Type": f"${{var.{os_linux_type}}}",
-                "Version": f"${{var.{cb_version}}}"
-            }
+            tags
         )
 
     @property
@@ -4,13 +4,16 @@
 import logging
 import json
 import os
+from typing import Union
 from lib.util.envmgr import PathMap, PathType, ConfigFile
-from lib.exceptions import AzureDriverError
+from lib.exceptions import AzureDriverError, EmptyResultSet
 from lib.drivers.cbrelease import CBRelease
 from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
 from lib.util.inquire import Inquire
 import lib.config as config
 from lib.invoke import tf_run, packer_run
+from lib.util.imagemgr import ImageTarget, ImageBuildKey
 from lib.util.cfgmgr import ConfigMgr
 from lib.util.azure_data import DataCollect
 from lib.util.common_data import ClusterCollect
@@ -37,6 +40,7 @@ class CloudDriver(object):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.config = None
         self.ask = Inquire()
+        self.image_env = None
 
         if not config.env_name:
             raise AzureDriverError("no environment specified")
@@ -64,6 +68,44 @@ class CloudDriver(object):
     def create_image(self):
         cb_rel = CBRelease()
 
+        azure_location, azure_resource_group = self.image_location()
+
+        print(f"Configuring image in location {azure_location}")
+
+        os_list = [i for i in self.config.build.keys()]
+        os_choice = self.ask.ask_list_basic("Select OS", os_list)
+
+        distro_list = Entry.from_config(os_choice, self.config.build)
+
+        distro_choice = self.ask.ask_list_dict("Select OS revision", distro_list.versions)
+
+        distro_table = AzureImageDataRecord.from_config(distro_choice)
+
+        release_list = cb_rel.get_cb_version(os_choice, distro_table.version)
+
+        cb_release_choice = self.ask.ask_list_basic("Select CBS release", release_list)
+
+        target = ImageTarget.build(config.cloud, os_choice, distro_table.version, cb_release_choice)
+        cfg_file = self.image_config(target)
+
+        image = None if config.image_rebuild else self.find_image(target)
+        if image:
+            print(f"Using existing {os_choice} {distro_table.version} {cb_release_choice} image {image['name']} (use --rebuild to build a new image)")
+            return
+
+        try:
+            print("")
+            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
+            pr = packer_run(working_dir=cfg_file.file_path)
+            pr.init(cfg_file.file_name)
+            pr.build_gen(cfg_file.file_name)
+        except Exception as err:
+            AzureDriverError(f"can not build image: {err}")
+
+    def image_location(self) -> tuple[str, str]:
+        if self.image_env:
+            return self.image_env
+
         azure_location = config.cloud_base().region
 
         if not azure_location:
@@ -87,20 +129,15 @@ class CloudDriver(object):
 
         os.environ['AZURE_RESOURCE_GROUP'] = azure_resource_group
 
-        print(f"Configuring image in location {azure_location}")
+        self.image_env = (azure_location, azure_resource_group)
+        return self.image_env
 
-        os_list = [i for i in self.config.build.keys()]
-        os_choice = self.ask.ask_list_basic("Select OS", os_list)
+    def image_config(self, target: ImageTarget, variant: Union[str, None] = None) -> ConfigFile:
+        azure_location, azure_resource_group = self.image_location()
 
-        distro_list = Entry.from_config(os_choice, self.config.build)
-
-        distro_choice = self.ask.ask_list_dict("Select OS revision", distro_list.versions)
-
-        distro_table = AzureImageDataRecord.from_config(distro_choice)
-
-        release_list = cb_rel.get_cb_version(os_choice, distro_table.version)
-
-        cb_release_choice = self.ask.ask_list_basic("Select CBS release", release_list)
+        os_choice = target.os
+        distro_table = AzureImageDataRecord.by_version(target.os, target.os_release, self.config.build)
+        cb_release_choice = target.cb_version
 
         var_list = [
             ("os_linux_type", os_choice, "OS Name", "string"),
@@ -138,7 +175,8 @@ class CloudDriver(object):
                                            "os_image_offer",
                                            "os_image_publisher",
                                            "os_image_sku",
-                                           "cb_version")
+                                           "cb_version",
+                                           "build_key")
                     .as_dict)
                 .as_key("cb-node"))
             .as_key("azure-arm"))
@@ -169,6 +207,11 @@ class CloudDriver(object):
         for item in var_list:
             var_block.add(Variable.construct(item[0], item[1], item[2]).as_dict)
 
+        build_key = ImageBuildKey.compute(distro_table, cb_release_choice, CloudDriver.HOST_PREP_REPO,
+                                          [packer_block.as_dict, locals_block.as_dict, source_block.as_dict, build_block.as_dict, var_block.as_dict])
+        var_block.add(Variable.construct("build_key", build_key, "Build Key").as_dict)
+        target.build_key = build_key
+
         packer_config = ImageMain.build() \
             .add(packer_block.as_dict) \
             .add(locals_block.as_dict) \
@@ -176,7 +219,7 @@ class CloudDriver(object):
             .add(build_block.as_dict) \
             .add(var_block.as_dict).as_dict
 
-        self.path_map.map(PathType.IMAGE)
+        self.path_map.map(PathType.IMAGE, variant)
         cfg_file: ConfigFile
         cfg_file = self.path_map.use(CloudDriver.IMAGE_CONFIG, PathType.IMAGE)
         try:
@@ -185,14 +228,15 @@ class CloudDriver(object):
         except Exception as err:
             raise AzureDriverError(f"can not write to image config file {cfg_file.file_name}: {err}")
 
+        return cfg_file
+
+    def find_image(self, target: ImageTarget) -> Union[dict, None]:
+        azure_location, azure_resource_group = self.image_location()
         try:
-            print("")
-            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
-            pr = packer_run(working_dir=cfg_file.file_path)
-            pr.init(cfg_file.file_name)
-            pr.build_gen(cfg_file.file_name)
-        except Exception as err:
-            AzureDriverError(f"can not build image: {err}")
+            image_list = config.cloud_image().list(resource_group=azure_resource_group, filter_tags={"BuildKey": target.build_key})
+        except EmptyResultSet:
+            return None
+        return image_list[0]
 
     def list_images(self):
         azure_location = config.cloud_base().region
@@ -201,7 +245,7 @@ class CloudDriver(object):
             result = Inquire().ask_list_dict('Azure Location', location_list)
             azure_location = result['name']
             os.environ['AZURE_LOCATION'] = azure_location
-        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_tags={"Release": None, "Type": None, "Version": None})
         self.ask.list_dict(f"Images in cloud {config.cloud}", image_list, sort_key="name", hide_key=['id'])
 
     def create_nodes(self, node_type: str):
@@ -673,10 +717,8 @@ class CloudDriver(object):
     def create_net(self):
         cidr_util = NetworkDriver()
 
-        for net in config.cloud_network().cidr_list:
-            cidr_util.add_network(net)
-
-        vpc_cidr = cidr_util.get_next_network()
+        ledger = NetworkLedger.from_config()
+        vpc_cidr = ledger.allocate(cidr_util, config.env_name)
         subnet_list = list(cidr_util.get_next_subnet())
         region = config.cloud_base().region
 
@@ -754,6 +796,7 @@ class CloudDriver(object):
                 raise AzureDriverError("Environment is not configured properly, please check the log and try again.")
             tf.apply()
         except Exception as err:
+            ledger.conflict(vpc_cidr)
             raise AzureDriverError(f"can not create VPC: {err}")
 
     def list_net(self):
@@ -777,6 +820,7 @@ class CloudDriver(object):
                 if not tf.validate():
                     tf.init()
                 tf.destroy()
+                NetworkLedger.from_config().release(config.env_name)
         except Exception as err:
             raise AzureDriverError(f"can not destroy VPC: {err}")
 
@@ -2,6 +2,7 @@
 
 import attr
 from attr.validators import instance_of as io
+from typing import Union
 
 
 @attr.s
@@ -326,7 +327,16 @@ class NodeElements(object):
                   os_image_offer: str,
                   os_image_publisher: str,
                   os_image_sku: str,
-                  cb_version: str):
+                  cb_version: str,
+                  build_key: Union[str, None] = None):
+        tags = {
+            "Name": f"${{var.{os_linux_type}}}-${{var.{os_linux_release}}}-${{var.{cb_version}}}",
+            "Release": f"${{var.{os_linux_release}}}",
+            "Type": f"${{var.{os_linux_type}}}",
+            "Version": f"${{var.{cb_version}}}"
+        }
+        if build_key:
+            tags["BuildKey"] = f"${{var.{build_key}}}"
         return cls(
             f"${{var.{os_image_offer}}}",
             f"${{var.{os_image_publisher}}}",
@@ -337,12 +347,7 @@ class NodeElements(object):
             f"{os_type}",
             True,
             f"{machine_type}",
-            {
-                "Name": f"${{var.{os_linux_type}}}-${{var.{os_linux_release}}}-${{var.{cb_version}}}",
-                "Release": f"${{var.{os_linux_release}}}",
-                "Type": f"${{var.{os_linux_type}}}",
-                "Version": f"${{var.{cb_version}}}"
-            }
+            tags
         )
 
     @property
@@ -3,13 +3,16 @@
 
 import logging
 import json
+from typing import Union
 from lib.util.envmgr import PathMap, PathType, ConfigFile, CatalogManager
-from lib.exceptions import GCPDriverError
+from lib.exceptions import GCPDriverError, EmptyResultSet
 from lib.drivers.cbrelease import CBRelease
 from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
 from lib.util.inquire import Inquire
 import lib.config as config
 from lib.invoke import tf_run, packer_run
+from lib.util.imagemgr import ImageTarget, ImageBuildKey
 from lib.util.cfgmgr import ConfigMgr
 from lib.util.gcp_data import DataCollect
 from lib.util.common_data import ClusterCollect
@@ -62,8 +65,6 @@ class CloudDriver(object):
         cb_rel = CBRelease()
 
         gcp_zone = config.cloud_base().gcp_zone
-        gcp_account_file = config.cloud_base().account_file
-        gcp_project = config.cloud_base().project
 
         print(f"Configuring image in zone {gcp_zone}")
 
@@ -80,6 +81,32 @@ class CloudDriver(object):
 
         cb_release_choice = self.ask.ask_list_basic("Select CBS release", release_list)
 
+        target = ImageTarget.build(config.cloud, os_choice, distro_table.version, cb_release_choice)
+        cfg_file = self.image_config(target)
+
+        image = None if config.image_rebuild else self.find_image(target)
+        if image:
+            print(f"Using existing {os_choice} {distro_table.version} {cb_release_choice} image {image['name']} (use --rebuild to build a new image)")
+            return
+
+        try:
+            print("")
+            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
+            pr = packer_run(working_dir=cfg_file.file_path)
+            pr.init(cfg_file.file_name)
+            pr.build_gen(cfg_file.file_name)
+        except Exception as err:
+            GCPDriverError(f"can not build image: {err}")
+
+    def image_config(self, target: ImageTarget, variant: Union[str, None] = None) -> ConfigFile:
+        gcp_zone = config.cloud_base().gcp_zone
+        gcp_account_file = config.cloud_base().account_file
+        gcp_project = config.cloud_base().project
+
+        os_choice = target.os
+        distro_table = GCPImageDataRecord.by_version(target.os, target.os_release, self.config.build)
+        cb_release_choice = target.cb_version
+
         var_list = [
             ("os_linux_type", os_choice, "OS Name", "string"),
             ("gcp_account_file", gcp_account_file, "Zone name", "string"),
@@ -117,7 +144,8 @@ class CloudDriver(object):
                                            "os_image_name",
                                            "os_image_family",
                                            "os_image_user",
-                                           "cb_version")
+                                           "cb_version",
+                                           "build_key")
                     .as_dict)
                 .as_key("cb-node"))
             .as_key("googlecompute"))
@@ -148,6 +176,11 @@ class CloudDriver(object):
         for item in var_list:
             var_block.add(Variable.construct(item[0], item[1], item[2]).as_dict)
 
+        build_key = ImageBuildKey.compute(distro_table, cb_release_choice, CloudDriver.HOST_PREP_REPO,
+                                          [packer_block.as_dict, locals_block.as_dict, source_block.as_dict, build_block.as_dict, var_block.as_dict])
+        var_block.add(Variable.construct("build_key", build_key, "Build Key").as_dict)
+        target.build_key = build_key
+
         packer_config = ImageMain.build() \
             .add(packer_block.as_dict) \
             .add(locals_block.as_dict) \
@@ -155,7 +188,7 @@ class CloudDriver(object):
             .add(build_block.as_dict) \
             .add(var_block.as_dict).as_dict
 
-        self.path_map.map(PathType.IMAGE)
+        self.path_map.map(PathType.IMAGE, variant)
         cfg_file: ConfigFile
         cfg_file = self.path_map.use(CloudDriver.IMAGE_CONFIG, PathType.IMAGE)
         try:
@@ -164,17 +197,17 @@ class CloudDriver(object):
         except Exception as err:
             raise GCPDriverError(f"can not write to image config file {cfg_file.file_name}: {err}")
 
+        return cfg_file
+
+    def find_image(self, target: ImageTarget) -> Union[dict, None]:
         try:
-            print("")
-            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
-            pr = packer_run(working_dir=cfg_file.file_path)
-            pr.init(cfg_file.file_name)
-            pr.build_gen(cfg_file.file_name)
-        except Exception as err:
-            GCPDriverError(f"can not build image: {err}")
+            image_list = config.cloud_image().list(filter_labels={"build_key": target.build_key})
+        except EmptyResultSet:
+            return None
+        return sorted(image_list, key=lambda i: i['date'], reverse=True)[0]
 
     def list_images(self):
-        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+        image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_labels={"release": None, "type": None, "version": None})
         self.ask.list_dict(f"Images in cloud {config.cloud}", image_list, sort_key="date", hide_key=["link"])
 
     def create_nodes(self, node_type: str):
@@ -570,10 +603,8 @@ class CloudDriver(object):
     def create_net(self):
         cidr_util = NetworkDriver()
 
-        for net in config.cloud_network().cidr_list:
-            cidr_util.add_network(net)
-
-        vpc_cidr = cidr_util.get_next_network()
+        ledger = NetworkLedger.from_config()
+        vpc_cidr = ledger.allocate(cidr_util, config.env_name)
         subnet_list = list(cidr_util.get_next_subnet())
         region = config.cloud_base().region
         project = config.cloud_base().project
@@ -650,6 +681,7 @@ class CloudDriver(object):
                 raise GCPDriverError("Environment is not configured properly, please check the log and try again.")
             tf.apply()
         except Exception as err:
+            ledger.conflict(vpc_cidr)
             raise GCPDriverError(f"can not create VPC: {err}")
 
     def list_net(self):
@@ -673,6 +705,7 @@ class CloudDriver(object):
                 if not tf.validate():
                     tf.init()
                 tf.destroy()
+                NetworkLedger.from_config().release(config.env_name)
         except Exception as err:
             raise GCPDriverError(f"can not destroy VPC: {err}")
 
@@ -2,6 +2,7 @@
 
 import attr
 from attr.validators import instance_of as io
+from typing import Union
 
 
 @attr.s
@@ -322,7 +323,16 @@ class NodeElements(object):
                   os_image_name: str,
                   os_image_family: str,
                   os_image_user: str,
-                  cb_version: str):
+                  cb_version: str,
+                  build_key: Union[str, None] = None):
+        labels = {
+            "name": f"${{format(\"%s-%s-%s\", var.{os_linux_type}, var.{os_linux_release}, replace(var.{cb_version}, \".\", \"_\"))}}",
+            "release": f"${{var.{os_linux_release}}}",
+            "type": f"${{var.{os_linux_type}}}",
+            "version": f"${{replace(var.{cb_version}, \".\", \"_\")}}"
+        }
+        if build_key:
+            labels["build_key"] = f"${{var.{build_key}}}"
         return cls(
             f"${{var.{gcp_account_file}}}",
             "ssh",
@@ -335,12 +345,7 @@ class NodeElements(object):
             "1h",
             f"${{var.{os_image_user}}}",
             f"${{var.{gcp_zone}}}",
-            {
-                "name": f"${{format(\"%s-%s-%s\", var.{os_linux_type}, var.{os_linux_release}, replace(var.{cb_version}, \".\", \"_\"))}}",
-                "release": f"${{var.{os_linux_release}}}",
-                "type": f"${{var.{os_linux_type}}}",
-                "version": f"${{replace(var.{cb_version}, \".\", \"_\")}}"
-            }
+            labels
         )
 
     @property
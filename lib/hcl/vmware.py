@@ -4,6 +4,7 @@
 import logging
 import json
 import os
+from typing import Union
 from lib.util.envmgr import PathMap, PathType, ConfigFile
 from lib.exceptions import VMwareDriverError
 from lib.drivers.cbrelease import CBRelease
@@ -11,6 +12,7 @@ from lib.drivers.network import NetworkDriver
 from lib.util.inquire import Inquire
 import lib.config as config
 from lib.invoke import tf_run, packer_run
+from lib.util.imagemgr import ImageTarget
 from lib.util.cfgmgr import ConfigMgr
 from lib.util.vmware_data import DataCollect
 from lib.util.filemgr import FileManager
@@ -40,6 +42,7 @@ class CloudDriver(object):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.config = None
         self.ask = Inquire()
+        self.image_dc = None
 
         if not config.env_name:
             raise VMwareDriverError("no environment specified")
@@ -66,11 +69,8 @@ class CloudDriver(object):
 
     def create_image(self):
         cb_rel = CBRelease()
-        dc = DataCollect()
 
-        dc.get_infrastructure()
-        dc.get_build_password()
-        dc.get_keys()
+        self.image_data()
 
         print(f"Configuring vmware image")
 
@@ -86,6 +86,43 @@ class CloudDriver(object):
         release_list = cb_rel.get_cb_version(os_choice, distro_table.version)
 
         cb_release_choice = self.ask.ask_list_basic("Select CBS release", release_list)
+
+        target = ImageTarget.build(config.cloud, os_choice, distro_table.version, cb_release_choice)
+        cfg_file = self.image_config(target)
+
+        image = None if config.image_rebuild else self.find_image(target)
+        if image:
+            print(f"Using existing {os_choice} {distro_table.version} {cb_release_choice} image {image['name']} (use --rebuild to build a new image)")
+            return
+
+        try:
+            print("")
+            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
+            pr = packer_run(working_dir=cfg_file.file_path)
+            pr.init(cfg_file.file_name)
+            pr.build_gen(cfg_file.file_name)
+        except Exception as err:
+            VMwareDriverError(f"can not build image: {err}")
+
+    def image_data(self) -> DataCollect:
+        if self.image_dc:
+            return self.image_dc
+
+        dc = DataCollect()
+
+        dc.get_infrastructure()
+        dc.get_build_password()
+        dc.get_keys()
+
+        self.image_dc = dc
+        return self.image_dc
+
+    def image_config(self, target: ImageTarget, variant: Union[str, None] = None) -> ConfigFile:
+        dc = self.image_data()
+
+        os_choice = target.os
+        distro_table = VMWareImageDataRecord.by_version(target.os, target.os_release, self.config.build)
+        cb_release_choice = target.cb_version
         cb_rel_string = ''.join(cb_release_choice.replace('-', '.').split('.')[:-2])
 
         var_list = [
@@ -209,7 +246,7 @@ class CloudDriver(object):
             .add(build_block.as_dict) \
             .add(var_block.as_dict).as_dict
 
-        self.path_map.map(PathType.IMAGE)
+        self.path_map.map(PathType.IMAGE, variant)
         cfg_file: ConfigFile
         cfg_file = self.path_map.use(CloudDriver.IMAGE_CONFIG, PathType.IMAGE)
         try:
@@ -220,14 +257,10 @@ class CloudDriver(object):
         except Exception as err:
             raise VMwareDriverError(f"can not write image configuration: {err}")
 
-        try:
-            print("")
-            print(f"Building {os_choice} {distro_table.version} {cb_release_choice} image in {config.cloud}")
-            pr = packer_run(working_dir=cfg_file.file_path)
-            pr.init(cfg_file.file_name)
-            pr.build_gen(cfg_file.file_name)
-        except Exception as err:
-            VMwareDriverError(f"can not build image: {err}")
+        return cfg_file
+
+    def find_image(self, target: ImageTarget) -> Union[dict, None]:
+        return None
 
     def list_images(self):
         image_list = config.cloud_image().list()
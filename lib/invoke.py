@@ -1,43 +1,671 @@
 ##
 ##
 
-import distutils.spawn
 import subprocess
+import threading
 import time
 import re
 import json
 import datetime
+import hashlib
+import copy
+import shutil
+import gzip
+import atexit
+import weakref
 from datetime import datetime
 from typing import Union
 from lib.exceptions import *
 from lib.output import spinner
+from lib.util.filelock import FileLock, atomic_write
+
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
 
 class LogFile(object):
-    def __init__(self, name: str, working_dir: str = None):
-        self.log_file = working_dir + '/deploy.log' if working_dir else 'deploy.log'
+    BUFFER_SIZE = 65536
+    FLUSH_INTERVAL = 1.0
+    MAX_SIZE = 64 * 1024 * 1024
+    BACKUP_COUNT = 5
+    open_logs = weakref.WeakSet()
+    pending = weakref.WeakSet()
+    flusher = None
+    flusher_lock = threading.Lock()
+
+    def __init__(self, name: str, working_dir: str = None, file_name: str = 'deploy.log', max_size: int = MAX_SIZE,
+                 backup_count: int = BACKUP_COUNT, compress: bool = True):
+        self.log_file = working_dir + '/' + file_name if working_dir else file_name
         self.name = name
+        self.max_size = max_size
+        self.backup_count = backup_count
+        self.compress = compress
+        self.log_handle = None
+        self.buffer = []
+        self.buffer_size = 0
+        self.file_size = 0
+        self.last_flush = time.monotonic()
+        self.last_second = None
+        self.timestamp = None
+        self.lock = threading.RLock()
+
+    def open(self):
+        self.log_handle = open(self.log_file, 'a')
+        self.file_size = self.log_handle.tell()
+        LogFile.open_logs.add(self)
 
     def write(self, message: str):
-        with open(self.log_file, 'a') as log:
-            timestamp = datetime.utcnow().strftime("%b %d %H:%M:%S")
-            line = f"{timestamp} {self.name}: {message}"
-            log.write(line)
-            if "\n" not in message:
-                log.write('\n')
-            log.flush()
+        now = int(time.time())
+        if now != self.last_second:
+            self.timestamp = datetime.utcfromtimestamp(now).strftime("%b %d %H:%M:%S")
+            self.last_second = now
+        line = f"{self.timestamp} {self.name}: {message}"
+        if "\n" not in message:
+            line += '\n'
+        with self.lock:
+            if not self.buffer:
+                LogFile.schedule(self)
+            self.buffer.append(line)
+            self.buffer_size += len(line)
+            if self.buffer_size >= LogFile.BUFFER_SIZE or time.monotonic() - self.last_flush >= LogFile.FLUSH_INTERVAL:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            if not self.buffer:
+                return
+            if not self.log_handle:
+                self.open()
+            data = ''.join(self.buffer)
+            self.buffer.clear()
+            self.buffer_size = 0
+            self.log_handle.write(data)
+            self.log_handle.flush()
+            self.file_size += len(data)
+            if self.max_size and self.file_size >= self.max_size:
+                self.rotate()
+
+    @staticmethod
+    def schedule(log):
+        with LogFile.flusher_lock:
+            LogFile.pending.add(log)
+            if not LogFile.flusher:
+                LogFile.flusher = threading.Thread(target=LogFile.flush_pending, daemon=True)
+                LogFile.flusher.start()
+
+    @staticmethod
+    def flush_pending():
+        # a quiet stack can go minutes between lines, so buffered output is written out on a timer as well
+        while True:
+            time.sleep(LogFile.FLUSH_INTERVAL)
+            with LogFile.flusher_lock:
+                logs = list(LogFile.pending)
+                LogFile.pending.clear()
+                if not logs:
+                    LogFile.flusher = None
+                    return
+            for log in logs:
+                log.flush()
+
+    def segment(self, number: int) -> str:
+        return f"{self.log_file}.{number}.gz" if self.compress else f"{self.log_file}.{number}"
+
+    def rotate(self):
+        self.log_handle.close()
+        self.log_handle = None
+        for number in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(self.segment(number)):
+                os.replace(self.segment(number), self.segment(number + 1))
+        if self.backup_count > 0:
+            if self.compress:
+                with open(self.log_file, 'rb') as source, gzip.open(self.segment(1), 'wb') as destination:
+                    shutil.copyfileobj(source, destination)
+                os.remove(self.log_file)
+            else:
+                os.replace(self.log_file, self.segment(1))
+        else:
+            os.remove(self.log_file)
+        self.open()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            if self.log_handle:
+                self.log_handle.close()
+                self.log_handle = None
+        LogFile.open_logs.discard(self)
+
+    @staticmethod
+    def close_all():
+        for log in list(LogFile.open_logs):
+            log.close()
+
+
+atexit.register(LogFile.close_all)
+
+
+class ResourceTimer(object):
+    REPORT_FILE = "deploy.report.json"
+    SUMMARY_COUNT = 5
+
+    def __init__(self, command: str, settings: Union[dict, None] = None):
+        self.command = command
+        self.settings = settings if settings else {}
+        self.resources = {}
+        self.errors = []
+        self.changes = None
+        self.start_time = time.time()
+        self.end_time = None
+        self.handlers = {
+            'apply_start': self.apply_start,
+            'apply_progress': self.apply_progress,
+            'apply_complete': self.apply_end,
+            'apply_errored': self.apply_end,
+            'provision_start': self.provision_start,
+            'provision_progress': self.provision_progress,
+            'provision_complete': self.provision_end,
+            'provision_errored': self.provision_end,
+            'change_summary': self.change_summary,
+            'diagnostic': self.diagnostic,
+        }
+
+    @staticmethod
+    def event_time(message: dict) -> float:
+        try:
+            return datetime.fromisoformat(message['@timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return time.time()
+
+    def resource(self, hook: dict) -> dict:
+        address = hook.get('resource', {}).get('addr')
+        if address not in self.resources:
+            self.resources[address] = {
+                'resource': address,
+                'action': hook.get('action'),
+                'status': 'pending',
+                'start': None,
+                'end': None,
+                'elapsed': None,
+                'provisioners': {}
+            }
+        return self.resources[address]
+
+    def process(self, message: dict) -> None:
+        handler = self.handlers.get(message.get('type'))
+        if handler:
+            handler(message, message.get('hook', {}))
+
+    def apply_start(self, message: dict, hook: dict) -> None:
+        entry = self.resource(hook)
+        entry['action'] = hook.get('action')
+        entry['status'] = 'running'
+        entry['start'] = self.event_time(message)
+
+    def apply_progress(self, message: dict, hook: dict) -> None:
+        self.resource(hook)['elapsed'] = hook.get('elapsed_seconds')
+
+    def apply_end(self, message: dict, hook: dict) -> None:
+        entry = self.resource(hook)
+        entry['status'] = 'complete' if message.get('type') == 'apply_complete' else 'errored'
+        entry['end'] = self.event_time(message)
+        if hook.get('elapsed_seconds') is not None:
+            entry['elapsed'] = hook.get('elapsed_seconds')
+        elif entry['start']:
+            entry['elapsed'] = round(entry['end'] - entry['start'], 3)
+
+    def provisioner(self, hook: dict) -> dict:
+        entry = self.resource(hook)
+        name = hook.get('provisioner')
+        if name not in entry['provisioners']:
+            entry['provisioners'][name] = {
+                'status': 'pending',
+                'start': None,
+                'end': None,
+                'elapsed': None,
+                'lines': 0
+            }
+        return entry['provisioners'][name]
+
+    def provision_start(self, message: dict, hook: dict) -> None:
+        entry = self.provisioner(hook)
+        entry['status'] = 'running'
+        entry['start'] = self.event_time(message)
+
+    def provision_progress(self, message: dict, hook: dict) -> None:
+        self.provisioner(hook)['lines'] += 1
+
+    def provision_end(self, message: dict, hook: dict) -> None:
+        entry = self.provisioner(hook)
+        entry['status'] = 'complete' if message.get('type') == 'provision_complete' else 'errored'
+        entry['end'] = self.event_time(message)
+        if entry['start']:
+            entry['elapsed'] = round(entry['end'] - entry['start'], 3)
+
+    def change_summary(self, message: dict, hook: dict) -> None:
+        self.changes = message.get('changes')
+
+    def diagnostic(self, message: dict, hook: dict) -> None:
+        if message.get('diagnostic', {}).get('severity') == 'error':
+            self.errors.append(message['diagnostic'].get('summary'))
+
+    def slowest(self, count: int = SUMMARY_COUNT) -> list[dict]:
+        timed = [r for r in self.resources.values() if r['elapsed'] is not None]
+        return sorted(timed, key=lambda r: r['elapsed'], reverse=True)[:count]
+
+    def report(self) -> dict:
+        if not self.end_time:
+            self.end_time = time.time()
+        return {
+            'command': self.command,
+            'start': self.start_time,
+            'end': self.end_time,
+            'elapsed': round(self.end_time - self.start_time, 3),
+            'settings': self.settings,
+            'changes': self.changes,
+            'errors': self.errors,
+            'resources': sorted(self.resources.values(), key=lambda r: r['elapsed'] or 0, reverse=True)
+        }
+
+    def write(self, working_dir: Union[str, None]) -> str:
+        report_file = os.path.join(working_dir, ResourceTimer.REPORT_FILE) if working_dir else ResourceTimer.REPORT_FILE
+        atomic_write(report_file, self.report())
+        return report_file
+
+
+class BinaryProbe(object):
+    paths = {}
+    versions = {}
+    lock = threading.Lock()
+
+    @staticmethod
+    def find(name: str) -> Union[str, None]:
+        with BinaryProbe.lock:
+            if name not in BinaryProbe.paths:
+                BinaryProbe.paths[name] = shutil.which(name)
+            return BinaryProbe.paths[name]
+
+    @staticmethod
+    def version(path: str, *args: str) -> dict:
+        from lib.util.cachemgr import MetadataCache
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, *args)
+        with BinaryProbe.lock:
+            if key not in BinaryProbe.versions:
+                BinaryProbe.versions[key] = MetadataCache().get('binary_version', key, lambda: BinaryProbe.run(path, *args))
+            return BinaryProbe.versions[key]
+
+    @staticmethod
+    def run(path: str, *args: str) -> dict:
+        result = subprocess.run([path, *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{os.path.basename(path)} {' '.join(args)} returned {result.returncode}")
+        return json.loads(result.stdout)
+
+
+class StateReader(object):
+    STATE_FILE = "terraform.tfstate"
+    STATE_VERSION = 4
+    cache = {}
+    lock = threading.Lock()
+
+    def __init__(self, working_dir: Union[str, None]):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.working_dir = working_dir if working_dir else os.getcwd()
+
+    def is_local(self) -> bool:
+        backend_file = os.path.join(self.working_dir, ".terraform", StateReader.STATE_FILE)
+        try:
+            with open(backend_file, 'r') as backend_data:
+                backend = json.load(backend_data).get('backend')
+        except FileNotFoundError:
+            return True
+        except (OSError, json.decoder.JSONDecodeError):
+            return False
+        if not backend:
+            return True
+        return backend.get('type') == 'local' and not (backend.get('config') or {}).get('path')
+
+    def state_file(self) -> str:
+        try:
+            with open(os.path.join(self.working_dir, ".terraform", "environment"), 'r') as workspace_file:
+                workspace = workspace_file.read().strip()
+        except OSError:
+            workspace = "default"
+        if workspace and workspace != "default":
+            return os.path.join(self.working_dir, "terraform.tfstate.d", workspace, StateReader.STATE_FILE)
+        return os.path.join(self.working_dir, StateReader.STATE_FILE)
+
+    def outputs(self) -> Union[dict, None]:
+        if not self.is_local():
+            return None
+        state_file = self.state_file()
+        try:
+            stat = os.stat(state_file)
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        with StateReader.lock:
+            entry = StateReader.cache.get(state_file)
+            if entry and entry['signature'] == signature:
+                return copy.deepcopy(entry['outputs'])
+
+        try:
+            with open(state_file, 'r') as state_data:
+                state = json.load(state_data)
+        except (OSError, json.decoder.JSONDecodeError) as err:
+            self.logger.debug(f"can not read state {state_file}: {err}")
+            return None
+        if state.get('version') != StateReader.STATE_VERSION:
+            return None
+
+        with StateReader.lock:
+            entry = StateReader.cache.get(state_file)
+            if entry and entry['lineage'] == state.get('lineage') and entry['serial'] == state.get('serial'):
+                entry['signature'] = signature
+                return copy.deepcopy(entry['outputs'])
+            outputs = {}
+            for name, output in state.get('outputs', {}).items():
+                outputs[name] = {
+                    'sensitive': output.get('sensitive', False),
+                    'type': output.get('type'),
+                    'value': output.get('value')
+                }
+            StateReader.cache[state_file] = {
+                'signature': signature,
+                'lineage': state.get('lineage'),
+                'serial': state.get('serial'),
+                'outputs': outputs
+            }
+            return copy.deepcopy(outputs)
+
+
+class StackFingerprint(object):
+    FINGERPRINT_FILE = "fingerprint"
+    CONFIG_SUFFIXES = ('.tf', '.tf.json', '.tfvars', '.tfvars.json')
+    STATE_FILES = [
+        ".terraform.lock.hcl",
+        ".terraform/terraform.tfstate",
+        ".terraform/modules/modules.json"
+    ]
+
+    def __init__(self, working_dir: Union[str, None]):
+        self.working_dir = working_dir if working_dir else os.getcwd()
+        self.fingerprint_file = os.path.join(self.working_dir, ".terraform", StackFingerprint.FINGERPRINT_FILE)
+
+    def compute(self) -> str:
+        digest = hashlib.sha256()
+        binary = BinaryProbe.find("terraform")
+        if binary:
+            digest.update(json.dumps(BinaryProbe.version(binary, 'version', '-json').get('terraform_version')).encode('utf-8'))
+        files = sorted(f for f in os.listdir(self.working_dir) if f.endswith(StackFingerprint.CONFIG_SUFFIXES))
+        for file_name in files + StackFingerprint.STATE_FILES:
+            digest.update(file_name.encode('utf-8') + b'\0')
+            try:
+                with open(os.path.join(self.working_dir, file_name), 'rb') as data:
+                    digest.update(hashlib.sha256(data.read()).digest())
+            except FileNotFoundError:
+                digest.update(b'\0')
+        provider_dir = os.path.join(self.working_dir, ".terraform", "providers")
+        for root, dirs, file_names in os.walk(provider_dir):
+            dirs.sort()
+            for name in sorted(dirs + file_names):
+                digest.update(os.path.relpath(os.path.join(root, name), provider_dir).encode('utf-8') + b'\0')
+        return digest.hexdigest()
+
+    def matches(self) -> bool:
+        try:
+            with open(self.fingerprint_file, 'r') as fingerprint:
+                return fingerprint.read().strip() == self.compute()
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def record(self) -> None:
+        if not os.path.isdir(os.path.dirname(self.fingerprint_file)):
+            return
+        with open(self.fingerprint_file, 'w') as fingerprint:
+            fingerprint.write(self.compute())
+
+    def clear(self) -> None:
+        if os.path.exists(self.fingerprint_file):
+            os.remove(self.fingerprint_file)
+
+
+class RunPolicy(object):
+    DEFAULT_PARALLELISM = 10
+    OPERATIONS_PER_NODE = 2
+    RATE_LIMITS = {
+        "aws": 50,
+        "google": 40,
+        "azurerm": 20,
+        "vsphere": 10,
+        "couchbase-capella": 10,
+    }
+
+    def __init__(self, working_dir: Union[str, None], rate_limit: Union[int, str, None] = None):
+        import lib.config as config
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.working_dir = working_dir if working_dir else os.getcwd()
+        self.rate_limit = self.parse_limit(rate_limit if rate_limit else config.tf_rate_limit)
+        self.stack = self.read_stack()
+
+    def parse_limit(self, value: Union[int, str, None]) -> Union[int, None]:
+        if value is None or str(value).strip() == '':
+            return None
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            self.logger.warning(f"ignoring terraform rate limit {value!r}: not a number")
+            return None
+        if limit < 1:
+            self.logger.warning(f"ignoring terraform rate limit {limit}: must be at least 1")
+            return None
+        return limit
+
+    def read_stack(self) -> dict:
+        try:
+            with open(os.path.join(self.working_dir, "main.tf.json"), 'r') as tf_file:
+                return json.load(tf_file)
+        except (OSError, json.decoder.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def first(block: Union[dict, list, None]) -> dict:
+        if isinstance(block, list):
+            merged = {}
+            for item in block:
+                if isinstance(item, dict):
+                    merged.update(item)
+            return merged
+        return block if isinstance(block, dict) else {}
+
+    def node_count(self) -> int:
+        cluster_spec = self.first(self.first(self.stack.get('variable')).get('cluster_spec')).get('default')
+        if isinstance(cluster_spec, (dict, list)):
+            return len(cluster_spec)
+        return 0
+
+    def providers(self) -> list[str]:
+        providers = []
+        required = self.first(self.first(self.stack.get('terraform')).get('required_providers'))
+        for name, requirement in required.items():
+            source = self.first(requirement).get('source', name) if isinstance(requirement, (dict, list)) else name
+            providers.append(source.split('/')[-1])
+        return providers
+
+    def parallelism(self) -> int:
+        budget = self.rate_limit
+        if not budget:
+            limits = [RunPolicy.RATE_LIMITS[p] for p in self.providers() if p in RunPolicy.RATE_LIMITS]
+            budget = min(limits) if limits else RunPolicy.DEFAULT_PARALLELISM
+        wanted = self.node_count() * RunPolicy.OPERATIONS_PER_NODE
+        return max(1, min(budget, max(RunPolicy.DEFAULT_PARALLELISM, wanted)))
+
+    def settings(self, refresh: bool = True) -> dict:
+        return {
+            'parallelism': self.parallelism(),
+            'nodes': self.node_count(),
+            'providers': self.providers(),
+            'refresh': refresh
+        }
+
+
+class PluginCache(object):
+    CACHE_DIR = "plugins"
+    LOCK_DIR = "locks"
+    LOCK_FILE = ".terraform.lock.hcl"
+    PROVIDER_PATTERN = re.compile(r'^provider\s+"([^"]+)"\s*{')
+    VERSION_PATTERN = re.compile(r'^\s*version\s*=\s*"([^"]+)"')
+
+    def __init__(self, root: Union[str, None] = None, hard_link: Union[bool, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        import lib.config as config
+        self.root = root if root else os.path.join(config.catalog_root, PluginCache.CACHE_DIR)
+        self.hard_link = hard_link if hard_link is not None else config.plugin_hard_link
+        self.lock = FileLock(os.path.join(self.root, "cache"))
+
+    def environment(self) -> dict:
+        os.makedirs(os.path.join(self.root, PluginCache.LOCK_DIR), exist_ok=True)
+        env = dict(os.environ)
+        env['TF_PLUGIN_CACHE_DIR'] = self.root
+        return env
+
+    @staticmethod
+    def provider_key(working_dir: str) -> Union[str, None]:
+        try:
+            with open(os.path.join(working_dir, "main.tf.json"), 'r') as tf_file:
+                data = json.load(tf_file)
+        except (OSError, json.decoder.JSONDecodeError):
+            return None
+        terraform = data.get('terraform', {})
+        if isinstance(terraform, list):
+            terraform = terraform[0] if terraform else {}
+        providers = terraform.get('required_providers')
+        if not providers:
+            return None
+        return hashlib.sha1(json.dumps(providers, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def shared_lock_file(self, working_dir: str) -> Union[str, None]:
+        key = self.provider_key(working_dir)
+        if not key:
+            return None
+        return os.path.join(self.root, PluginCache.LOCK_DIR, f"{key}.hcl")
+
+    def seed(self, working_dir: str) -> bool:
+        lock_file = os.path.join(working_dir, PluginCache.LOCK_FILE)
+        shared_file = self.shared_lock_file(working_dir)
+        if os.path.exists(lock_file) or not shared_file or not os.path.exists(shared_file):
+            return False
+        self.logger.debug(f"seeding {lock_file} from {shared_file}")
+        shutil.copyfile(shared_file, lock_file)
+        return True
+
+    def save(self, working_dir: str) -> None:
+        lock_file = os.path.join(working_dir, PluginCache.LOCK_FILE)
+        shared_file = self.shared_lock_file(working_dir)
+        if not shared_file or not os.path.exists(lock_file):
+            return
+        temp_file = f"{shared_file}.tmp"
+        shutil.copyfile(lock_file, temp_file)
+        os.replace(temp_file, shared_file)
+
+    def link(self, working_dir: str) -> None:
+        provider_dir = os.path.join(working_dir, ".terraform", "providers")
+        cache_root = os.path.realpath(self.root)
+        for root, dirs, files in os.walk(provider_dir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                if not os.path.islink(path):
+                    continue
+                target = os.path.realpath(path)
+                if not target.startswith(cache_root + os.sep):
+                    continue
+                self.logger.debug(f"hard linking {path} to {target}")
+                os.remove(path)
+                if os.path.isdir(target):
+                    shutil.copytree(target, path, copy_function=self.link_file)
+                else:
+                    self.link_file(target, path)
+
+    @staticmethod
+    def link_file(source: str, destination: str) -> None:
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+
+    @staticmethod
+    def lock_versions(lock_file: str) -> set[tuple[str, str]]:
+        versions = set()
+        provider = None
+        try:
+            with open(lock_file, 'r') as lock_data:
+                for line in lock_data:
+                    match = PluginCache.PROVIDER_PATTERN.match(line)
+                    if match:
+                        provider = match.group(1)
+                        continue
+                    match = PluginCache.VERSION_PATTERN.match(line)
+                    if match and provider:
+                        versions.add((provider, match.group(1)))
+                        provider = None
+        except OSError:
+            pass
+        return versions
+
+    def cached_versions(self) -> set[tuple[str, str]]:
+        versions = set()
+        for hostname in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if hostname == PluginCache.LOCK_DIR or not os.path.isdir(os.path.join(self.root, hostname)):
+                continue
+            for namespace in os.listdir(os.path.join(self.root, hostname)):
+                for provider_type in os.listdir(os.path.join(self.root, hostname, namespace)):
+                    for version in os.listdir(os.path.join(self.root, hostname, namespace, provider_type)):
+                        versions.add((f"{hostname}/{namespace}/{provider_type}", version))
+        return versions
+
+    def used_versions(self, search_root: str) -> set[tuple[str, str]]:
+        versions = set()
+        cache_root = os.path.realpath(self.root)
+        for root, dirs, files in os.walk(search_root):
+            if os.path.realpath(root) == cache_root:
+                dirs[:] = []
+                continue
+            dirs[:] = [d for d in dirs if d != ".terraform"]
+            if PluginCache.LOCK_FILE in files:
+                versions.update(self.lock_versions(os.path.join(root, PluginCache.LOCK_FILE)))
+        return versions
+
+    def prune(self, search_root: str, dry_run: bool = False) -> list[str]:
+        removed = []
+        with self.lock.exclusive():
+            unused = self.cached_versions() - self.used_versions(search_root)
+            for provider, version in sorted(unused):
+                path = os.path.join(self.root, provider, version)
+                removed.append(path)
+                if not dry_run:
+                    self.logger.debug(f"removing unused provider {provider} {version}")
+                    shutil.rmtree(path)
+            if not dry_run:
+                for lock_file in os.listdir(os.path.join(self.root, PluginCache.LOCK_DIR)):
+                    lock_path = os.path.join(self.root, PluginCache.LOCK_DIR, lock_file)
+                    if self.lock_versions(lock_path) & unused:
+                        os.remove(lock_path)
+        return removed
 
 
 class packer_run(object):
 
     def __init__(self, working_dir=None):
-        self.logger = LogFile(self.__class__.__name__, working_dir)
+        self.logger = LogFile(self.__class__.__name__, working_dir, file_name='build.log')
         self.working_dir = working_dir
+        self.artifacts = []
         self.check_binary()
 
     @staticmethod
     def check_binary() -> bool:
-        if not distutils.spawn.find_executable("packer"):
+        if not BinaryProbe.find("packer"):
             raise PackerRunError("can not find packer executable")
         return True
 
@@ -76,9 +704,12 @@ class packer_run(object):
         message['content'] = self.fix_text(line_contents[3]) if len(line_contents) > 3 else None
         message['message'] = self.fix_text(line_contents[4]) if len(line_contents) > 4 else None
 
+        if message['type'] == 'artifact' and message['message'] == 'id' and len(line_contents) > 5:
+            self.artifacts.append(self.fix_text(line_contents[5]))
+
         return message
 
-    def _packer(self, *args: str, no_output=False):
+    def _packer(self, *args: str, no_output=False, quiet=False):
         error_string: str = ''
         if no_output:
             packer_cmd = [
@@ -95,7 +726,8 @@ class packer_run(object):
         p = subprocess.Popen(packer_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.working_dir, bufsize=1)
 
         sp = spinner()
-        sp.start()
+        if not quiet:
+            sp.start()
         while True:
             line = p.stdout.readline()
             if not line:
@@ -107,20 +739,24 @@ class packer_run(object):
                 if message['type'] == 'error':
                     error_string += message['content']
 
-        sp.stop()
+        if not quiet:
+            sp.stop()
         p.communicate()
+        self.logger.close()
         if p.returncode != 0:
             raise PackerRunError(f"image build error (see build.log file for details): {error_string}")
 
-    def init(self, packer_file: str):
+    def init(self, packer_file: str, quiet=False):
         cmd = ['init', packer_file]
 
-        print("Initializing image build environment")
+        if not quiet:
+            print("Initializing image build environment")
         start_time = time.perf_counter()
-        self._packer(*cmd, no_output=True)
+        self._packer(*cmd, no_output=True, quiet=quiet)
         end_time = time.perf_counter()
         run_time = time.strftime("%H hours %M minutes %S seconds.", time.gmtime(end_time - start_time))
-        print(f"Init complete in {run_time}.")
+        if not quiet:
+            print(f"Init complete in {run_time}.")
 
     def build(self, var_file: str, packer_file: str):
         cmd = ['build', '-var-file', var_file, packer_file]
@@ -132,34 +768,48 @@ class packer_run(object):
         run_time = time.strftime("%H hours %M minutes %S seconds.", time.gmtime(end_time - start_time))
         print(f"Image creation complete in {run_time}.")
 
-    def build_gen(self, packer_file: str):
+    def build_gen(self, packer_file: str, quiet=False) -> list[str]:
         cmd = ['build', packer_file]
 
-        print("Beginning image build (this may take several minutes)")
+        if not quiet:
+            print("Beginning image build (this may take several minutes)")
         start_time = time.perf_counter()
-        self._packer(*cmd)
+        self._packer(*cmd, quiet=quiet)
         end_time = time.perf_counter()
         run_time = time.strftime("%H hours %M minutes %S seconds.", time.gmtime(end_time - start_time))
-        print(f"Image creation complete in {run_time}.")
+        if not quiet:
+            print(f"Image creation complete in {run_time}.")
+        return self.artifacts
 
 
 class tf_run(object):
+    PLAN_FILE = "tfplan"
 
-    def __init__(self, working_dir=None):
+    def __init__(self, working_dir=None, quiet=False):
         self.logger = LogFile(self.__class__.__name__, working_dir)
         self.working_dir = working_dir
+        self.quiet = quiet
         self.deployment_data = None
+        self.run_report = None
+        self.plan_summary = None
+        self.plugin_cache = PluginCache()
+        self.fingerprint = StackFingerprint(working_dir)
         self.check_binary()
 
-    def check_binary(self) -> bool:
-        if not distutils.spawn.find_executable("terraform"):
-            raise PackerRunError("can not find terraform executable")
+    @staticmethod
+    def check_binary() -> bool:
+        binary = BinaryProbe.find("terraform")
+        if not binary:
+            raise TerraformRunError("can not find terraform executable")
 
-        version = self.version()
+        try:
+            version = BinaryProbe.version(binary, 'version', '-json')
+        except Exception as err:
+            raise TerraformRunError(f"can not get terraform version: {err}")
         version_number = float('.'.join(version['terraform_version'].split('.')[:2]))
 
         if version_number < 1.2:
-            raise PackerRunError("terraform 1.2.0 or higher is required")
+            raise TerraformRunError("terraform 1.2.0 or higher is required")
 
         return True
 
@@ -173,7 +823,14 @@ class tf_run(object):
 
         return message
 
-    def _terraform(self, *args: str, output=False, ignore_error=False):
+    def message(self, text: str):
+        if self.quiet:
+            self.logger.write(f">>> {text}")
+            self.logger.close()
+        else:
+            print(text)
+
+    def _terraform(self, *args: str, output=False, ignore_error=False, events: Union[ResourceTimer, None] = None):
         command_output = ''
         tf_cmd = [
             'terraform',
@@ -181,32 +838,52 @@ class tf_run(object):
         ]
         self.logger.write(f">>> Call: {' '.join(tf_cmd)}")
 
-        if logging.DEBUG >= logging.root.level:
-            os.environ["TF_LOG"] = "DEBUG"
-            os.environ["TF_LOG_PATH"] = self.logger.log_file
+        env = self.plugin_cache.environment()
+        if logging.DEBUG >= logging.root.level and not output:
+            env["TF_LOG"] = "DEBUG"
 
-        p = subprocess.Popen(tf_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.working_dir, bufsize=1)
+        p = subprocess.Popen(tf_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.working_dir, env=env, bufsize=1)
 
         sp = spinner()
-        sp.start()
+        if not self.quiet:
+            sp.start()
         while True:
             line = p.stdout.readline()
             if not line:
                 break
             line_string = line.decode("utf-8")
-            escape_char = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-            line_string = escape_char.sub('', line_string)
             if output:
-                command_output += line_string
+                command_output += ANSI_ESCAPE.sub('', line_string)
+            elif events:
+                message = self.parse_output(line_string)
+                if message:
+                    events.process(message)
+                    self.logger.write(message.get('@message', line_string.strip()))
+                else:
+                    self.logger.write(ANSI_ESCAPE.sub('', line_string).strip())
             else:
-                self.logger.write(line_string.strip())
+                self.logger.write(ANSI_ESCAPE.sub('', line_string).strip())
 
-        sp.stop()
+        if not self.quiet:
+            sp.stop()
         p.communicate()
 
+        if events:
+            self.run_report = events.report()
+            for entry in events.slowest():
+                self.logger.write(f">>> {entry['resource']} {entry['action']} {entry['status']} in {entry['elapsed']}s")
+            try:
+                report_file = events.write(self.working_dir)
+                self.logger.write(f">>> Resource timing report: {report_file}")
+            except Exception as err:
+                self.logger.write(f">>> Can not write resource timing report: {err}")
+
         if p.returncode != 0:
+            self.logger.flush()
             if ignore_error:
                 return False
+            elif events and events.errors:
+                raise TerraformRunError(f"environment deployment error: {events.errors[0]} (see deploy.log file for details)")
             else:
                 raise TerraformRunError(f"environment deployment error (see deploy.log file for details)")
 
@@ -217,41 +894,126 @@ class tf_run(object):
                 self.deployment_data = command_output
 
         self.logger.write(">>> Call Completed <<<")
+        self.logger.flush()
         return True
 
-    def _command(self, cmd: list, output=False, quiet=False, ignore_error=False):
+    def _command(self, cmd: list, output=False, quiet=False, ignore_error=False, events: Union[ResourceTimer, None] = None):
         now = datetime.now()
         time_string = now.strftime("%D %I:%M:%S %p")
         self.logger.write(f" --- start {cmd[0]} at {time_string}")
 
         start_time = time.perf_counter()
-        result = self._terraform(*cmd, output=output, ignore_error=ignore_error)
+        try:
+            result = self._terraform(*cmd, output=output, ignore_error=ignore_error, events=events)
+        finally:
+            self.logger.close()
         end_time = time.perf_counter()
         run_time = time.strftime("%H hours %M minutes %S seconds.", time.gmtime(end_time - start_time))
 
         now = datetime.now()
         time_string = now.strftime("%D %I:%M:%S %p")
         self.logger.write(f" --- end {cmd[0]} at {time_string}")
+        self.logger.close()
 
         if not quiet:
-            print(f"Step complete in {run_time}.")
+            self.message(f"Step complete in {run_time}.")
 
         return result
 
+    @staticmethod
+    def force_init() -> bool:
+        import lib.config as config
+        return config.force_init
+
     def init(self):
         cmd = ['init', '-input=false']
 
-        print("Initializing environment")
-        self._command(cmd)
+        if not self.force_init() and self.fingerprint.matches():
+            self.logger.write(">>> Skipping init: stack is unchanged since the last successful init")
+            self.logger.close()
+            return
+
+        self.message("Initializing environment")
+        self.fingerprint.clear()
+        self.plugin_cache.environment()
+        with self.plugin_cache.lock.exclusive():
+            self.plugin_cache.seed(self.working_dir)
+            self._command(cmd)
+            self.plugin_cache.save(self.working_dir)
+            if self.plugin_cache.hard_link:
+                self.plugin_cache.link(self.working_dir)
 
     def apply(self):
-        cmd = ['apply', '-input=false', '-auto-approve']
+        self.message("Planning environment changes")
+        try:
+            summary = self.plan()
+            if self.plan_empty(summary):
+                self.message("No changes, environment is up to date.")
+                return
+            self.message(f"Plan: {len(summary['add'])} to add, {len(summary['change'])} to change, "
+                         f"{len(summary['replace'])} to replace, {len(summary['destroy'])} to destroy.")
+
+            settings = RunPolicy(self.working_dir).settings()
+            cmd = ['apply', '-input=false', '-json', f"-parallelism={settings['parallelism']}", tf_run.PLAN_FILE]
+
+            self.message("Deploying environment")
+            self._command(cmd, events=ResourceTimer('apply', settings))
+        finally:
+            self.remove_plan()
+
+    def plan(self, destroy=False, refresh=True) -> dict:
+        settings = RunPolicy(self.working_dir).settings(refresh)
+        cmd = ['plan', '-input=false', '-json', f"-parallelism={settings['parallelism']}", f"-out={tf_run.PLAN_FILE}"]
+
+        if destroy:
+            cmd.append('-destroy')
+        if not refresh:
+            cmd.append('-refresh=false')
 
-        print("Deploying environment")
-        self._command(cmd)
+        self._command(cmd, quiet=True, events=ResourceTimer('plan', settings))
+        self._command(['show', '-json', tf_run.PLAN_FILE], output=True, quiet=True)
+        self.plan_summary = self.summarize_plan(self.deployment_data if isinstance(self.deployment_data, dict) else {})
+        self.logger.write(f">>> Plan summary: {json.dumps(self.plan_summary)}")
+        self.logger.close()
+
+        return self.plan_summary
+
+    @staticmethod
+    def summarize_plan(plan_data: dict) -> dict:
+        summary = {
+            'add': [],
+            'change': [],
+            'replace': [],
+            'destroy': [],
+            'outputs': []
+        }
+        for resource in plan_data.get('resource_changes', []):
+            actions = resource.get('change', {}).get('actions', [])
+            if actions == ['create']:
+                summary['add'].append(resource.get('address'))
+            elif actions == ['update']:
+                summary['change'].append(resource.get('address'))
+            elif actions == ['delete']:
+                summary['destroy'].append(resource.get('address'))
+            elif sorted(actions) == ['create', 'delete']:
+                summary['replace'].append(resource.get('address'))
+        for name, output in plan_data.get('output_changes', {}).items():
+            if output.get('actions', []) != ['no-op']:
+                summary['outputs'].append(name)
+        return summary
+
+    @staticmethod
+    def plan_empty(summary: dict) -> bool:
+        return not any(summary.values())
+
+    def remove_plan(self):
+        plan_file = os.path.join(self.working_dir, tf_run.PLAN_FILE) if self.working_dir else tf_run.PLAN_FILE
+        if os.path.exists(plan_file):
+            os.remove(plan_file)
 
     def destroy(self, refresh=True, ignore_error=False, quiet=False):
-        cmd = ['destroy', '-input=false', '-auto-approve']
+        settings = RunPolicy(self.working_dir).settings(refresh)
+        cmd = ['destroy', '-input=false', '-auto-approve', '-json', f"-parallelism={settings['parallelism']}"]
 
         if not refresh:
             cmd.append('-refresh=false')
@@ -259,22 +1021,36 @@ class tf_run(object):
             ignore_error = True
 
         if not quiet:
-            print("Removing resources")
+            self.message("Removing resources")
 
-        if not self._command(cmd, ignore_error=ignore_error):
-            print("First destroy attempt failed, retrying without refresh ...")
-            self.destroy(refresh=False, ignore_error=False)
+        if not self._command(cmd, ignore_error=ignore_error, events=ResourceTimer('destroy', settings)):
+            self.message("First destroy attempt failed, retrying without refresh ...")
+            self.destroy(refresh=False, ignore_error=False, quiet=quiet)
 
     def validate(self):
         cmd = ['validate']
 
-        return self._command(cmd, ignore_error=True, quiet=True)
+        if not self.force_init() and self.fingerprint.matches():
+            return True
+
+        if self._command(cmd, ignore_error=True, quiet=True):
+            self.fingerprint.record()
+            return True
+
+        self.fingerprint.clear()
+        return False
 
     def output(self, quiet=False):
         cmd = ['output', '-json']
 
         if not quiet:
-            print("Getting environment information")
+            self.message("Getting environment information")
+
+        outputs = StateReader(self.working_dir).outputs()
+        if outputs is not None:
+            self.deployment_data = outputs
+            return self.deployment_data
+
         self._command(cmd, output=True, quiet=quiet)
 
         return self.deployment_data
@@ -73,7 +73,7 @@ class DataCollect(object):
         self.use_public_ip = Inquire().ask_bool("Assign a public IP")
 
         try:
-            vpc_list = config.cloud_network().list(filter_keys_exist=["environment_tag"])
+            vpc_list = config.cloud_network().list(filter_keys_exist=["environment_tag"], filter_tags={"Environment": config.env_name})
         except EmptyResultSet:
             pass
 
@@ -101,20 +101,25 @@ class DataCollect(object):
         for s in subnets:
             self.subnet_list.append(s)
 
-        sec_groups = config.cloud_security_group().list(self.vpc_id)
+        try:
+            sec_groups = config.cloud_security_group().list(self.vpc_id, filter_tags={"Environment": config.env_name})
+        except EmptyResultSet:
+            sec_groups = []
         security_group = next((i for i in sec_groups if i.get('environment_tag') == config.env_name), None)
         if security_group:
             self.security_group_id = security_group['id']
         else:
+            sec_groups = config.cloud_security_group().list(self.vpc_id)
             selection = Inquire().ask_list_dict("Please select a security group", sec_groups)
             self.security_group_id = selection['id']
 
-        self.env_cfg.update(aws_region=self.region)
-        self.env_cfg.update(aws_vpc_id=self.vpc_id)
-        self.env_cfg.update(aws_subnet_list=self.subnet_list)
-        self.env_cfg.update(aws_security_group_id=self.security_group_id)
-        self.env_cfg.update(net_use_public_ip=self.use_public_ip)
-        self.env_cfg.update(aws_base_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(aws_region=self.region)
+            self.env_cfg.update(aws_vpc_id=self.vpc_id)
+            self.env_cfg.update(aws_subnet_list=self.subnet_list)
+            self.env_cfg.update(aws_security_group_id=self.security_group_id)
+            self.env_cfg.update(net_use_public_ip=self.use_public_ip)
+            self.env_cfg.update(aws_base_in_progress=False)
 
     def get_image(self, node_type: str = None):
         in_progress = self.env_cfg.get("aws_image_in_progress")
@@ -144,7 +149,7 @@ class DataCollect(object):
             owner_id = image_type.get("owner_id")
             image_list = config.cloud_image().list(is_public=True, owner_id=owner_id)
         else:
-            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_tags={"Release": None, "Type": None, "Version": None})
 
         image = Inquire().ask_list_dict(f"Select {config.cloud} image", image_list, sort_key="date", reverse_sort=True)
 
@@ -164,12 +169,13 @@ class DataCollect(object):
             self.generic_image_user = self.env_cfg.get("ssh_generic_user_name")
             self.image_user = distro_table.user
 
-        self.env_cfg.update(ssh_user_name=self.image_user)
-        self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
-        self.env_cfg.update(aws_ami_id=self.ami_id)
-        self.env_cfg.update(aws_generic_ami_id=self.generic_ami_id)
-        self.env_cfg.update(cbs_version=self.image_version)
-        self.env_cfg.update(aws_image_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_user_name=self.image_user)
+            self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
+            self.env_cfg.update(aws_ami_id=self.ami_id)
+            self.env_cfg.update(aws_generic_ami_id=self.generic_ami_id)
+            self.env_cfg.update(cbs_version=self.image_version)
+            self.env_cfg.update(aws_image_in_progress=False)
 
     def get_keys(self):
         key_list = []
@@ -193,7 +199,7 @@ class DataCollect(object):
         self.env_cfg.update(ssh_in_progress=True)
 
         try:
-            key_list = config.ssh_key().list(filter_keys_exist=["environment_tag"])
+            key_list = config.ssh_key().list(filter_keys_exist=["environment_tag"], filter_tags={"Environment": config.env_name})
         except EmptyResultSet:
             pass
 
@@ -211,10 +217,11 @@ class DataCollect(object):
         self.env_ssh_fingerprint = env_ssh.get("fingerprint")
         self.env_ssh_filename = FileManager().get_key_by_fingerprint(self.env_ssh_fingerprint)
 
-        self.env_cfg.update(aws_key_pair=self.env_ssh_key)
-        self.env_cfg.update(ssh_fingerprint=self.env_ssh_fingerprint)
-        self.env_cfg.update(ssh_private_key=self.env_ssh_filename)
-        self.env_cfg.update(ssh_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(aws_key_pair=self.env_ssh_key)
+            self.env_cfg.update(ssh_fingerprint=self.env_ssh_fingerprint)
+            self.env_cfg.update(ssh_private_key=self.env_ssh_filename)
+            self.env_cfg.update(ssh_in_progress=False)
 
     def get_cluster_settings(self, node_type: str = None):
         if node_type != "cluster":
@@ -284,8 +291,9 @@ class DataCollect(object):
         if selection['iops']:
             self.disk_iops = Inquire().ask_int("Volume IOPS", selection['iops'], selection['iops'], selection['max'])
 
-        self.env_cfg.update(aws_machine_type=self.instance_type)
-        self.env_cfg.update(aws_root_type=self.disk_type)
-        self.env_cfg.update(aws_root_size=self.disk_size)
-        self.env_cfg.update(aws_root_iops=self.disk_iops)
-        self.env_cfg.update(aws_node_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(aws_machine_type=self.instance_type)
+            self.env_cfg.update(aws_root_type=self.disk_type)
+            self.env_cfg.update(aws_root_size=self.disk_size)
+            self.env_cfg.update(aws_root_iops=self.disk_iops)
+            self.env_cfg.update(aws_node_in_progress=False)
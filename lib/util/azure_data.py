@@ -87,12 +87,7 @@ class DataCollect(object):
 
         os.environ['AZURE_LOCATION'] = self.region
 
-        try:
-            rg_list = config.cloud_base().list_rg(self.region)
-        except EmptyResultSet:
-            pass
-
-        env_rg = next((d for d in rg_list if d.get('name') == f"{config.env_name}-rg"), None)
+        env_rg = config.cloud_base().get_rg(f"{config.env_name}-rg", self.region)
         if env_rg:
             self.azure_resource_group = env_rg.get("name")
             network_list = config.cloud_network().list(self.azure_resource_group)
@@ -113,6 +108,10 @@ class DataCollect(object):
                 print(f"Created {config.env_name} network {self.network} in resource group {self.azure_resource_group}")
             else:
                 print(f"Environment {config.env_name} will be deployed on existing cloud infrastructure")
+                try:
+                    rg_list = config.cloud_base().list_rg(self.region)
+                except EmptyResultSet:
+                    pass
                 selection = Inquire().ask_list_dict("Please select a resource group", rg_list, hide_key=["id"])
                 self.azure_resource_group = selection.get("name")
                 vpc_list = config.cloud_network().list(self.azure_resource_group)
@@ -140,13 +139,14 @@ class DataCollect(object):
 
         self.azure_nsg = subnet_data['nsg']
 
-        self.env_cfg.update(azure_region=self.region)
-        self.env_cfg.update(azure_resource_group=self.azure_resource_group)
-        self.env_cfg.update(azure_security_group=self.azure_nsg)
-        self.env_cfg.update(azure_network=self.network)
-        self.env_cfg.update(azure_subnet_list=self.subnet_list)
-        self.env_cfg.update(net_use_public_ip=self.use_public_ip)
-        self.env_cfg.update(azure_base_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(azure_region=self.region)
+            self.env_cfg.update(azure_resource_group=self.azure_resource_group)
+            self.env_cfg.update(azure_security_group=self.azure_nsg)
+            self.env_cfg.update(azure_network=self.network)
+            self.env_cfg.update(azure_subnet_list=self.subnet_list)
+            self.env_cfg.update(net_use_public_ip=self.use_public_ip)
+            self.env_cfg.update(azure_base_in_progress=False)
 
     def get_image(self, node_type: str = None):
         in_progress = self.env_cfg.get("azure_image_in_progress")
@@ -191,7 +191,7 @@ class DataCollect(object):
             self.image = self.env_cfg.get("azure_image")
             self.azure_image_rg = self.env_cfg.get("azure_image_resource_group")
         else:
-            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_tags={"Release": None, "Type": None, "Version": None})
             image = Inquire().ask_list_dict(f"Select {config.cloud} image", image_list, sort_key="name", hide_key=["id"])
             self.image = image['name']
             self.azure_image_rg = image['resource_group']
@@ -205,15 +205,16 @@ class DataCollect(object):
             distro_table = AzureImageDataRecord.by_version(self.image_type, self.image_release, config.cloud_operator().config.build)
             self.image_user = distro_table.user
 
-        self.env_cfg.update(ssh_user_name=self.image_user)
-        self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
-        self.env_cfg.update(azure_image=self.image)
-        self.env_cfg.update(azure_image_publisher=self.image_publisher)
-        self.env_cfg.update(azure_image_offer=self.image_offer)
-        self.env_cfg.update(azure_image_sku=self.image_sku)
-        self.env_cfg.update(azure_image_resource_group=self.azure_image_rg)
-        self.env_cfg.update(cbs_version=self.image_version)
-        self.env_cfg.update(azure_image_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_user_name=self.image_user)
+            self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
+            self.env_cfg.update(azure_image=self.image)
+            self.env_cfg.update(azure_image_publisher=self.image_publisher)
+            self.env_cfg.update(azure_image_offer=self.image_offer)
+            self.env_cfg.update(azure_image_sku=self.image_sku)
+            self.env_cfg.update(azure_image_resource_group=self.azure_image_rg)
+            self.env_cfg.update(cbs_version=self.image_version)
+            self.env_cfg.update(azure_image_in_progress=False)
 
     def get_keys(self):
         in_progress = self.env_cfg.get("ssh_in_progress")
@@ -244,10 +245,11 @@ class DataCollect(object):
 
         self.public_key = FileManager().get_ssh_public_key_file(self.private_key)
 
-        self.env_cfg.update(ssh_private_key=self.private_key)
-        self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
-        self.env_cfg.update(ssh_public_key=self.public_key)
-        self.env_cfg.update(ssh_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_private_key=self.private_key)
+            self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
+            self.env_cfg.update(ssh_public_key=self.public_key)
+            self.env_cfg.update(ssh_in_progress=False)
 
     def get_cluster_settings(self, node_type: str = None):
         if node_type != "cluster":
@@ -312,7 +314,8 @@ class DataCollect(object):
         self.disk_type = selection['type']
         self.disk_size = Inquire().ask_int("Volume size", 250, 100)
 
-        self.env_cfg.update(azure_machine_type=self.instance_type)
-        self.env_cfg.update(azure_root_type=self.disk_type)
-        self.env_cfg.update(azure_root_size=self.disk_size)
-        self.env_cfg.update(azure_node_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(azure_machine_type=self.instance_type)
+            self.env_cfg.update(azure_root_type=self.disk_type)
+            self.env_cfg.update(azure_root_size=self.disk_size)
+            self.env_cfg.update(azure_node_in_progress=False)
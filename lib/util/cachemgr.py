@@ -0,0 +1,130 @@
+##
+##
+
+import logging
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Callable, Union
+import lib.config as config
+from lib.util.filelock import atomic_write
+
+
+class MetadataCache(object):
+    CACHE_DIR = "cache"
+    MAX_SIZE = 64 * 1024 * 1024
+    DEFAULT_TTL = 3600
+    TTL = {
+        "machine_types": 7 * 86400,
+        "zones": 86400,
+        "public_images": 6 * 3600,
+        "cb_releases": 6 * 3600,
+        "sgw_releases": 6 * 3600,
+        "projects": 3600,
+        "binary_version": 30 * 86400,
+        "host_prep_revision": 3600,
+        "account_id": 86400,
+    }
+    refreshed = set()
+    locks = {}
+    lock = threading.RLock()
+
+    def __init__(self, root: Union[str, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if root:
+            self.root = root
+        else:
+            self.root = os.path.join(config.catalog_root, MetadataCache.CACHE_DIR)
+
+    @staticmethod
+    def key_hash(kind: str, key: tuple) -> str:
+        key_text = json.dumps([kind] + [str(k) for k in key])
+        return hashlib.sha1(key_text.encode('utf-8')).hexdigest()
+
+    def entry_path(self, kind: str, key: tuple) -> str:
+        return os.path.join(self.root, f"{kind}-{self.key_hash(kind, key)}.json")
+
+    def get(self, kind: str, key: tuple, factory: Callable, ttl: Union[int, None] = None):
+        if ttl is None:
+            ttl = MetadataCache.TTL.get(kind, MetadataCache.DEFAULT_TTL)
+        path = self.entry_path(kind, key)
+
+        with self.entry_lock(path):
+            if config.cache_refresh and path not in MetadataCache.refreshed:
+                self.logger.debug(f"cache refresh requested for {kind}")
+            else:
+                entry = self.read(path)
+                if entry and time.time() - entry.get('created', 0) < ttl:
+                    self.logger.debug(f"cache hit for {kind}")
+                    return entry.get('data')
+
+            data = factory()
+            self.write(path, kind, data)
+            MetadataCache.refreshed.add(path)
+            self.evict()
+            return data
+
+    @staticmethod
+    def entry_lock(path: str) -> threading.RLock:
+        with MetadataCache.lock:
+            return MetadataCache.locks.setdefault(path, threading.RLock())
+
+    def read(self, path: str) -> Union[dict, None]:
+        try:
+            with open(path, 'r') as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            self.logger.debug(f"ignoring unreadable cache entry {path}: {err}")
+            return None
+
+    def write(self, path: str, kind: str, data) -> None:
+        entry = {
+            'kind': kind,
+            'created': time.time(),
+            'data': data
+        }
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            atomic_write(path, entry)
+        except Exception as err:
+            self.logger.debug(f"can not write cache entry {path}: {err}")
+
+    def evict(self, max_size: Union[int, None] = None) -> None:
+        if max_size is None:
+            max_size = MetadataCache.MAX_SIZE
+        entries = []
+        total_size = 0
+
+        try:
+            with os.scandir(self.root) as contents:
+                for item in contents:
+                    if not item.is_file() or not item.name.endswith('.json') or item.name.startswith('.'):
+                        continue
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                    total_size += stat.st_size
+        except OSError:
+            return
+
+        for mtime, size, path in sorted(entries):
+            if total_size <= max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                self.logger.debug(f"evicted cache entry {path}")
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        try:
+            with os.scandir(self.root) as contents:
+                for item in contents:
+                    if item.is_file() and item.name.endswith('.json'):
+                        os.remove(item.path)
+        except FileNotFoundError:
+            pass
@@ -7,6 +7,7 @@ import lib.config as config
 from lib.util.envmgr import PathMap, PathType, ConfigFile
 from lib.util.cfgmgr import ConfigMgr
 from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
 
 
 class DataCollect(object):
@@ -73,23 +74,21 @@ class DataCollect(object):
 
         self.region = Inquire().ask_list_basic("Cloud region", config.cloud_base(cloud=self.provider).regions)
 
-        for net in config.cloud_network().cidr_list:
-            cidr_util.add_network(net)
-
-        cidr_util.get_next_network()
+        NetworkLedger.from_config().allocate(cidr_util, config.env_name)
         subnet_list = list(cidr_util.get_next_subnet(prefix=23))
         self.network = subnet_list[1]
 
         self.support_package = Inquire().ask_list_basic("Support package", config.cloud_base().SUPPORT_PACKAGE)
 
-        self.env_cfg.update(capella_region=self.region)
-        self.env_cfg.update(capella_project=self.project)
-        self.env_cfg.update(capella_cluster_name=self.cluster_name)
-        self.env_cfg.update(capella_provider=self.provider)
-        self.env_cfg.update(capella_network=self.network)
-        self.env_cfg.update(capella_single_az=self.single_az)
-        self.env_cfg.update(capella_support_package=self.support_package)
-        self.env_cfg.update(capella_base_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(capella_region=self.region)
+            self.env_cfg.update(capella_project=self.project)
+            self.env_cfg.update(capella_cluster_name=self.cluster_name)
+            self.env_cfg.update(capella_provider=self.provider)
+            self.env_cfg.update(capella_network=self.network)
+            self.env_cfg.update(capella_single_az=self.single_az)
+            self.env_cfg.update(capella_support_package=self.support_package)
+            self.env_cfg.update(capella_base_in_progress=False)
 
     def get_node_settings(self, default: bool = True):
         in_progress = self.env_cfg.get("capella_node_in_progress")
@@ -127,8 +126,9 @@ class DataCollect(object):
         if selection['iops']:
             self.disk_iops = Inquire().ask_int("Volume IOPS", selection['iops'], selection['iops'], selection['max'])
 
-        self.env_cfg.update(capella_machine_type=self.machine_type)
-        self.env_cfg.update(capella_root_type=self.disk_type)
-        self.env_cfg.update(capella_root_size=self.disk_size)
-        self.env_cfg.update(capella_root_iops=self.disk_iops)
-        self.env_cfg.update(capella_node_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(capella_machine_type=self.machine_type)
+            self.env_cfg.update(capella_root_type=self.disk_type)
+            self.env_cfg.update(capella_root_size=self.disk_size)
+            self.env_cfg.update(capella_root_iops=self.disk_iops)
+            self.env_cfg.update(capella_node_in_progress=False)
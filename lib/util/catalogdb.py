@@ -0,0 +1,159 @@
+##
+##
+
+import logging
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from enum import Enum
+import lib.config as config
+from lib.exceptions import DirectoryStructureError
+from lib.util.envmgr import CatalogManager
+from lib.util.filelock import FileLock
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS inventory (env TEXT NOT NULL, cloud TEXT NOT NULL, mode TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (env, cloud, mode))",
+    "CREATE INDEX IF NOT EXISTS inventory_cloud ON inventory (cloud)",
+    "CREATE INDEX IF NOT EXISTS inventory_path ON inventory (path)",
+    "CREATE TABLE IF NOT EXISTS images (cloud TEXT NOT NULL, mode TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (cloud, mode))",
+]
+
+
+class SQLiteCatalogManager(CatalogManager):
+    DATABASE = "catalog.db"
+    MIGRATED = "catalog.migrated"
+    TIMEOUT = 60
+
+    def __init__(self, location):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not os.path.exists(location):
+            raise DirectoryStructureError(f"can not find catalog location {location}")
+        self._location = location
+        self._catalog = location + '/catalog.json'
+        self._catalog_backup = location + '/catalog.backup'
+        self._database = location + '/' + SQLiteCatalogManager.DATABASE
+        self._leaf_list = []
+        self._lock = FileLock(self._database)
+        try:
+            self.db = sqlite3.connect(self._database, timeout=SQLiteCatalogManager.TIMEOUT, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            with self.transaction():
+                for statement in SCHEMA:
+                    self.db.execute(statement)
+                if not self.db.execute("SELECT 1 FROM config WHERE key = 'config'").fetchone():
+                    self.db.execute("INSERT INTO config VALUES ('config', ?)", (json.dumps({"version": config.config_version}),))
+        except sqlite3.Error as err:
+            raise DirectoryStructureError(f"can not open catalog database {self._database}: {err}")
+        self.migrate()
+
+    @contextmanager
+    def transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def migrate(self) -> bool:
+        if not os.path.exists(self._catalog):
+            return False
+        with self._lock.exclusive():
+            if not os.path.exists(self._catalog):
+                return False
+            self.logger.debug(f"migrating catalog {self._catalog} to {self._database}")
+            contents = CatalogManager(self._location).read_file()
+            self.write_file(contents)
+            os.replace(self._catalog, os.path.join(self._location, SQLiteCatalogManager.MIGRATED))
+        return True
+
+    def update(self, name: str, data: dict):
+        try:
+            with self.transaction():
+                if name == 'inventory':
+                    self.db.executemany("INSERT INTO inventory VALUES (?, ?, ?, ?) "
+                                        "ON CONFLICT (env, cloud, mode) DO UPDATE SET path = excluded.path WHERE path != excluded.path",
+                                        self.inventory_rows(data))
+                elif name == 'images':
+                    self.db.executemany("INSERT INTO images VALUES (?, ?, ?) "
+                                        "ON CONFLICT (cloud, mode) DO UPDATE SET path = excluded.path WHERE path != excluded.path",
+                                        self.image_rows(data))
+                else:
+                    row = self.db.execute("SELECT value FROM config WHERE key = ?", (name,)).fetchone()
+                    contents = json.loads(row[0]) if row else {}
+                    if isinstance(contents, dict) and isinstance(data, dict):
+                        data = self.merge(data, contents)
+                    self.db.execute("INSERT OR REPLACE INTO config VALUES (?, ?)", (name, json.dumps(data)))
+        except sqlite3.Error as err:
+            raise DirectoryStructureError(f"can not update catalog database {self._database}: {err}")
+
+    @staticmethod
+    def inventory_rows(data: dict):
+        for env_name in data:
+            for cloud in data[env_name]:
+                for mode, path in data[env_name][cloud].items():
+                    yield env_name, cloud, mode, path
+
+    @staticmethod
+    def image_rows(data: dict):
+        for cloud in data:
+            for mode, path in data[cloud].items():
+                yield cloud, mode, path
+
+    def read_file(self) -> dict:
+        contents = {}
+        try:
+            for key, value in self.db.execute("SELECT key, value FROM config"):
+                contents[key] = json.loads(value)
+            for cloud, mode, path in self.db.execute("SELECT cloud, mode, path FROM images ORDER BY rowid"):
+                contents.setdefault('images', {}).setdefault(cloud, {})[mode] = path
+            for env_name, cloud, mode, path in self.db.execute("SELECT env, cloud, mode, path FROM inventory ORDER BY rowid"):
+                contents.setdefault('inventory', {}).setdefault(env_name, {}).setdefault(cloud, {})[mode] = path
+        except sqlite3.Error as err:
+            raise DirectoryStructureError(f"can not read catalog database {self._database}: {err}")
+        return contents
+
+    def write_file(self, data: dict) -> None:
+        try:
+            with self.transaction():
+                self.db.execute("DELETE FROM config")
+                self.db.execute("DELETE FROM images")
+                self.db.execute("DELETE FROM inventory")
+                for key in data:
+                    if key == 'inventory':
+                        self.db.executemany("INSERT INTO inventory VALUES (?, ?, ?, ?)", self.inventory_rows(data[key]))
+                    elif key == 'images':
+                        self.db.executemany("INSERT INTO images VALUES (?, ?, ?)", self.image_rows(data[key]))
+                    else:
+                        self.db.execute("INSERT INTO config VALUES (?, ?)", (key, json.dumps(data[key])))
+        except sqlite3.Error as err:
+            raise DirectoryStructureError(f"can not write catalog database {self._database}: {err}")
+
+    def get_environment(self, env_name: str):
+        contents = {}
+        for cloud, mode, path in self.db.execute("SELECT cloud, mode, path FROM inventory WHERE env = ? ORDER BY rowid", (env_name,)):
+            contents.setdefault(cloud, {})[mode] = path
+        for cloud in contents:
+            yield cloud, contents[cloud]
+
+    def remove_environment(self, env_name: str):
+        try:
+            with self.transaction():
+                self.db.execute("DELETE FROM inventory WHERE env = ?", (env_name,))
+        except sqlite3.Error as err:
+            raise DirectoryStructureError(f"can not update catalog database {self._database}: {err}")
+
+    def entry_exists(self, env_name: str, cloud: str, mode: Enum, file_name: str) -> bool:
+        row = self.db.execute("SELECT path FROM inventory WHERE env = ? AND cloud = ? AND mode = ?",
+                              (env_name, cloud, mode.name.lower())).fetchone()
+        if row:
+            return os.path.exists(row[0] + "/" + file_name)
+        else:
+            return False
+
+    def close(self) -> None:
+        self.db.close()
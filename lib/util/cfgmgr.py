@@ -5,9 +5,12 @@ import logging
 import attr
 import json
 import os
-import time
+import copy
+from contextlib import contextmanager
+from typing import Union
 from attr.validators import instance_of as io
 from lib.exceptions import ConfigManagerError
+from lib.util.filelock import FileLock, atomic_write
 
 
 @attr.s
@@ -247,72 +250,120 @@ class Config(object):
         return self.__dict__
 
 
+def config_key_map() -> dict:
+    key_map = {}
+    for category in Config.__attrs_attrs__:
+        _class_name = category.metadata['_class_name']
+        _config_class = globals()[_class_name]
+        for attribute in _config_class.__attrs_attrs__:
+            key_map[f"{category.name}_{attribute.name}"] = (category.name, attribute.name)
+    return key_map
+
+
+CONFIG_KEY_MAP = config_key_map()
+
+
 class ConfigMgr(object):
 
     def __init__(self, filename):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.filename = filename
         self.config_data = {}
-        self.retry_count = 10
-        self.unlock_file()
+        self.file_id = None
+        self.transaction_depth = 0
+        self.dirty = False
+        self.lock = FileLock(self.filename)
         if not self.exists():
             self.create()
 
+    def file_signature(self) -> Union[tuple, None]:
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
     def get_config(self) -> bool:
+        file_id = self.file_signature()
+        if self.config_data and file_id and file_id == self.file_id:
+            return True
         try:
-            with open(self.filename, 'r') as config_file:
-                data_read = json.load(config_file)
-                self.config_data = Config(
-                    data_read.get('ssh'),
-                    data_read.get('aws'),
-                    data_read.get('gcp'),
-                    data_read.get('azure'),
-                    data_read.get('capella'),
-                    data_read.get('vmware'),
-                    data_read.get('cbs'),
-                    data_read.get('net'),
-                    data_read.get('cfg')
-                ).as_dict
+            with self.lock.shared():
+                file_id = self.file_signature()
+                with open(self.filename, 'r') as config_file:
+                    data_read = json.load(config_file)
+            self.config_data = Config(
+                data_read.get('ssh'),
+                data_read.get('aws'),
+                data_read.get('gcp'),
+                data_read.get('azure'),
+                data_read.get('capella'),
+                data_read.get('vmware'),
+                data_read.get('cbs'),
+                data_read.get('net'),
+                data_read.get('cfg')
+            ).as_dict
+            self.file_id = file_id
             return True
         except Exception as err:
             raise ConfigManagerError(f"can not read config file {self.filename}: {err}")
 
+    @contextmanager
+    def transaction(self):
+        snapshot = None
+        if self.transaction_depth == 0:
+            try:
+                self.lock.acquire(FileLock.EXCLUSIVE)
+            except Exception as err:
+                raise ConfigManagerError(f"can not lock config file {self.filename}: {err}")
+            try:
+                self.get_config()
+            except Exception:
+                self.lock.release()
+                raise
+            snapshot = (copy.deepcopy(self.config_data), self.file_id)
+        self.transaction_depth += 1
+        try:
+            yield self
+            if self.transaction_depth == 1 and self.dirty:
+                self.write_config()
+        except BaseException:
+            if snapshot:
+                self.config_data, self.file_id = snapshot
+            raise
+        finally:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                self.dirty = False
+                self.lock.release()
+
     def update(self, **kwargs) -> None:
-        self.get_config()
-        for arg in kwargs.keys():
-            prefix, suffix = arg.split("_", 1)
-            for category in Config.__attrs_attrs__:
-                if category.name == prefix:
-                    _class_name = category.metadata['_class_name']
-                    _config_class = globals()[_class_name]
-                    for attribute in _config_class.__attrs_attrs__:
-                        if suffix == attribute.name:
-                            part = {suffix: kwargs[arg]}
-                            if self.config_data[prefix] is None:
-                                self.config_data[prefix] = {}
-                            self.config_data[prefix].update(part)
-        self.write_config()
+        with self.transaction():
+            for arg in kwargs.keys():
+                if arg not in CONFIG_KEY_MAP:
+                    continue
+                prefix, suffix = CONFIG_KEY_MAP[arg]
+                part = {suffix: copy.deepcopy(kwargs[arg])}
+                if self.config_data[prefix] is None:
+                    self.config_data[prefix] = {}
+                self.config_data[prefix].update(part)
+                self.dirty = True
 
     def get(self, key: str):
-        self.get_config()
-        prefix, suffix = key.split("_", 1)
-        for category in Config.__attrs_attrs__:
-            if category.name == prefix:
-                _class_name = category.metadata['_class_name']
-                _config_class = globals()[_class_name]
-                for attribute in _config_class.__attrs_attrs__:
-                    if suffix == attribute.name:
-                        if self.config_data[prefix] is None:
-                            self.config_data[prefix] = {}
-                        return self.config_data[prefix].get(suffix)
+        if key not in CONFIG_KEY_MAP:
+            return None
+        if self.transaction_depth == 0:
+            self.get_config()
+        prefix, suffix = CONFIG_KEY_MAP[key]
+        if self.config_data[prefix] is None:
+            self.config_data[prefix] = {}
+        return copy.deepcopy(self.config_data[prefix].get(suffix))
 
     def write_config(self) -> None:
         try:
-            self.lock_wait()
-            self.lock_file()
-            with open(self.filename, 'w') as config_file:
-                json.dump(self.config_data, config_file)
-            self.unlock_file()
+            with self.lock.exclusive():
+                atomic_write(self.filename, self.config_data)
+                self.file_id = self.file_signature()
         except Exception as err:
             raise ConfigManagerError(f"can not write config file {self.filename}: {err}")
 
@@ -322,33 +373,6 @@ class ConfigMgr(object):
         return False
 
     def create(self) -> None:
-        self.write_config()
-
-    def lock_file(self) -> None:
-        lock_file = f"{self.filename}.lck"
-        open(lock_file, 'w').close()
-
-    def unlock_file(self) -> None:
-        if self.filename == "." or self.filename == ".." or self.filename == "*" or len(self.filename) == 0:
-            raise ConfigManagerError(f"unlock_file: unsafe remove operation on file \"{self.filename}\"")
-        lock_file = f"{self.filename}.lck"
-        if os.path.exists(lock_file):
-            os.remove(lock_file)
-
-    def check_lock(self) -> bool:
-        lock_file = f"{self.filename}.lck"
-        if os.path.exists(lock_file):
-            raise ConfigManagerError("configuration file locked")
-        return True
-
-    def lock_wait(self) -> bool:
-        factor = 0.01
-        for retry_number in range(self.retry_count + 1):
-            try:
-                return self.check_lock()
-            except ConfigManagerError:
-                if retry_number == self.retry_count:
-                    raise ConfigManagerError("timeout waiting on file lock")
-                wait = factor
-                wait *= (2 ** (retry_number + 1))
-                time.sleep(wait)
+        with self.lock.exclusive():
+            if not self.exists():
+                self.write_config()
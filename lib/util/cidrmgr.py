@@ -0,0 +1,156 @@
+##
+##
+
+import logging
+import os
+import json
+import time
+import hashlib
+import importlib
+from typing import Union
+import lib.config as config
+from lib.exceptions import NetworkMgrError
+from lib.drivers.network import NetworkDriver
+from lib.util.filelock import FileLock, atomic_write
+
+
+class NetworkLedger(object):
+    LEDGER_DIR = "ledger"
+    CLOUDS = ("aws", "gcp", "azure", "capella")
+    SYNC_TTL = 86400
+    PROVIDER = "provider"
+    ALLOCATED = "allocated"
+
+    def __init__(self, cloud: str, scope: tuple, network=None, root: Union[str, None] = None, ttl: Union[int, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not scope or any(k is None for k in scope):
+            raise NetworkMgrError(f"can not determine the {cloud} account for the network ledger")
+        self.cloud = cloud
+        self.scope = [str(k) for k in scope]
+        self.network = network
+        self.ttl = ttl if ttl is not None else NetworkLedger.SYNC_TTL
+        root = os.path.join(root if root else config.catalog_root, NetworkLedger.LEDGER_DIR)
+        scope_hash = hashlib.sha1(json.dumps([cloud] + self.scope).encode('utf-8')).hexdigest()
+        self.ledger_file = os.path.join(root, f"{cloud}-{scope_hash}.json")
+        self.lock = FileLock(self.ledger_file)
+        self.data = self.empty()
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_config(cls):
+        network = config.cloud_network()
+        return cls(config.cloud, network.scope, network)
+
+    @classmethod
+    def from_cloud(cls, cloud: str):
+        driver = importlib.import_module(f"lib.drivers.{cloud}")
+        network = driver.Network()
+        return cls(cloud, network.scope, network)
+
+    def empty(self) -> dict:
+        return {
+            "cloud": self.cloud,
+            "scope": self.scope,
+            "synced": 0,
+            "cursor": None,
+            "networks": {}
+        }
+
+    @property
+    def networks(self) -> dict:
+        return self.data["networks"]
+
+    def read(self) -> None:
+        try:
+            with open(self.ledger_file, 'r') as ledger_file:
+                self.data = json.load(ledger_file)
+        except FileNotFoundError:
+            self.data = self.empty()
+        except Exception as err:
+            self.logger.warning(f"ignoring unreadable network ledger {self.ledger_file}: {err}")
+            self.data = self.empty()
+
+    def write(self) -> None:
+        atomic_write(self.ledger_file, self.data)
+
+    @staticmethod
+    def entry(source: str, env_name: Union[str, None] = None) -> dict:
+        return {
+            "source": source,
+            "env": env_name,
+            "time": time.time()
+        }
+
+    @property
+    def incremental(self) -> bool:
+        return hasattr(self.network, 'cidr_since')
+
+    def scan(self, cursor=None) -> tuple[list[str], Union[list, None]]:
+        if self.incremental:
+            return self.network.cidr_since(cursor)
+        return list(self.network.cidr_list), None
+
+    def stale(self) -> bool:
+        # without a cursor there is no way to see networks created elsewhere since the last scan
+        if config.cache_refresh or not self.incremental:
+            return True
+        return time.time() - self.data.get("synced", 0) >= self.ttl
+
+    def sync(self) -> None:
+        start = time.time()
+        self.logger.debug(f"full network scan for {self.cloud} ledger {self.ledger_file}")
+        cidrs, cursor = self.scan()
+        found = set(cidrs)
+        networks = {}
+        for cidr, item in self.networks.items():
+            if item["source"] != NetworkLedger.ALLOCATED:
+                continue
+            # drop our own allocations the provider never reported once they are older than a sync period
+            if cidr in found or start - item["time"] < self.ttl:
+                networks[cidr] = item
+        for cidr in cidrs:
+            networks.setdefault(cidr, self.entry(NetworkLedger.PROVIDER))
+        self.data.update(networks=networks, synced=start, cursor=cursor)
+
+    def update(self) -> None:
+        cidrs, cursor = self.scan(self.data.get("cursor"))
+        self.logger.debug(f"incremental network scan for {self.cloud} found {len(cidrs)} new network(s)")
+        for cidr in cidrs:
+            self.networks.setdefault(cidr, self.entry(NetworkLedger.PROVIDER))
+        self.data["cursor"] = cursor
+
+    def reconcile(self) -> None:
+        if self.stale():
+            self.sync()
+        else:
+            self.update()
+
+    def allocate(self, cidr_util: NetworkDriver, env_name: Union[str, None] = None, prefix: int = 16) -> Union[str, None]:
+        with self.lock.exclusive():
+            self.read()
+            self.reconcile()
+            for cidr in self.networks:
+                cidr_util.add_network(cidr)
+            cidr = cidr_util.get_next_network(prefix)
+            if cidr:
+                self.networks[cidr] = self.entry(NetworkLedger.ALLOCATED, env_name)
+            self.write()
+        return cidr
+
+    def conflict(self, cidr: str) -> None:
+        with self.lock.exclusive():
+            self.read()
+            item = self.networks.get(cidr)
+            if item and item["source"] == NetworkLedger.ALLOCATED:
+                del self.networks[cidr]
+            self.data["synced"] = 0
+            self.write()
+
+    def release(self, env_name: str) -> list[str]:
+        with self.lock.exclusive():
+            self.read()
+            released = [cidr for cidr, item in self.networks.items() if item["source"] == NetworkLedger.ALLOCATED and item["env"] == env_name]
+            for cidr in released:
+                del self.networks[cidr]
+            self.write()
+        return released
@@ -3,12 +3,7 @@
 
 import logging
 from itertools import cycle
-from typing import Union
-import lib.util.aws_data
-import lib.util.gcp_data
-import lib.util.azure_data
-import lib.util.vmware_data
-import lib.util.capella_data
+from typing import Union, TYPE_CHECKING
 from lib.util.inquire import Inquire
 from lib.util.cfgmgr import ConfigMgr
 import lib.config as config
@@ -17,6 +12,13 @@ from lib.hcl.common import ClusterMapElement, VariableMap, CapellaServerGroup, C
 from lib.drivers.cbrelease import CBRelease
 from lib.util.network import NetworkUtil
 
+if TYPE_CHECKING:
+    import lib.util.aws_data
+    import lib.util.gcp_data
+    import lib.util.azure_data
+    import lib.util.vmware_data
+    import lib.util.capella_data
+
 
 class ClusterCollect(object):
 
@@ -35,10 +37,10 @@ class ClusterCollect(object):
         self.env_cfg = ConfigMgr(cfg_file.file_name)
 
     def create_cloud(self, node_type: str,
-                     dc: Union[lib.util.aws_data.DataCollect,
-                               lib.util.gcp_data.DataCollect,
-                               lib.util.azure_data.DataCollect,
-                               lib.util.vmware_data.DataCollect]):
+                     dc: Union['lib.util.aws_data.DataCollect',
+                               'lib.util.gcp_data.DataCollect',
+                               'lib.util.azure_data.DataCollect',
+                               'lib.util.vmware_data.DataCollect']):
         node_env = config.env_name
         node = 1
         group = 1
@@ -119,8 +121,14 @@ class ClusterCollect(object):
                 if answer == 'y' or answer == 'yes':
                     selected_services.append(node_svc)
 
-            for n in range(node_count):
-                node_name = f"{prefix_text}-{node_env}-n{node:02d}"
+            node_names = [f"{prefix_text}-{node_env}-n{n:02d}" for n in range(node, node + node_count)]
+            static_ip_map = {}
+
+            if config.static_ip:
+                print("")
+                static_ip_map = net.get_static_ips(node_names, dc.domain_name, dc.dns_server_list)
+
+            for node_name in node_names:
                 node_ip_address = None
                 node_netmask = None
                 node_gateway = None
@@ -135,8 +143,7 @@ class ClusterCollect(object):
                     install_mode = 'add'
 
                 if config.static_ip:
-                    print("")
-                    node_ip_address = net.get_static_ip(node_name, dc.domain_name, dc.dns_server_list)
+                    node_ip_address = static_ip_map[node_name]
                     node_netmask = str(net.netmask)
                     node_gateway = net.gateway
 
@@ -204,11 +211,12 @@ class ClusterCollect(object):
         release_list = sorted(versions_list, reverse=True)
         self.sgw_version = Inquire().ask_list_basic('Select Sync Gateway version', release_list)
 
-        self.env_cfg.update(**{f"cbs_sgw_version": self.sgw_version})
-        self.env_cfg.update(**{f"{config.cloud}_sgw_node_list": self.cluster_node_list})
-        self.env_cfg.update(**{f"{config.cloud}_sgw_in_progress": False})
+        with self.env_cfg.transaction():
+            self.env_cfg.update(**{f"cbs_sgw_version": self.sgw_version})
+            self.env_cfg.update(**{f"{config.cloud}_sgw_node_list": self.cluster_node_list})
+            self.env_cfg.update(**{f"{config.cloud}_sgw_in_progress": False})
 
-    def create_capella(self, dc: Union[lib.util.capella_data.DataCollect]):
+    def create_capella(self, dc: Union['lib.util.capella_data.DataCollect']):
         group = 1
         services = config.cloud_base().SERVICES
 
@@ -5,17 +5,20 @@ import os
 import logging
 import attr
 import json
-from shutil import copyfile
 from attr.validators import instance_of as io
 from enum import Enum
 from typing import Union
 import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from lib.util.generator import Generator
 import lib.config as config
-from lib.exceptions import DirectoryStructureError, MissingParameterError, CatalogInvalid
+from lib.exceptions import DirectoryStructureError, MissingParameterError, CatalogInvalid, EnvMgrError
 from lib.util.cfgmgr import ConfigMgr
+from lib.util.filelock import FileLock, atomic_write
 from lib.invoke import tf_run, packer_run
 from lib.util.inquire import Inquire
+from lib.util.cidrmgr import NetworkLedger
 
 logger = logging.getLogger(__name__)
 
@@ -162,44 +165,47 @@ class DatastoreTuple(object):
     path = attr.ib(validator=io(str))
     file = attr.ib(validator=io(str))
     switch = attr.ib(validator=io(Enum))
-    exec = attr.ib(validator=attr.validators.instance_of((tf_run, packer_run, type(None))))
+    exec = attr.ib(validator=attr.validators.instance_of((tf_run, packer_run, type(None))), default=None)
+    quiet = attr.ib(validator=io(bool), default=False)
 
     @classmethod
     def build(cls, cloud: str, mode: Enum, path: str, file: str):
         switch = ExecType(PathExec[mode.name].value)
-        if switch.value == ExecType.TF_EXEC.value:
-            run_exec = tf_run(working_dir=path)
-        elif switch.value == ExecType.PK_EXEC.value:
-            run_exec = packer_run(working_dir=path)
-        else:
-            run_exec = None
         return cls(
             cloud,
             mode,
             path,
             file,
-            switch,
-            run_exec
+            switch
             )
 
+    @property
+    def executor(self) -> Union[tf_run, packer_run, None]:
+        if not self.exec:
+            if self.switch.value == ExecType.TF_EXEC.value:
+                self.exec = tf_run(working_dir=self.path, quiet=self.quiet)
+            elif self.switch.value == ExecType.PK_EXEC.value:
+                self.exec = packer_run(working_dir=self.path)
+        return self.exec
+
     @property
     def as_dict(self):
         return self.__dict__
 
     @property
     def as_tuple(self):
-        return self.mode, self.path, self.file, self.switch, self.exec
+        return self.mode, self.path, self.file, self.switch, self.executor
 
     def validate(self):
         if self.switch.value == ExecType.TF_EXEC.value:
-            if not self.exec.validate():
-                self.exec.init()
+            if not self.executor.validate():
+                self.executor.init()
         elif self.switch.value == ExecType.PK_EXEC.value:
-            self.exec.init(self.file)
+            self.executor.init(self.file, quiet=self.quiet)
 
     def remove(self):
         if self.switch.value == ExecType.TF_EXEC.value:
-            self.exec.destroy(quiet=True)
+            self.executor.destroy(quiet=True)
 
 
 class PathMap(object):
@@ -214,15 +220,17 @@ class PathMap(object):
         else:
             self.root = f"{config.package_dir}/db"
         self.path['root'] = self.root
-        self.cm = CatalogManager(self.root)
+        self.cm = get_catalog(self.root)
         self._last_mapped = None
         self.logger.debug(f"Catalog Path Map: environment {self.name} cloud {self.cloud}")
 
-    def map(self, mode: Enum) -> None:
+    def map(self, mode: Enum, variant: Union[str, None] = None) -> None:
         if config.catalog_target == CatalogRoot.IMAGE:
             path_name = Generator.get_host_id()
         else:
             path_name = self.name
+        if variant:
+            path_name = f"{path_name}-{variant}"
         uuid = Generator.get_uuid(DatastoreEntry.build(self.cloud, path_name, mode.name.lower()).as_str)
         path_dir = f"{self.root}/{uuid}"
         self.path_check(path_dir)
@@ -231,7 +239,8 @@ class PathMap(object):
             'file': None
         }
         if config.catalog_target == CatalogRoot.IMAGE:
-            self.cm.update('images', BaseCatalogEntry.create(mode.name.lower(), path_dir).as_key(self.cloud))
+            entry_name = f"{mode.name.lower()}-{variant}" if variant else mode.name.lower()
+            self.cm.update('images', BaseCatalogEntry.create(entry_name, path_dir).as_key(self.cloud))
         else:
             self.cm.update('inventory', NodeCatalogEntry.create(self.cloud, mode.name.lower(), path_dir).as_key(self.name))
         self._last_mapped = mode.name.lower()
@@ -304,6 +313,11 @@ class PathMap(object):
 
 
 class CatalogManager(object):
+    RESERVED = [
+        "cache",
+        "ledger",
+        "plugins"
+    ]
 
     def __init__(self, location):
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -313,24 +327,40 @@ class CatalogManager(object):
         self._catalog = location + '/catalog.json'
         self._catalog_backup = location + '/catalog.backup'
         self._leaf_list = []
+        self._lock = FileLock(self._catalog)
         if not os.path.exists(self._catalog):
-            logger.debug(f"initializing new catalog file at {self._catalog}")
             empty = {
                 "config": {
                     "version": config.config_version
                 }
             }
             try:
-                with open(self._catalog, 'w') as catalog_file:
-                    json.dump(empty, catalog_file)
+                with self._lock.exclusive():
+                    if not os.path.exists(self._catalog):
+                        logger.debug(f"initializing new catalog file at {self._catalog}")
+                        atomic_write(self._catalog, empty)
             except Exception as err:
                 raise DirectoryStructureError(f"can not write to catalog file {self._catalog}: {err}")
 
     def update(self, name: str, data: dict):
-        contents = self.read_file()
-        source = {name: data}
-        contents = self.merge(source, contents)
-        self.write_file(contents)
+        with self._lock.exclusive():
+            contents = self.read_file()
+            source = {name: data}
+            if self.contains(source, contents):
+                return
+            contents = self.merge(source, contents)
+            self.write_file(contents)
+
+    def contains(self, src: dict, dst: dict) -> bool:
+        for key in src:
+            if key not in dst:
+                return False
+            if isinstance(src[key], dict) and isinstance(dst[key], dict):
+                if not self.contains(src[key], dst[key]):
+                    return False
+            elif src[key] != dst[key]:
+                return False
+        return True
 
     def merge(self, src: dict, dst: dict):
         for key in src:
@@ -343,21 +373,25 @@ class CatalogManager(object):
 
     def read_file(self) -> dict:
         try:
-            with open(self._catalog, 'r') as catalog_file:
-                data = json.load(catalog_file)
+            with self._lock.shared():
+                with open(self._catalog, 'r') as catalog_file:
+                    data = json.load(catalog_file)
             return data
         except Exception as err:
             raise DirectoryStructureError(f"can not read catalog file {self._catalog}: {err}")
 
     def write_file(self, data: dict) -> None:
         try:
-            copyfile(self._catalog, self._catalog_backup)
-            with open(self._catalog, 'w') as catalog_file:
-                json.dump(data, catalog_file)
+            with self._lock.exclusive():
+                atomic_write(self._catalog, data, backup=self._catalog_backup)
         except Exception as err:
-            raise DirectoryStructureError(f"can not read catalog file {self._catalog}: {err}")
+            raise DirectoryStructureError(f"can not write catalog file {self._catalog}: {err}")
 
     def check(self, fix: bool = False) -> None:
+        with self._lock.exclusive():
+            self.check_catalog(fix)
+
+    def check_catalog(self, fix: bool) -> None:
         contents = self.read_file()
 
         config_vers = contents.get('config', {}).get('version')
@@ -427,7 +461,7 @@ class CatalogManager(object):
     def check_leafs(self, fix: bool) -> None:
         for name in os.listdir(self._location):
             full_path = f"{self._location}/{name}"
-            if os.path.isdir(full_path):
+            if os.path.isdir(full_path) and name not in CatalogManager.RESERVED:
                 if name not in self._leaf_list:
                     print(f"[!] Orphaned leaf {name}")
                     if fix:
@@ -443,11 +477,12 @@ class CatalogManager(object):
                         yield cloud, contents['inventory'][environment][cloud]
 
     def remove_environment(self, env_name: str):
-        contents = self.read_file()
-        if contents.get('inventory'):
-            if contents.get('inventory').get(env_name):
-                del contents['inventory'][env_name]
-        self.write_file(contents)
+        with self._lock.exclusive():
+            contents = self.read_file()
+            if contents.get('inventory'):
+                if contents.get('inventory').get(env_name):
+                    del contents['inventory'][env_name]
+            self.write_file(contents)
 
     def entry_exists(self, env_name: str, cloud: str, mode: Enum, file_name: str) -> bool:
         contents = self.read_file()
@@ -494,6 +529,13 @@ class CatalogManager(object):
                                         print(f"      Services: {cluster_map[node]['node_services']}")
 
 
+def get_catalog(location: str) -> CatalogManager:
+    if config.catalog_engine == "sqlite" or os.path.exists(f"{location}/catalog.db"):
+        from lib.util.catalogdb import SQLiteCatalogManager
+        return SQLiteCatalogManager(location)
+    return CatalogManager(location)
+
+
 class LogViewer(object):
     IMAGE_LOG = "build.log"
     DEPLOY_LOG = "deploy.log"
@@ -548,6 +590,63 @@ class LogViewer(object):
                 print(line, end='')
 
 
+class TaskGraph(object):
+
+    def __init__(self, max_workers: Union[int, None] = None, fail_fast: Union[bool, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_workers = max_workers if max_workers else config.stack_workers
+        self.fail_fast = fail_fast if fail_fast is not None else config.stack_fail_fast
+        self.tasks = {}
+        self.depends = {}
+        self.status = {}
+        self.results = {}
+        self.errors = {}
+
+    def add(self, name: str, task, depends: Union[list, None] = None) -> None:
+        self.tasks[name] = task
+        self.depends[name] = set(depends) if depends else set()
+
+    def ready(self) -> list[str]:
+        return [name for name in self.tasks
+                if self.status.get(name) is None and all(self.status.get(d) == 'complete' for d in self.depends[name] if d in self.tasks)]
+
+    def blocked(self) -> list[str]:
+        return [name for name in self.tasks
+                if self.status.get(name) is None and any(self.status.get(d) in ('failed', 'skipped') for d in self.depends[name])]
+
+    def run(self) -> dict:
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if not self.errors or not self.fail_fast:
+                    for name in self.blocked():
+                        self.logger.debug(f"skipping {name}: dependency failed")
+                        self.status[name] = 'skipped'
+                    for name in self.ready():
+                        self.logger.debug(f"starting {name}")
+                        self.status[name] = 'running'
+                        running[executor.submit(self.tasks[name])] = name
+                if not running:
+                    break
+                done, pending = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                        self.status[name] = 'complete'
+                    except BaseException as err:
+                        self.errors[name] = err
+                        self.status[name] = 'failed'
+                        self.logger.debug(f"task {name} failed: {err}")
+
+        for name in self.tasks:
+            if self.status.get(name) is None:
+                self.status[name] = 'skipped'
+        if self.errors:
+            raise EnvMgrError(f"failed: {', '.join(self.errors)}; skipped: {', '.join(n for n in self.tasks if self.status[n] == 'skipped') or 'none'}")
+        return self.results
+
+
 class DBPathMux(object):
 
     def __init__(self):
@@ -563,8 +662,9 @@ class EnvUtil(object):
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.cm = CatalogManager(config.catalog_root)
+        self.cm = get_catalog(config.catalog_root)
         self.mux = DBPathMux()
+        self.report_lock = threading.Lock()
 
     def env_elements(self):
         for cloud, contents in self.cm.get_environment(config.env_name):
@@ -574,11 +674,34 @@ class EnvUtil(object):
                 key = element.name.lower()
                 yield self.mux(cloud, key, contents[key])
 
+    @staticmethod
+    def remove_depends(element: DatastoreTuple, elements: list[DatastoreTuple]) -> list[str]:
+        if element.mode == PathType.NETWORK:
+            return [e.path for e in elements if e.mode not in (PathType.NETWORK, PathType.CONFIG)]
+        elif element.mode == PathType.CONFIG:
+            return [e.path for e in elements if e.mode != PathType.CONFIG]
+        return []
+
+    def report(self, message: str) -> None:
+        with self.report_lock:
+            print(message)
+
+    def remove_element(self, element: DatastoreTuple) -> None:
+        self.report(f"Removing {element.cloud} components for {element.mode.name.lower()}")
+        element.quiet = True
+        element.validate()
+        element.remove()
+        self.cm.recursive_remove(element.path)
+        self.report(f"Removed {element.cloud} components for {element.mode.name.lower()}")
+
     def env_remove(self):
         if Inquire().ask_yn(f"Remove entire environment {config.env_name}", default=False):
-            for element in self.env_elements():
-                print(f"Removing {element.cloud} components for {element.mode.name.lower()}")
-                element.validate()
-                element.remove()
-                self.cm.recursive_remove(element.path)
+            elements = list(self.env_elements())
+            graph = TaskGraph()
+            for element in elements:
+                graph.add(element.path, functools.partial(self.remove_element, element), self.remove_depends(element, elements))
+            graph.run()
+            for cloud in sorted(set(e.cloud for e in elements)):
+                if cloud in NetworkLedger.CLOUDS:
+                    NetworkLedger.from_cloud(cloud).release(config.env_name)
             self.cm.remove_environment(config.env_name)
@@ -0,0 +1,119 @@
+##
+##
+
+import logging
+import os
+import fcntl
+import json
+import tempfile
+import threading
+from typing import Union
+
+
+class FileLock(object):
+    SHARED = fcntl.LOCK_SH
+    EXCLUSIVE = fcntl.LOCK_EX
+
+    def __init__(self, filename: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.lock_file = f"{filename}.lck"
+        self.file_handle = None
+        self.mode = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def acquire(self, mode: int = EXCLUSIVE) -> None:
+        self.thread_lock.acquire()
+        if self.depth > 0:
+            if mode == FileLock.EXCLUSIVE and self.mode == FileLock.SHARED:
+                # flock drops the shared lock before granting the exclusive one, so anything read under it may be stale
+                self.thread_lock.release()
+                raise RuntimeError(f"can not upgrade shared lock {self.lock_file} to exclusive")
+            self.depth += 1
+            return
+        try:
+            self.file_handle = open(self.lock_file, 'a')
+            fcntl.flock(self.file_handle, mode)
+        except Exception:
+            if self.file_handle:
+                self.file_handle.close()
+                self.file_handle = None
+            self.thread_lock.release()
+            raise
+        self.mode = mode
+        self.depth = 1
+
+    def release(self) -> None:
+        if self.depth == 0:
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            fcntl.flock(self.file_handle, fcntl.LOCK_UN)
+            self.file_handle.close()
+            self.file_handle = None
+            self.mode = None
+        self.thread_lock.release()
+
+    def shared(self):
+        return _LockContext(self, FileLock.SHARED)
+
+    def exclusive(self):
+        return _LockContext(self, FileLock.EXCLUSIVE)
+
+
+class _LockContext(object):
+
+    def __init__(self, lock: FileLock, mode: int):
+        self.lock = lock
+        self.mode = mode
+
+    def __enter__(self):
+        self.lock.acquire(self.mode)
+        return self.lock
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.lock.release()
+
+
+def atomic_write(filename: str, data: Union[dict, list], backup: Union[str, None] = None) -> None:
+    directory = os.path.dirname(os.path.abspath(filename))
+    file_handle, temp_name = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix='.tmp')
+    try:
+        with os.fdopen(file_handle, 'w') as temp_file:
+            json.dump(data, temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        if backup and os.path.exists(filename):
+            journal(filename, backup)
+        os.replace(temp_name, filename)
+    except Exception:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    sync_directory(directory)
+
+
+def journal(filename: str, backup: str) -> None:
+    # os.replace gives the new contents a new inode, so a hard link keeps the previous version without a copy
+    temp_link = f"{backup}.tmp"
+    if os.path.lexists(temp_link):
+        os.remove(temp_link)
+    try:
+        os.link(filename, temp_link)
+    except OSError:
+        with open(filename, 'rb') as source, open(temp_link, 'wb') as destination:
+            destination.write(source.read())
+    os.replace(temp_link, backup)
+
+
+def sync_directory(directory: str) -> None:
+    try:
+        dir_handle = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_handle)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_handle)
@@ -3,6 +3,7 @@
 
 import logging
 import os
+import json
 from shutil import copyfile
 from enum import Enum
 from typing import Union
@@ -12,6 +13,8 @@ from cryptography.hazmat.primitives import serialization
 import hashlib
 from cryptography.exceptions import UnsupportedAlgorithm
 from lib.exceptions import EmptyResultSet, FileManagerError
+from lib.util.cachemgr import MetadataCache
+from lib.util.filelock import atomic_write
 import lib.config as config
 
 HOME_DIRECTORY = os.path.expanduser('~')
@@ -30,6 +33,176 @@ class SSHExtensions(Enum):
     KEY = ".key"
 
 
+class SSHKeyIndex(object):
+    INDEX_FILE = "ssh-key-index.json"
+    MAX_KEY_SIZE = 65536
+
+    def __init__(self, locations: Union[list[str], None] = None, index_file: Union[str, None] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.locations = locations if locations else SSH_PATHS
+        if index_file:
+            self.index_file = index_file
+        else:
+            self.index_file = os.path.join(config.catalog_root, MetadataCache.CACHE_DIR, SSHKeyIndex.INDEX_FILE)
+        self.entries = {}
+        self.fingerprints = {}
+        self.public_keys = {}
+        self.refresh()
+
+    def load(self) -> dict:
+        if config.cache_refresh:
+            return {}
+        try:
+            with open(self.index_file, 'r') as index_file:
+                entries = json.load(index_file)
+            return entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as err:
+            self.logger.debug(f"ignoring unreadable key index {self.index_file}: {err}")
+            return {}
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            atomic_write(self.index_file, self.entries)
+        except OSError as err:
+            self.logger.debug(f"can not write key index {self.index_file}: {err}")
+
+    def refresh(self) -> None:
+        stored = self.load()
+        entries = {}
+        changed = False
+
+        for location in self.locations:
+            try:
+                contents = list(os.scandir(location))
+            except OSError:
+                continue
+            for item in contents:
+                try:
+                    if not item.is_file():
+                        continue
+                    stat = item.stat()
+                except OSError:
+                    continue
+                if not os.access(item.path, os.R_OK):
+                    continue
+                signature = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+                entry = stored.get(item.path)
+                if not entry or entry.get('signature') != signature:
+                    entry = self.inspect(item.path, signature)
+                    changed = True
+                entries[item.path] = entry
+
+        self.entries = entries
+        if changed or len(entries) != len(stored):
+            self.save()
+
+        self.fingerprints = {}
+        self.public_keys = {}
+        for path, entry in self.entries.items():
+            if entry['private']:
+                self.fingerprints.setdefault(entry['private']['fingerprint'], path)
+                self.fingerprints.setdefault(entry['private']['pub_fingerprint'], path)
+            if entry['public']:
+                self.public_keys.setdefault(entry['public'], path)
+
+    def inspect(self, path: str, signature: list[int]) -> dict:
+        entry = {"signature": signature, "private": None, "public": None}
+        if signature[1] > SSHKeyIndex.MAX_KEY_SIZE:
+            return entry
+        try:
+            with open(path, 'rb') as key_file:
+                blob = key_file.read()
+        except OSError:
+            return entry
+        if self.private_key_candidate(path):
+            entry['private'] = self.private_key_data(blob)
+        entry['public'] = self.public_key_data(blob)
+        return entry
+
+    @staticmethod
+    def private_key_candidate(path: str) -> bool:
+        file_ext = os.path.splitext(os.path.basename(path))
+        if file_ext[0] == "id_rsa":
+            return True
+        return next((e for e in SSHExtensions if e.value == file_ext[1]), None) is not None
+
+    @staticmethod
+    def colon_hex(digest: str) -> str:
+        return ':'.join(digest[i:i + 2] for i in range(0, len(digest), 2))
+
+    @staticmethod
+    def private_key_data(blob: bytes) -> Union[dict, None]:
+        try:
+            key = serialization.load_pem_private_key(
+                blob, password=None, backend=default_backend()
+            )
+        except (ValueError, TypeError, UnsupportedAlgorithm):
+            return None
+
+        pri_der = key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        pub_der = key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        try:
+            public_key = key.public_key().public_bytes(
+                serialization.Encoding.OpenSSH,
+                serialization.PublicFormat.OpenSSH
+            ).decode('utf-8')
+        except ValueError:
+            public_key = None
+
+        return {
+            "fingerprint": SSHKeyIndex.colon_hex(hashlib.sha1(pri_der).hexdigest()),
+            "pub_fingerprint": SSHKeyIndex.colon_hex(hashlib.md5(pub_der).hexdigest()),
+            "public_key": public_key
+        }
+
+    @staticmethod
+    def public_key_data(blob: bytes) -> Union[str, None]:
+        try:
+            lines = blob.decode('utf-8').split('\n')
+        except UnicodeDecodeError:
+            return None
+        if len(lines) > 2 or (len(lines) == 2 and lines[1]):
+            return None
+        public_key = lines[0].rstrip()
+        key_parts = public_key.split(' ')
+        try:
+            serialization.load_ssh_public_key(str.encode(' '.join(key_parts[0:2])))
+        except (ValueError, UnsupportedAlgorithm):
+            return None
+        return public_key
+
+    def private_keys(self) -> list[dict]:
+        return [
+            {
+                "file": path,
+                "fingerprint": entry['private']['fingerprint'],
+                "pub_fingerprint": entry['private']['pub_fingerprint']
+            } for path, entry in self.entries.items() if entry['private']
+        ]
+
+    def by_fingerprint(self, fingerprint: str) -> Union[str, None]:
+        return self.fingerprints.get(fingerprint)
+
+    def public_key(self, key_file: str) -> Union[str, None]:
+        entry = self.entries.get(key_file)
+        if entry and entry['private']:
+            return entry['private']['public_key']
+        return None
+
+    def public_key_file(self, public_key: str) -> Union[str, None]:
+        return self.public_keys.get(public_key)
+
+
 class FileManager(object):
 
     def __init__(self):
@@ -45,54 +218,7 @@ class FileManager(object):
 
     @staticmethod
     def list_private_key_files() -> Union[list[dict], None]:
-        dir_list = []
-        key_file_list = []
-
-        for location in SSH_PATHS:
-            for file_name in os.listdir(location):
-                full_path = location + '/' + file_name
-                dir_list.append(full_path)
-
-        for i in range(len(dir_list)):
-            if not os.path.isfile(dir_list[i]) or not os.access(dir_list[i], os.R_OK):
-                continue
-
-            file_ext = os.path.splitext(dir_list[i])
-            if file_ext[0] != "id_rsa":
-                if not next((e for e in SSHExtensions if e.value == file_ext[1]), None):
-                    continue
-
-            file_handle = open(dir_list[i], 'r')
-            blob = file_handle.read()
-            pem_key_bytes = str.encode(blob)
-
-            try:
-                key = serialization.load_pem_private_key(
-                    pem_key_bytes, password=None, backend=default_backend()
-                )
-            except (ValueError, TypeError, UnsupportedAlgorithm):
-                continue
-
-            key_entry = {"file": dir_list[i]}
-            pri_der = key.private_bytes(
-                encoding=serialization.Encoding.DER,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption(),
-            )
-            der_digest = hashlib.sha1(pri_der)
-            hex_digest = der_digest.hexdigest()
-            key_fingerprint = ':'.join(hex_digest[i:i + 2] for i in range(0, len(hex_digest), 2))
-            key_entry.update({"fingerprint": key_fingerprint})
-            pub_der = key.public_key().public_bytes(
-                serialization.Encoding.DER,
-                serialization.PublicFormat.SubjectPublicKeyInfo
-            )
-            pub_der_digest = hashlib.md5(pub_der)
-            pub_hex_digest = pub_der_digest.hexdigest()
-            pub_key_fingerprint = ':'.join(pub_hex_digest[i:i + 2] for i in range(0, len(pub_hex_digest), 2))
-            key_entry.update({"pub_fingerprint": pub_key_fingerprint})
-
-            key_file_list.append(key_entry)
+        key_file_list = SSHKeyIndex().private_keys()
 
         if len(key_file_list) == 0:
             raise EmptyResultSet("No SSH keys found. Please make sure you have at least one SSH key configured.")
@@ -100,19 +226,14 @@ class FileManager(object):
         return key_file_list
 
     def get_key_by_fingerprint(self, fingerprint: str):
-        key_list = self.list_private_key_files()
-        for key in key_list:
-            if key['fingerprint'] == fingerprint or key['pub_fingerprint'] == fingerprint:
-                return key['file']
-        return None
+        return SSHKeyIndex().by_fingerprint(fingerprint)
 
     @staticmethod
     def get_ssh_public_key(key_file: str) -> str:
         if not os.path.isabs(key_file):
             key_file = FileManager.ssh_key_absolute_path(key_file)
-        fh = open(key_file, 'r')
-        key_pem = fh.read()
-        fh.close()
+        with open(key_file, 'r') as fh:
+            key_pem = fh.read()
         rsa_key = RSA.importKey(key_pem)
         modulus = rsa_key.n
         pub_exp_e = rsa_key.e
@@ -137,40 +258,15 @@ class FileManager(object):
 
     @staticmethod
     def get_ssh_public_key_file(key_file: str) -> str:
-        dir_list = []
-
         if not os.path.isabs(key_file):
             key_file = FileManager.ssh_key_absolute_path(key_file)
 
-        gen_public_key = FileManager.get_ssh_public_key(key_file)
-
-        for location in SSH_PATHS:
-            for file_name in os.listdir(location):
-                full_path = location + '/' + file_name
-                dir_list.append(full_path)
+        key_index = SSHKeyIndex()
+        gen_public_key = key_index.public_key(key_file) or FileManager.get_ssh_public_key(key_file)
 
-        for i in range(len(dir_list)):
-            if not os.path.isfile(dir_list[i]) or not os.access(dir_list[i], os.R_OK):
-                continue
-            file_handle = open(dir_list[i], 'r')
-            try:
-                public_key = file_handle.readline()
-            except (UnicodeDecodeError, IOError):
-                continue
-            file_size = os.fstat(file_handle.fileno()).st_size
-            read_size = len(public_key)
-            if file_size != read_size:
-                continue
-            public_key = public_key.rstrip()
-            key_parts = public_key.split(' ')
-            pub_key_part = ' '.join(key_parts[0:2])
-            pub_key_bytes = str.encode(pub_key_part)
-            try:
-                serialization.load_ssh_public_key(pub_key_bytes)
-            except (ValueError, UnsupportedAlgorithm):
-                continue
-            if gen_public_key == public_key:
-                return dir_list[i]
+        public_key_file = key_index.public_key_file(gen_public_key)
+        if public_key_file:
+            return public_key_file
 
         private_key_dir = os.path.dirname(key_file)
         private_key_file = os.path.basename(key_file)
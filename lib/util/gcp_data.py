@@ -86,7 +86,7 @@ class DataCollect(object):
         self.use_public_ip = Inquire().ask_bool("Assign a public IP")
 
         try:
-            network_list = config.cloud_network().list()
+            network_list = config.cloud_network().list(filter_name=f"{config.env_name}-vpc")
         except EmptyResultSet:
             pass
 
@@ -124,14 +124,15 @@ class DataCollect(object):
             subnet_record.update({"zone": zone})
             self.subnet_list.append(subnet_record)
 
-        self.env_cfg.update(gcp_region=self.region)
-        self.env_cfg.update(gcp_project=self.gcp_project)
-        self.env_cfg.update(gcp_account_email=self.gcp_account_email)
-        self.env_cfg.update(gcp_account_file=self.gcp_account_file)
-        self.env_cfg.update(gcp_network=self.network)
-        self.env_cfg.update(gcp_subnet_list=self.subnet_list)
-        self.env_cfg.update(net_use_public_ip=self.use_public_ip)
-        self.env_cfg.update(gcp_base_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(gcp_region=self.region)
+            self.env_cfg.update(gcp_project=self.gcp_project)
+            self.env_cfg.update(gcp_account_email=self.gcp_account_email)
+            self.env_cfg.update(gcp_account_file=self.gcp_account_file)
+            self.env_cfg.update(gcp_network=self.network)
+            self.env_cfg.update(gcp_subnet_list=self.subnet_list)
+            self.env_cfg.update(net_use_public_ip=self.use_public_ip)
+            self.env_cfg.update(gcp_base_in_progress=False)
 
     def get_image(self, node_type: str = None):
         in_progress = self.env_cfg.get("gcp_image_in_progress")
@@ -163,7 +164,7 @@ class DataCollect(object):
             image_list = config.cloud_image().list(project=image_type["project"])
             self.gcp_image_project = image_type["project"]
         else:
-            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"])
+            image_list = config.cloud_image().list(filter_keys_exist=["release_tag", "type_tag", "version_tag"], filter_labels={"release": None, "type": None, "version": None})
             self.gcp_image_project = self.env_cfg.get("gcp_image_project")
 
         image = Inquire().ask_list_dict(f"Select {config.cloud} image", image_list, sort_key="date", hide_key=["link"], reverse_sort=True)
@@ -184,13 +185,14 @@ class DataCollect(object):
             self.generic_image_user = self.env_cfg.get("ssh_generic_user_name")
             self.image_user = distro_table.user
 
-        self.env_cfg.update(ssh_user_name=self.image_user)
-        self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
-        self.env_cfg.update(gcp_image=self.image)
-        self.env_cfg.update(gcp_image_project=self.gcp_image_project)
-        self.env_cfg.update(gcp_generic_image=self.generic_image)
-        self.env_cfg.update(cbs_version=self.image_version)
-        self.env_cfg.update(gcp_image_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_user_name=self.image_user)
+            self.env_cfg.update(ssh_generic_user_name=self.generic_image_user)
+            self.env_cfg.update(gcp_image=self.image)
+            self.env_cfg.update(gcp_image_project=self.gcp_image_project)
+            self.env_cfg.update(gcp_generic_image=self.generic_image)
+            self.env_cfg.update(cbs_version=self.image_version)
+            self.env_cfg.update(gcp_image_in_progress=False)
 
     def get_keys(self):
         in_progress = self.env_cfg.get("ssh_in_progress")
@@ -221,10 +223,11 @@ class DataCollect(object):
 
         self.public_key = FileManager().get_ssh_public_key_file(self.private_key)
 
-        self.env_cfg.update(ssh_private_key=self.private_key)
-        self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
-        self.env_cfg.update(ssh_public_key=self.public_key)
-        self.env_cfg.update(ssh_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_private_key=self.private_key)
+            self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
+            self.env_cfg.update(ssh_public_key=self.public_key)
+            self.env_cfg.update(ssh_in_progress=False)
 
     def get_cluster_settings(self, node_type: str = None):
         if node_type != "cluster":
@@ -289,7 +292,8 @@ class DataCollect(object):
         self.disk_type = selection['type']
         self.disk_size = Inquire().ask_int("Volume size", 250, 100)
 
-        self.env_cfg.update(gcp_machine_type=self.instance_type)
-        self.env_cfg.update(gcp_root_type=self.disk_type)
-        self.env_cfg.update(gcp_root_size=self.disk_size)
-        self.env_cfg.update(gcp_node_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(gcp_machine_type=self.instance_type)
+            self.env_cfg.update(gcp_root_type=self.disk_type)
+            self.env_cfg.update(gcp_root_size=self.disk_size)
+            self.env_cfg.update(gcp_node_in_progress=False)
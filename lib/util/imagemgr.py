@@ -0,0 +1,227 @@
+##
+##
+
+import logging
+import re
+import json
+import time
+import hashlib
+import itertools
+import functools
+import urllib.request
+import attr
+from attr.validators import instance_of as io
+from typing import Union
+import lib.config as config
+from lib.exceptions import ImageMgmtError
+from lib.util.envmgr import TaskGraph, ConfigFile
+from lib.util.inquire import Inquire
+from lib.util.cachemgr import MetadataCache
+from lib.invoke import packer_run
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class ImageTarget(object):
+    cloud = attr.ib(validator=io(str))
+    os = attr.ib(validator=io(str))
+    os_release = attr.ib(validator=io(str))
+    cb_version = attr.ib(validator=io(str))
+    build_key = attr.ib(validator=attr.validators.optional(io(str)), default=None)
+
+    @classmethod
+    def build(cls, cloud: str, os_name: str, os_release: str, cb_version: str = "latest"):
+        return cls(
+            cloud,
+            os_name,
+            os_release,
+            cb_version
+            )
+
+    @property
+    def name(self) -> str:
+        return f"{self.cloud}-{self.os}-{self.os_release}-{self.cb_version}"
+
+    @property
+    def variant(self) -> str:
+        return re.sub(r'[^a-z0-9]+', '-', f"{self.os}-{self.os_release}-{self.cb_version}".lower())
+
+
+class ImageBuildKey(object):
+    LENGTH = 32
+    REVISION_URL = "https://api.github.com/repos/{repo}/commits/main"
+    REVISION_TIMEOUT = 5
+    FAILURE_TTL = 300
+    UNKNOWN_REVISION = "unknown"
+
+    @staticmethod
+    def compute(distro_record, cb_version: str, host_prep_repo: str, template: list[dict]) -> str:
+        contents = {
+            "distro": attr.asdict(distro_record),
+            "cb_version": cb_version,
+            "host_prep": ImageBuildKey.host_prep_revision(host_prep_repo),
+            "template": hashlib.sha256(json.dumps(template, sort_keys=True).encode()).hexdigest(),
+        }
+        return hashlib.sha256(json.dumps(contents, sort_keys=True).encode()).hexdigest()[:ImageBuildKey.LENGTH]
+
+    @staticmethod
+    def host_prep_revision(repo: str) -> str:
+        cache = MetadataCache()
+        last_path = cache.entry_path('host_prep_last_revision', (repo,))
+        failed_path = cache.entry_path('host_prep_lookup_failed', (repo,))
+        last = cache.read(last_path)
+
+        failed = cache.read(failed_path)
+        if not failed or time.time() - failed.get('created', 0) >= ImageBuildKey.FAILURE_TTL:
+            try:
+                revision = cache.get('host_prep_revision', (repo,), lambda: ImageBuildKey.get_revision(repo))
+                if not last or last.get('data') != revision:
+                    cache.write(last_path, 'host_prep_last_revision', revision)
+                return revision
+            except Exception as err:
+                logger.warning(f"can not get {repo} revision: {err}")
+                cache.write(failed_path, 'host_prep_lookup_failed', str(err))
+
+        if last and last.get('data'):
+            logger.debug(f"using last known {repo} revision {last['data']}")
+            return last['data']
+        logger.warning(f"image build key computed from an unknown {repo} revision, existing images may not be reused")
+        return ImageBuildKey.UNKNOWN_REVISION
+
+    @staticmethod
+    def get_revision(repo: str) -> str:
+        request = urllib.request.Request(ImageBuildKey.REVISION_URL.format(repo=repo), headers={"Accept": "application/vnd.github.sha"})
+        with urllib.request.urlopen(request, timeout=ImageBuildKey.REVISION_TIMEOUT) as response:
+            return response.read().decode("utf-8").strip()
+
+
+class ImageMatrix(object):
+    KEYS = ["cloud", "os", "os_release", "cb_version"]
+
+    def __init__(self, targets: list[ImageTarget]):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not targets:
+            raise ImageMgmtError("image matrix has no targets")
+        self.targets = targets
+        self.builds = {}
+        self.durations = {}
+        self.images = {}
+        self.status = {}
+        self.reused = set()
+
+    @classmethod
+    def from_file(cls, filename: str):
+        try:
+            with open(filename, 'r') as matrix_file:
+                entries = json.load(matrix_file)
+        except Exception as err:
+            raise ImageMgmtError(f"can not read image matrix {filename}: {err}")
+        if isinstance(entries, dict):
+            entries = [entries]
+        if not isinstance(entries, list):
+            raise ImageMgmtError(f"image matrix {filename} must be a list of targets")
+        targets = []
+        for entry in entries:
+            for target in cls.expand(entry):
+                if target.name not in [t.name for t in targets]:
+                    targets.append(target)
+        return cls(targets)
+
+    @staticmethod
+    def expand(entry: dict) -> list[ImageTarget]:
+        if not isinstance(entry, dict) or not all(entry.get(k) for k in ImageMatrix.KEYS[:3]):
+            raise ImageMgmtError(f"image target {entry} requires {', '.join(ImageMatrix.KEYS[:3])}")
+        values = []
+        for key in ImageMatrix.KEYS:
+            value = entry.get(key, "latest")
+            values.append([str(v) for v in value] if isinstance(value, list) else [str(value)])
+        return [ImageTarget.build(*combination) for combination in itertools.product(*values)]
+
+    @staticmethod
+    def check(target: ImageTarget, build_config: dict) -> None:
+        if target.os not in build_config:
+            raise ImageMgmtError(f"{target.name}: unknown OS {target.os}, available: {', '.join(build_config.keys())}")
+        releases = [v.get('version') for v in build_config[target.os]]
+        if target.os_release not in releases:
+            raise ImageMgmtError(f"{target.name}: unknown {target.os} release {target.os_release}, available: {', '.join(releases)}")
+
+    @staticmethod
+    def resolve(target: ImageTarget) -> None:
+        from lib.drivers.cbrelease import CBRelease
+        release_list = CBRelease().get_cb_version(target.os, target.os_release)
+        if target.cb_version == "latest":
+            if not release_list:
+                raise ImageMgmtError(f"{target.name}: no CBS releases available")
+            target.cb_version = release_list[0]
+        elif target.cb_version not in release_list:
+            raise ImageMgmtError(f"{target.name}: CBS release {target.cb_version} is not available for {target.os} {target.os_release}")
+
+    def generate(self) -> None:
+        unique = set()
+        for cloud, targets in itertools.groupby(sorted(self.targets, key=lambda t: t.cloud), key=lambda t: t.cloud):
+            config.cloud = cloud
+            config.env_name = cloud
+            config.enable_cloud(cloud)
+            driver = config.cloud_operator()
+            for target in targets:
+                self.check(target, driver.config.build)
+                self.resolve(target)
+                if target.name in self.builds:
+                    print(f"Skipping duplicate target {target.name}")
+                    continue
+                unique.add(id(target))
+                self.logger.debug(f"generating image build {target.name}")
+                self.builds[target.name] = driver.image_config(target, variant=target.variant)
+                image = None if config.image_rebuild else driver.find_image(target)
+                if image:
+                    print(f"Reusing image {image['name']} for {target.name}")
+                    self.images[target.name] = [image['name']]
+                    self.reused.add(target.name)
+        self.targets = [target for target in self.targets if id(target) in unique]
+
+    def build(self, target: ImageTarget) -> list[str]:
+        cfg_file: ConfigFile
+        cfg_file = self.builds[target.name]
+        print(f"Building {target.name} image")
+        start_time = time.perf_counter()
+        try:
+            pr = packer_run(working_dir=cfg_file.file_path)
+            pr.init(cfg_file.file_name, quiet=True)
+            self.images[target.name] = pr.build_gen(cfg_file.file_name, quiet=True)
+        finally:
+            self.durations[target.name] = time.perf_counter() - start_time
+        print(f"Image {target.name} complete: {', '.join(self.images[target.name]) or 'no artifact'}")
+        return self.images[target.name]
+
+    def run(self, max_workers: Union[int, None] = None) -> None:
+        self.generate()
+        graph = TaskGraph(max_workers=max_workers)
+        for target in self.targets:
+            if target.name not in self.reused:
+                graph.add(target.name, functools.partial(self.build, target))
+        print(f"Building {len(graph.tasks)} image(s) with {graph.max_workers} worker(s), logs in each image build directory")
+        try:
+            graph.run()
+        finally:
+            self.status = dict(graph.status, **{name: 'reused' for name in self.reused})
+            self.print_summary()
+
+    def summary(self) -> list[dict]:
+        rows = []
+        for target in self.targets:
+            duration = self.durations.get(target.name)
+            cfg_file = self.builds.get(target.name)
+            rows.append({
+                "target": target.name,
+                "status": self.status.get(target.name, "pending"),
+                "duration": time.strftime("%H:%M:%S", time.gmtime(duration)) if duration is not None else "-",
+                "image": ', '.join(self.images.get(target.name, [])) or "-",
+                "log": f"{cfg_file.file_path}/build.log" if cfg_file else "-",
+            })
+        return rows
+
+    def print_summary(self) -> None:
+        rows = self.summary()
+        print("")
+        Inquire().list_dict("Image build summary", rows, page_length=len(rows))
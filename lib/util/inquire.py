@@ -12,6 +12,53 @@ from typing import Union, Iterable
 from distutils.util import strtobool
 
 
+class TableModel(object):
+    LAZY_ROWS = 10000
+
+    def __init__(self, rows: list[dict], hide_key: Union[list[str], None] = None, lazy: Union[bool, None] = None):
+        self.rows = rows
+        hidden = set(hide_key) if hide_key else set()
+        self.header = [key for key in max(rows, key=len).keys() if key not in hidden] if rows else []
+        self.lazy = lazy if lazy is not None else len(rows) > TableModel.LAZY_ROWS
+        self._widths = None
+
+    def column_widths(self, rows: list[dict]) -> tuple[int]:
+        return tuple(max(len(key), max(map(len, map(str, (row.get(key, "") for row in rows))), default=0)) for key in self.header)
+
+    @property
+    def widths(self) -> tuple[int]:
+        if self._widths is None:
+            self._widths = self.column_widths(self.rows)
+        return self._widths
+
+    def page_count(self, page_length: int) -> int:
+        return -(-len(self.rows) // page_length)
+
+    def page(self, number: int, page_length: int) -> list[dict]:
+        return self.rows[number * page_length:(number + 1) * page_length]
+
+    def page_widths(self, number: int, page_length: int) -> tuple[int]:
+        if self.lazy:
+            return self.column_widths(self.page(number, page_length))
+        return self.widths
+
+    def render_header(self, widths: tuple[int], pad: int = 5) -> list[str]:
+        return [
+            "#".ljust(pad + 2) + "".join(f"{key.capitalize().ljust(widths[n])} " for n, key in enumerate(self.header)),
+            "-" * (pad + 1) + " " + "".join(f"{'-' * width} " for width in widths)
+        ]
+
+    def render_row(self, widths: tuple[int], row: dict, item: int, pad: int = 5) -> str:
+        return f"{str(item).rjust(pad)}) " + "".join(f"{str(row.get(key, '')).ljust(widths[n])} " for n, key in enumerate(self.header))
+
+    def print_page(self, number: int, page_length: int, pad: int = 5) -> None:
+        widths = self.page_widths(number, page_length)
+        lines = self.render_header(widths, pad=pad)
+        for n, row in enumerate(self.page(number, page_length)):
+            lines.append(self.render_row(widths, row, number * page_length + n + 1, pad=pad))
+        print("\n".join(lines))
+
+
 class Inquire(object):
     type_list = 0
     type_dict = 1
@@ -24,88 +71,6 @@ class Inquire(object):
         for i in range(0, len(array), n):
             yield array[i:i + n]
 
-    @staticmethod
-    def create_header_vector(table: list[dict], hide_key: Union[list[str], None] = None) -> list[str]:
-        header = []
-        max_len = 0
-        for row in table:
-            if hide_key:
-                for del_key in hide_key:
-                    row.pop(del_key, None)
-            row_len = len(row)
-            if row_len <= max_len > 0:
-                continue
-            max_len = row_len
-            header.clear()
-            for key in row.keys():
-                header.append(key)
-        return header
-
-    @staticmethod
-    def max_row_length(table: list[dict], hide_key: Union[list[str], None] = None) -> int:
-        row_max = 0
-        for row in table:
-            if hide_key:
-                for del_key in hide_key:
-                    row.pop(del_key, None)
-            if len(row) > row_max:
-                row_max = len(row)
-        return row_max
-
-    def field_lengths(self, table: list[dict], hide_key: Union[list[str], None] = None) -> tuple[int]:
-        vector = []
-        row_len = self.max_row_length(table, hide_key=hide_key)
-        for item in table:
-            if hide_key:
-                for del_key in hide_key:
-                    item.pop(del_key, None)
-            columns = ()
-            for n, key in enumerate(item.keys()):
-                lk = len(key)
-                if item[key] is None:
-                    lv = 0
-                else:
-                    lv = len(str(item[key]))
-                lt = lk if lk > lv else lv
-                columns = columns + (lt,)
-            this_row_len = len(columns)
-            if this_row_len < row_len:
-                for i in range(row_len - this_row_len):
-                    columns = columns + (0,)
-            vector.append(columns)
-
-        final = ()
-        for x in range(row_len):
-            max_value = max(vector, key=lambda t: t[x])
-            final = final + (max_value[x],)
-
-        return final
-
-    @staticmethod
-    def print_header(t: tuple, headers: list, pad: int = 5) -> None:
-        print("#".ljust(pad+2), end='')
-        for n, key in enumerate(headers):
-            print(key.capitalize().ljust(t[n]), end='')
-            print(" ", end='')
-        print("")
-        print("-" * (pad+1), end='')
-        print(" ", end='')
-        for n, value in enumerate(t):
-            print("-" * value, end='')
-            print(" ", end='')
-        print("")
-
-    @staticmethod
-    def print_line(t: tuple, row: dict, item: int, pad: int = 5, hide_key: Union[list[str], None] = None) -> None:
-        if hide_key:
-            for del_key in hide_key:
-                row.pop(del_key, None)
-        print(f"{str(item).rjust(pad)}) ", end='')
-        for n, key in enumerate(row.keys()):
-            print(str(row[key]).ljust(t[n]), end='')
-            print(" ", end='')
-        print("")
-
     def get_option_struct_type(self, options):
         if options:
             if len(options) > 0:
@@ -180,8 +145,6 @@ class Inquire(object):
         default_index = None
         default_option_text = ""
 
-        table_header = self.create_header_vector(options, hide_key=hide_key)
-
         if sort_key:
             options = sorted(options, key=lambda i: i[sort_key] if i[sort_key] else "", reverse=reverse_sort)
 
@@ -192,22 +155,18 @@ class Inquire(object):
 
         print("%s:" % question)
 
-        divided_list = list(self.divide_list(options, page_length))
-        field_length = self.field_lengths(options, hide_key=hide_key)
+        table = TableModel(options, hide_key=hide_key)
+        page_count = table.page_count(page_length)
         while True:
             last_group = False
             answer = ''
-            for count, sub_list in enumerate(divided_list):
-                page_incr = count * page_length
-                self.print_header(field_length, table_header)
-                for n, item in enumerate(sub_list):
-                    item_number = n + 1 + page_incr
-                    self.print_line(field_length, item, item_number, hide_key=hide_key)
+            for count in range(page_count):
+                table.print_page(count, page_length)
 
                 if default_index:
                     default_option_text = f", enter={default_value[0]} => {default_value[1]}"
 
-                if count == len(divided_list) - 1:
+                if count == page_count - 1:
                     answer = input(f"Selection [q=quit{default_option_text}]: ")
                     last_group = True
                 else:
@@ -240,24 +199,18 @@ class Inquire(object):
                   sort_key: Union[str, None] = None,
                   hide_key: Union[list[str], None] = None,
                   page_length: int = 20) -> None:
-        table_header = self.create_header_vector(items, hide_key=hide_key)
         if sort_key:
             items = sorted(items, key=lambda i: i[sort_key] if i[sort_key] else "")
 
         print("%s:" % description)
 
-        divided_list = list(self.divide_list(items, page_length))
-        field_length = self.field_lengths(items, hide_key=hide_key)
-
-        for count, sub_list in enumerate(divided_list):
-            page_incr = count * page_length
-            self.print_header(field_length, table_header)
+        table = TableModel(items, hide_key=hide_key)
+        page_count = table.page_count(page_length)
 
-            for n, item in enumerate(sub_list):
-                item_number = n + 1 + page_incr
-                self.print_line(field_length, item, item_number, hide_key=hide_key)
+        for count in range(page_count):
+            table.print_page(count, page_length)
 
-            if count != len(divided_list) - 1:
+            if count != page_count - 1:
                 print("Press any key to continue...", end='\r', flush=True)
                 answer = get_char()
                 sys.stdout.write("\033[K")
@@ -696,8 +649,7 @@ class Inquire(object):
                         options: list[dict],
                         key: str = "name",
                         hide_key: Union[list[str], None] = None):
-        table_header = self.create_header_vector(options, hide_key=hide_key)
-        field_length = self.field_lengths(options, hide_key=hide_key)
+        table = TableModel(options, hide_key=hide_key)
 
         print("%s:" % question)
 
@@ -714,10 +666,11 @@ class Inquire(object):
             if len(sub_options) == 0:
                 print("Search term not found.")
                 continue
-            self.print_header(field_length, table_header)
+            widths = table.widths
+            print("\n".join(table.render_header(widths)))
             while True:
                 for count, item in enumerate(sub_options):
-                    self.print_line(field_length, item, count + 1, hide_key=hide_key)
+                    print(table.render_row(widths, item, count + 1))
                 answer = input("Selection [r=retry, q=quit]: ")
                 answer = answer.rstrip("\n")
                 if answer == "q":
@@ -3,11 +3,66 @@
 
 import logging
 import socket
+import threading
+import concurrent.futures
 import dns.resolver
+import dns.exception
 import ipaddress
+from typing import Union
 from lib.util.inquire import Inquire
 
 
+class BatchResolver(object):
+    PORT = 53
+    TIMEOUT = 5.0
+    MAX_WORKERS = 16
+    resolvers = {}
+    lock = threading.Lock()
+
+    def __init__(self, nameservers: Union[list[str], None] = None, port: Union[int, None] = None, timeout: float = TIMEOUT, max_workers: int = MAX_WORKERS):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_workers = max_workers
+        self.resolver = BatchResolver.shared(tuple(nameservers) if nameservers else (), port if port else BatchResolver.PORT, timeout)
+
+    @staticmethod
+    def shared(nameservers: tuple, port: int, timeout: float) -> dns.resolver.Resolver:
+        key = (nameservers, port, timeout)
+        with BatchResolver.lock:
+            if key not in BatchResolver.resolvers:
+                resolver = dns.resolver.Resolver(configure=not nameservers)
+                if nameservers:
+                    resolver.nameservers = list(nameservers)
+                resolver.port = port
+                resolver.timeout = timeout
+                resolver.lifetime = timeout
+                resolver.cache = dns.resolver.Cache()
+                BatchResolver.resolvers[key] = resolver
+            return BatchResolver.resolvers[key]
+
+    @staticmethod
+    def reset() -> None:
+        with BatchResolver.lock:
+            BatchResolver.resolvers.clear()
+
+    def resolve(self, name: str, rdtype: str = 'A') -> list[str]:
+        try:
+            answer = self.resolver.resolve(name, rdtype)
+            return [item.to_text() for item in answer]
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return []
+        except (dns.exception.Timeout, dns.resolver.NoNameservers) as err:
+            self.logger.debug(f"can not resolve {name}: {err}")
+            return []
+
+    def resolve_all(self, names: list[str], rdtype: str = 'A') -> dict[str, list[str]]:
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            results = executor.map(lambda name: self.resolve(name, rdtype), names)
+            return dict(zip(names, results))
+
+
 class NetworkUtil(object):
 
     def __init__(self):
@@ -33,15 +88,11 @@ class NetworkUtil(object):
     @staticmethod
     def get_dns_servers(domain_name: str, server: str = None):
         server_list = []
-        resolver = dns.resolver.Resolver()
-        if server:
-            resolver.nameservers = [server]
+        resolver = BatchResolver([server] if server else None)
         try:
-            ns_answer = resolver.resolve(domain_name, 'NS')
-            for server in ns_answer:
-                ip_answer = resolver.resolve(server.target, 'A')
-                for ip in ip_answer:
-                    server_list.append(ip.address)
+            ns_answer = resolver.resolver.resolve(domain_name, 'NS')
+            for addresses in resolver.resolve_all([item.target.to_text() for item in ns_answer]).values():
+                server_list.extend(addresses)
             return server_list
         except dns.resolver.NXDOMAIN:
             return None
@@ -61,24 +112,36 @@ class NetworkUtil(object):
         return self.gateway
 
     def get_static_ip(self, node_name: str, domain_name: str, dns_servers: list[str]):
-        resolver = dns.resolver.Resolver()
-        resolver.nameservers = dns_servers
+        return self.get_static_ips([node_name], domain_name, dns_servers)[node_name]
 
+    def get_static_ips(self, node_names: list[str], domain_name: str, dns_servers: list[str]) -> dict[str, str]:
         if not self.subnet:
             self.get_subnet_cidr()
             self.get_subnet_mask()
             self.get_subnet_gateway()
 
-        while True:
-            try:
-                node_fqdn = f"{node_name}.{domain_name}"
-                answer = resolver.resolve(node_fqdn, 'A')
-                node_ip_address = answer[0].to_text()
-                print(f"Node {node_name} resolved to {node_ip_address}")
-            except dns.resolver.NXDOMAIN:
-                node_ip_address = Inquire().ask_ip(f"Node {node_name} IP Address")
+        subnet = ipaddress.ip_network(self.subnet)
+        node_fqdn = {node_name: f"{node_name}.{domain_name}" for node_name in node_names}
+        answers = BatchResolver(dns_servers).resolve_all(list(node_fqdn.values()))
+        addresses = {}
 
-            if ipaddress.ip_address(node_ip_address) in ipaddress.ip_network(self.subnet):
-                return node_ip_address
+        for node_name in node_names:
+            answer = answers.get(node_fqdn[node_name])
+            if not answer:
+                continue
+            if ipaddress.ip_address(answer[0]) in subnet:
+                print(f"Node {node_name} resolved to {answer[0]}")
+                addresses[node_name] = answer[0]
             else:
-                print(f"IP address is not in subnet {self.subnet}")
+                print(f"Node {node_name} resolved to {answer[0]} which is not in subnet {self.subnet}")
+
+        for node_name in [n for n in node_names if n not in addresses]:
+            while True:
+                node_ip_address = Inquire().ask_ip(f"Node {node_name} IP Address")
+                if ipaddress.ip_address(node_ip_address) in subnet:
+                    addresses[node_name] = node_ip_address
+                    break
+                else:
+                    print(f"IP address is not in subnet {self.subnet}")
+
+        return addresses
@@ -114,18 +114,19 @@ class DataCollect(object):
                              'zone': host['name']}
             self.subnet_list.append(subnet_record)
 
-        self.env_cfg.update(vmware_hostname=self.vmware_hostname)
-        self.env_cfg.update(vmware_username=self.vmware_username)
-        self.env_cfg.update(vmware_password=self.vmware_password)
-        self.env_cfg.update(vmware_datacenter=self.vmware_datacenter)
-        self.env_cfg.update(vmware_cluster=self.vmware_cluster)
-        self.env_cfg.update(vmware_template_folder=self.vmware_template_folder)
-        self.env_cfg.update(vmware_cluster_folder=self.vmware_cluster_folder)
-        self.env_cfg.update(vmware_datastore=self.vmware_datastore)
-        self.env_cfg.update(vmware_dvs=self.vmware_dvs)
-        self.env_cfg.update(vmware_network=self.vmware_network)
-        self.env_cfg.update(vmware_subnet_list=self.subnet_list)
-        self.env_cfg.update(vmware_base_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(vmware_hostname=self.vmware_hostname)
+            self.env_cfg.update(vmware_username=self.vmware_username)
+            self.env_cfg.update(vmware_password=self.vmware_password)
+            self.env_cfg.update(vmware_datacenter=self.vmware_datacenter)
+            self.env_cfg.update(vmware_cluster=self.vmware_cluster)
+            self.env_cfg.update(vmware_template_folder=self.vmware_template_folder)
+            self.env_cfg.update(vmware_cluster_folder=self.vmware_cluster_folder)
+            self.env_cfg.update(vmware_datastore=self.vmware_datastore)
+            self.env_cfg.update(vmware_dvs=self.vmware_dvs)
+            self.env_cfg.update(vmware_network=self.vmware_network)
+            self.env_cfg.update(vmware_subnet_list=self.subnet_list)
+            self.env_cfg.update(vmware_base_in_progress=False)
 
     def get_build_password(self):
         print("")
@@ -147,9 +148,10 @@ class DataCollect(object):
         self.vmware_build_password = config.cloud_base().vmware_get_build_password()
         self.vmware_build_pwd_encrypted = config.cloud_base().vmware_get_build_pwd_encrypted(self.vmware_build_password)
 
-        self.env_cfg.update(vmware_build_password=self.vmware_build_password)
-        self.env_cfg.update(vmware_build_password_encrypted=self.vmware_build_pwd_encrypted)
-        self.env_cfg.update(vmware_password_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(vmware_build_password=self.vmware_build_password)
+            self.env_cfg.update(vmware_build_password_encrypted=self.vmware_build_pwd_encrypted)
+            self.env_cfg.update(vmware_password_in_progress=False)
 
     def get_keys(self):
         in_progress = self.env_cfg.get("ssh_in_progress")
@@ -183,11 +185,12 @@ class DataCollect(object):
         self.public_key = FileManager().get_ssh_public_key_file(self.private_key)
         self.public_key_data = FileManager().get_ssh_public_key(self.private_key)
 
-        self.env_cfg.update(ssh_private_key=self.private_key)
-        self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
-        self.env_cfg.update(ssh_public_key=self.public_key)
-        self.env_cfg.update(ssh_public_key_data=self.public_key_data)
-        self.env_cfg.update(ssh_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_private_key=self.private_key)
+            self.env_cfg.update(ssh_fingerprint=self.ssh_fingerprint)
+            self.env_cfg.update(ssh_public_key=self.public_key)
+            self.env_cfg.update(ssh_public_key_data=self.public_key_data)
+            self.env_cfg.update(ssh_in_progress=False)
 
     def get_domain(self):
         in_progress = self.env_cfg.get("vmware_network_in_progress")
@@ -219,9 +222,10 @@ class DataCollect(object):
         server = Inquire().ask_text('DNS Server', default=server)
         self.dns_server_list = NetworkUtil().get_dns_servers(self.domain_name, server=server)
 
-        self.env_cfg.update(vmware_domain_name=self.domain_name)
-        self.env_cfg.update(vmware_dns_server_list=self.dns_server_list)
-        self.env_cfg.update(vmware_network_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(vmware_domain_name=self.domain_name)
+            self.env_cfg.update(vmware_dns_server_list=self.dns_server_list)
+            self.env_cfg.update(vmware_network_in_progress=False)
 
     def get_image(self):
         in_progress = self.env_cfg.get("vmware_image_in_progress")
@@ -252,9 +256,10 @@ class DataCollect(object):
 
         self.image_user = distro_table.user
 
-        self.env_cfg.update(ssh_user_name=self.image_user)
-        self.env_cfg.update(vmware_template=self.vmware_template)
-        self.env_cfg.update(vmware_image_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(ssh_user_name=self.image_user)
+            self.env_cfg.update(vmware_template=self.vmware_template)
+            self.env_cfg.update(vmware_image_in_progress=False)
 
     def get_cluster_settings(self):
         option_list = [
@@ -313,7 +318,8 @@ class DataCollect(object):
         self.vm_cpu_cores = selection['cpu']
         self.vm_mem_size = selection['memory']
 
-        self.env_cfg.update(vmware_machine_type=self.instance_type)
-        self.env_cfg.update(vmware_vm_cpu_cores=self.vm_cpu_cores)
-        self.env_cfg.update(vmware_vm_mem_size=self.vm_mem_size)
-        self.env_cfg.update(vmware_node_in_progress=False)
+        with self.env_cfg.transaction():
+            self.env_cfg.update(vmware_machine_type=self.instance_type)
+            self.env_cfg.update(vmware_vm_cpu_cores=self.vm_cpu_cores)
+            self.env_cfg.update(vmware_vm_mem_size=self.vm_mem_size)
+            self.env_cfg.update(vmware_node_in_progress=False)
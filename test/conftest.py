@@ -3,6 +3,16 @@ import pytest
 
 def pytest_addoption(parser):
     parser.addoption("--cloud", action="store", default="aws")
+    parser.addoption("--benchmark", action="store_true", default=False)
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark: run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
 
 @pytest.fixture
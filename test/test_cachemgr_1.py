@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import threading
+import lib.config as config
+from lib.util.cachemgr import MetadataCache
+
+
+class Factory(object):
+
+    def __init__(self, value=None, delay: float = 0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.value if self.value is not None else self.calls
+
+
+def test_cache_ttl_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    cache = MetadataCache(root=str(tmp_path))
+    factory = Factory()
+
+    assert cache.get("zones", ("aws", "us-east-2"), factory) == 1
+    assert cache.get("zones", ("aws", "us-east-2"), factory) == 1
+    assert cache.get("zones", ("aws", "us-west-2"), factory) == 2
+    assert MetadataCache(root=str(tmp_path)).get("zones", ("aws", "us-east-2"), factory) == 1
+    assert factory.calls == 2
+
+    assert cache.get("zones", ("aws", "us-east-2"), factory, ttl=0) == 3
+    path = cache.entry_path("zones", ("aws", "us-east-2"))
+    with open(path, 'w') as cache_file:
+        json.dump({"kind": "zones", "created": time.time() - MetadataCache.TTL["zones"], "data": 3}, cache_file)
+    assert cache.get("zones", ("aws", "us-east-2"), factory) == 4
+    assert cache.get("zones", ("aws", "us-east-2"), factory) == 4
+    assert [name for name in os.listdir(str(tmp_path)) if not name.endswith('.json')] == []
+
+
+def test_cache_refresh_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", True)
+    monkeypatch.setattr(MetadataCache, "refreshed", set())
+    cache = MetadataCache(root=str(tmp_path))
+    factory = Factory()
+
+    assert cache.get("machine_types", ("aws",), factory) == 1
+    assert cache.get("machine_types", ("aws",), factory) == 1
+    assert cache.get("machine_types", ("gcp",), factory) == 2
+    assert factory.calls == 2
+
+
+def test_cache_corrupt_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    cache = MetadataCache(root=str(tmp_path))
+    path = cache.entry_path("projects", ("capella",))
+    with open(path, 'w') as cache_file:
+        cache_file.write('{"kind": "projects", "created"')
+
+    assert cache.get("projects", ("capella",), Factory(["p1"])) == ["p1"]
+    assert cache.read(path)["data"] == ["p1"]
+
+    (tmp_path / "file").write_text("")
+    unwritable = MetadataCache(root=str(tmp_path / "file" / "cache"))
+    factory = Factory(["p2"])
+    assert unwritable.get("projects", ("capella",), factory) == ["p2"]
+    assert unwritable.get("projects", ("capella",), factory) == ["p2"]
+    assert factory.calls == 2
+
+
+def test_cache_evict_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    cache = MetadataCache(root=str(tmp_path))
+    for n in range(5):
+        cache.get("public_images", (n,), Factory("x" * 1000))
+        path = cache.entry_path("public_images", (n,))
+        os.utime(path, (time.time() - 100 + n, time.time() - 100 + n))
+
+    cache.evict(max_size=3500)
+    remaining = sorted(os.listdir(str(tmp_path)))
+    assert remaining == sorted(os.path.basename(cache.entry_path("public_images", (n,))) for n in (2, 3, 4))
+
+    cache.clear()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_cache_concurrent_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    cache = MetadataCache(root=str(tmp_path))
+    barrier = threading.Barrier(2, timeout=5)
+    shared = Factory("shared", delay=0.2)
+    results = []
+
+    def slow_call(key: str):
+        def factory():
+            barrier.wait()
+            return key
+        results.append(cache.get("zones", (key,), factory))
+
+    threads = [threading.Thread(target=slow_call, args=(key,)) for key in ("a", "b")]
+    threads += [threading.Thread(target=lambda: results.append(cache.get("zones", ("c",), shared))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == ["a", "b"] + ["shared"] * 4
+    assert shared.calls == 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import threading
+import multiprocessing
+import pytest
+import lib.config as config
+from lib.util.envmgr import CatalogManager
+from lib.util.cfgmgr import ConfigMgr
+from lib.util.filelock import FileLock
+
+WORKERS = 4
+UPDATES = 25
+
+
+def catalog_worker(location: str, worker: int):
+    catalog = CatalogManager(location)
+    for n in range(UPDATES):
+        catalog.update("inventory", {f"worker{worker}": {f"node{n}": f"{location}/leaf{n}"}})
+
+
+def remove_worker(location: str, worker: int):
+    catalog = CatalogManager(location)
+    for n in range(UPDATES):
+        catalog.remove_environment(f"remove{n}")
+
+
+def config_worker(cfg_file: str, worker: int):
+    env_cfg = ConfigMgr(cfg_file)
+    for n in range(UPDATES):
+        with env_cfg.transaction():
+            count = int(env_cfg.get("cbs_index_memory") or 0)
+            env_cfg.update(cbs_index_memory=str(count + 1))
+
+
+def run_workers(target, location: str):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=target, args=(location, n)) for n in range(WORKERS)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+
+def test_catalog_concurrent_1(tmp_path):
+    location = str(tmp_path)
+    run_workers(catalog_worker, location)
+
+    contents = CatalogManager(location).read_file()
+    assert contents["config"]["version"] == config.config_version
+    for worker in range(WORKERS):
+        assert len(contents["inventory"][f"worker{worker}"]) == UPDATES
+    assert [name for name in os.listdir(location) if name.endswith('.tmp')] == []
+
+
+def test_catalog_remove_1(tmp_path):
+    location = str(tmp_path)
+    catalog = CatalogManager(location)
+    for n in range(UPDATES):
+        catalog.update("inventory", {f"remove{n}": {"aws": {"node": f"{location}/remove{n}"}}})
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=remove_worker, args=(location, 0)), context.Process(target=catalog_worker, args=(location, 0))]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    inventory = catalog.read_file()["inventory"]
+    assert sorted(inventory.keys()) == ["worker0"]
+    assert len(inventory["worker0"]) == UPDATES
+
+
+def test_catalog_backup_1(tmp_path):
+    location = str(tmp_path)
+    catalog = CatalogManager(location)
+    catalog.update("images", {"aws": {"image1": "path1"}})
+    catalog.update("images", {"aws": {"image2": "path2"}})
+
+    with open(os.path.join(location, "catalog.backup"), 'r') as backup_file:
+        backup = json.load(backup_file)
+    assert backup["images"]["aws"] == {"image1": "path1"}
+    assert catalog.read_file()["images"]["aws"] == {"image1": "path1", "image2": "path2"}
+
+
+def test_config_concurrent_1(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    ConfigMgr(cfg_file)
+    run_workers(config_worker, cfg_file)
+
+    with open(cfg_file, 'r') as config_file:
+        data = json.load(config_file)
+    assert data["cbs"]["index_memory"] == str(WORKERS * UPDATES)
+
+
+def test_lock_upgrade_1(tmp_path):
+    lock = FileLock(str(tmp_path / "catalog.json"))
+    with lock.shared():
+        with lock.shared():
+            assert lock.depth == 2
+        with pytest.raises(RuntimeError):
+            with lock.exclusive():
+                pass
+        assert lock.depth == 1
+        assert lock.mode == FileLock.SHARED
+    assert lock.depth == 0
+
+    with lock.exclusive():
+        with lock.shared():
+            assert lock.mode == FileLock.EXCLUSIVE
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(lock.thread_lock.acquire(timeout=1)))
+    thread.start()
+    thread.join()
+    assert acquired == [True]
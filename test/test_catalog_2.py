@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import pytest
+import lib.config as config
+from lib.util.envmgr import CatalogManager, PathType, get_catalog
+from lib.util.catalogdb import SQLiteCatalogManager
+
+LOOKUPS = 200
+
+
+def populate(catalog: CatalogManager, location: str, count: int):
+    inventory = {}
+    for n in range(count):
+        inventory[f"env{n:05d}"] = {
+            "aws": {
+                "network": f"{location}/net{n}",
+                "cluster": f"{location}/cluster{n}",
+            }
+        }
+    contents = catalog.read_file()
+    contents["inventory"] = inventory
+    catalog.write_file(contents)
+
+
+def test_sqlite_catalog_1(tmp_path):
+    location = str(tmp_path)
+    catalog = SQLiteCatalogManager(location)
+    catalog.update("inventory", {"test01": {"aws": {"network": f"{location}/net"}}})
+    catalog.update("inventory", {"test01": {"aws": {"cluster": f"{location}/cluster"}}})
+    catalog.update("images", {"aws": {"image": f"{location}/image"}})
+    os.mkdir(f"{location}/cluster")
+    open(f"{location}/cluster/main.tf.json", 'w').close()
+
+    assert list(catalog.get_environment("test01")) == [("aws", {"network": f"{location}/net", "cluster": f"{location}/cluster"})]
+    assert catalog.entry_exists("test01", "aws", PathType.CLUSTER, "main.tf.json") is True
+    assert catalog.entry_exists("test01", "aws", PathType.NETWORK, "main.tf.json") is False
+    assert catalog.read_file()["config"]["version"] == config.config_version
+    assert catalog.read_file()["images"] == {"aws": {"image": f"{location}/image"}}
+
+    catalog.remove_environment("test01")
+    assert list(catalog.get_environment("test01")) == []
+    assert isinstance(get_catalog(location), SQLiteCatalogManager)
+
+
+def test_sqlite_migrate_1(tmp_path):
+    location = str(tmp_path)
+    json_catalog = CatalogManager(location)
+    json_catalog.update("inventory", {"test01": {"gcp": {"network": f"{location}/net"}}})
+    json_catalog.update("images", {"gcp": {"image": f"{location}/image"}})
+    expected = json_catalog.read_file()
+
+    catalog = SQLiteCatalogManager(location)
+    assert catalog.read_file() == expected
+    assert not os.path.exists(f"{location}/catalog.json")
+    assert os.path.exists(f"{location}/{SQLiteCatalogManager.MIGRATED}")
+
+
+def exercise(catalog: CatalogManager, location: str, count: int) -> list:
+    found = []
+    for n in range(LOOKUPS):
+        env_name = f"env{(n * 7919) % count:05d}"
+        found.append(list(catalog.get_environment(env_name)))
+        catalog.update("inventory", {env_name: {"gcp": {"network": f"{location}/net{n}"}}})
+    return found
+
+
+def test_catalog_engines_1(tmp_path):
+    count = 1000
+    results = {}
+    for engine in (CatalogManager, SQLiteCatalogManager):
+        location = str(tmp_path / engine.__name__)
+        os.mkdir(location)
+        catalog = engine(location)
+        populate(catalog, location, count)
+        found = exercise(catalog, location, count)
+        assert all(len(environment) in (1, 2) for environment in found)
+        results[engine.__name__] = (found, catalog.read_file()["inventory"])
+
+    json_found, json_inventory = results["CatalogManager"]
+    sqlite_found, sqlite_inventory = results["SQLiteCatalogManager"]
+    assert sorted(json_inventory) == sorted(sqlite_inventory)
+    assert len(json_inventory) == count
+    assert json_inventory["env00000"]["aws"]["cluster"].endswith("/cluster0")
+    assert json_inventory["env00000"]["gcp"]["network"].endswith("/net0")
+    assert [sorted(c for c, _ in e) for e in json_found] == [sorted(c for c, _ in e) for e in sqlite_found]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("count", [10, 1000, 10000])
+def test_catalog_benchmark_1(tmp_path, count):
+    print(f"environments: {count}")
+    for engine in (CatalogManager, SQLiteCatalogManager):
+        location = str(tmp_path / engine.__name__)
+        os.mkdir(location)
+        catalog = engine(location)
+        populate(catalog, location, count)
+        start = time.perf_counter()
+        exercise(catalog, location, count)
+        print(f"  {engine.__name__:<22} {(time.perf_counter() - start) / LOOKUPS * 1000000:10.1f} us/lookup")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import pytest
+from lib.util.cfgmgr import ConfigMgr
+
+
+def test_cfgmgr_update_1(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    env_cfg.update(aws_region="us-east-2", ssh_user_name="ec2-user", bogus_key="ignored")
+
+    assert env_cfg.get("aws_region") == "us-east-2"
+    assert env_cfg.get("ssh_user_name") == "ec2-user"
+    assert env_cfg.get("bogus_key") is None
+    assert env_cfg.get("noprefix") is None
+    assert ConfigMgr(cfg_file).get("aws_region") == "us-east-2"
+
+
+def test_cfgmgr_transaction_1(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    signature = env_cfg.file_signature()
+
+    with env_cfg.transaction():
+        env_cfg.update(gcp_region="us-central1")
+        env_cfg.update(gcp_project="test-project")
+        assert env_cfg.get("gcp_region") == "us-central1"
+        assert env_cfg.file_signature() == signature
+
+    with open(cfg_file, 'r') as config_file:
+        data = json.load(config_file)
+    assert data["gcp"] == {"region": "us-central1", "project": "test-project"}
+
+
+def test_cfgmgr_transaction_2(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    env_cfg.update(azure_region="eastus")
+
+    with pytest.raises(RuntimeError):
+        with env_cfg.transaction():
+            env_cfg.update(azure_region="westus")
+            raise RuntimeError("abort")
+
+    assert env_cfg.get("azure_region") == "eastus"
+
+
+def test_cfgmgr_transaction_3(tmp_path, monkeypatch):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    env_cfg.update(aws_region="us-east-2", aws_subnet_list=["subnet-1"])
+    signature = env_cfg.file_signature()
+
+    with pytest.raises(RuntimeError):
+        with env_cfg.transaction():
+            env_cfg.update(aws_region="us-west-2", gcp_region="us-central1")
+            with env_cfg.transaction():
+                env_cfg.config_data["aws"]["subnet_list"].append("subnet-2")
+                raise RuntimeError("abort")
+
+    assert env_cfg.file_signature() == signature
+    assert env_cfg.file_id == signature
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("config file read after rollback")
+
+    monkeypatch.setattr(json, "load", no_read)
+    assert env_cfg.get("aws_region") == "us-east-2"
+    assert env_cfg.get("aws_subnet_list") == ["subnet-1"]
+    assert env_cfg.get("gcp_region") is None
+
+
+def test_cfgmgr_transaction_4(tmp_path, monkeypatch):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    env_cfg.update(cbs_version="7.2.0")
+
+    def fail_write(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("lib.util.cfgmgr.atomic_write", fail_write)
+    with pytest.raises(SystemExit):
+        env_cfg.update(cbs_version="7.6.0")
+
+    assert env_cfg.config_data["cbs"]["version"] == "7.2.0"
+    monkeypatch.undo()
+    assert ConfigMgr(cfg_file).get("cbs_version") == "7.2.0"
+    assert env_cfg.get("cbs_version") == "7.2.0"
+
+
+def test_cfgmgr_reload_1(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    other_cfg = ConfigMgr(cfg_file)
+    env_cfg.update(net_use_public_ip=True)
+    assert other_cfg.get("net_use_public_ip") is True
+
+    other_cfg.update(net_use_public_ip=False)
+    assert env_cfg.get("net_use_public_ip") is False
+    assert os.path.exists(cfg_file)
+
+
+def test_cfgmgr_copy_1(tmp_path):
+    cfg_file = str(tmp_path / "config.json")
+    env_cfg = ConfigMgr(cfg_file)
+    subnets = [{"name": "subnet-1", "zone": "us-east-2a"}]
+    env_cfg.update(aws_subnet_list=subnets)
+    subnets.append({"name": "subnet-2", "zone": "us-east-2b"})
+
+    with env_cfg.transaction():
+        subnet_list = env_cfg.get("aws_subnet_list")
+        subnet_list.clear()
+        env_cfg.update(aws_region="us-east-2")
+
+    assert env_cfg.get("aws_subnet_list") == [{"name": "subnet-1", "zone": "us-east-2a"}]
+    with open(cfg_file, 'r') as config_file:
+        assert json.load(config_file)["aws"]["subnet_list"] == [{"name": "subnet-1", "zone": "us-east-2a"}]
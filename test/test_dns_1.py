@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import time
+import threading
+import socketserver
+import pytest
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import lib.config as config
+from lib.util.network import BatchResolver, NetworkUtil
+
+QUERY_DELAY = 0.2
+NODE_COUNT = 50
+
+
+class StubHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text()
+        with self.server.lock:
+            self.server.queries.append(name)
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(QUERY_DELAY)
+        with self.server.lock:
+            self.server.active -= 1
+        response = dns.message.make_response(query)
+        records = self.server.records.get((name, dns.rdatatype.to_text(question.rdtype)))
+        if records:
+            response.answer.append(dns.rrset.from_text_list(name, 300, 'IN', question.rdtype, records))
+        elif not any(n == name for n, _ in self.server.records):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        sock.sendto(response.to_wire(), self.client_address)
+
+
+class StubServer(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+
+    def __init__(self, records: dict):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.records = records
+        self.queries = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+
+@pytest.fixture
+def stub_server():
+    records = {(f"cb-test-n{n:02d}.example.com.", 'A'): [f"10.10.0.{n}"] for n in range(1, NODE_COUNT + 1)}
+    records[("cb-test-n50.example.com.", 'A')] = ["192.168.0.50"]
+    del records[("cb-test-n49.example.com.", 'A')]
+    records[("example.com.", 'NS')] = ["ns1.example.com.", "ns2.example.com."]
+    records[("ns1.example.com.", 'A')] = ["10.10.1.1"]
+    records[("ns2.example.com.", 'A')] = ["10.10.1.2"]
+    server = StubServer(records)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    BatchResolver.reset()
+    yield server
+    server.shutdown()
+    server.server_close()
+    BatchResolver.reset()
+
+
+def test_batch_resolver_1(stub_server):
+    resolver = BatchResolver(["127.0.0.1"], port=stub_server.server_address[1], timeout=2.0)
+    names = [f"cb-test-n{n:02d}.example.com" for n in range(1, NODE_COUNT + 1)]
+
+    answers = resolver.resolve_all(names)
+    assert 1 < stub_server.peak <= BatchResolver.MAX_WORKERS
+    assert answers["cb-test-n01.example.com"] == ["10.10.0.1"]
+    assert answers["cb-test-n49.example.com"] == []
+    assert len(stub_server.queries) == NODE_COUNT
+
+    answers = BatchResolver(["127.0.0.1"], port=stub_server.server_address[1], timeout=2.0).resolve_all(names[:10])
+    assert answers["cb-test-n10.example.com"] == ["10.10.0.10"]
+    assert len(stub_server.queries) == NODE_COUNT
+
+
+class SilentHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        data, sock = self.request
+        with self.server.lock:
+            self.server.queries.append(dns.message.from_wire(data).question[0].name.to_text())
+
+
+def test_batch_resolver_timeout_1():
+    server = StubServer({})
+    server.RequestHandlerClass = SilentHandler
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    BatchResolver.reset()
+    try:
+        resolver = BatchResolver(["127.0.0.1"], port=server.server_address[1], timeout=0.2)
+        assert resolver.resolve_all(["a.example.com", "b.example.com"]) == {"a.example.com": [], "b.example.com": []}
+        assert set(server.queries) == {"a.example.com.", "b.example.com."}
+    finally:
+        server.shutdown()
+        server.server_close()
+        BatchResolver.reset()
+
+
+def test_static_ips_1(stub_server, monkeypatch):
+    monkeypatch.setattr(BatchResolver, "PORT", stub_server.server_address[1])
+    prompts = []
+    answers = iter(["192.168.0.10", "10.10.0.150", "10.10.0.149"])
+
+    def ask_ip(question, default=None):
+        prompts.append(question)
+        return next(answers)
+
+    monkeypatch.setattr("lib.util.network.Inquire.ask_ip", staticmethod(ask_ip))
+    net = NetworkUtil()
+    net.subnet = "10.10.0.0/24"
+    names = [f"cb-test-n{n:02d}" for n in range(1, NODE_COUNT + 1)]
+    addresses = net.get_static_ips(names, "example.com", ["127.0.0.1"])
+
+    assert addresses["cb-test-n01"] == "10.10.0.1"
+    assert addresses["cb-test-n49"] == "10.10.0.150"
+    assert addresses["cb-test-n50"] == "10.10.0.149"
+    assert prompts == ["Node cb-test-n49 IP Address", "Node cb-test-n49 IP Address", "Node cb-test-n50 IP Address"]
+
+    assert sorted(NetworkUtil.get_dns_servers("example.com", server="127.0.0.1")) == ["10.10.1.1", "10.10.1.2"]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import time
+import threading
+import pytest
+import lib.config as config
+from lib.util.envmgr import TaskGraph, EnvUtil, CatalogManager
+from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
+
+
+def recorder(log: list, name: str, delay: float = 0.0, fail: bool = False):
+    def task():
+        log.append(("start", name, time.monotonic()))
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        log.append(("end", name, time.monotonic()))
+        return name
+    return task
+
+
+def test_task_graph_1():
+    log = []
+    graph = TaskGraph(max_workers=4)
+    for name in ("app", "sgw", "generic", "cluster"):
+        graph.add(name, recorder(log, name, 0.2))
+    graph.add("network", recorder(log, "network", 0.05), ["app", "sgw", "generic", "cluster"])
+    graph.add("config", recorder(log, "config"), ["app", "sgw", "generic", "cluster", "network"])
+
+    results = graph.run()
+
+    assert results == {name: name for name in ("app", "sgw", "generic", "cluster", "network", "config")}
+    ends = {name: t for event, name, t in log if event == "end"}
+    starts = {name: t for event, name, t in log if event == "start"}
+    assert max(starts[n] for n in ("app", "sgw", "generic", "cluster")) < min(ends[n] for n in ("app", "sgw", "generic", "cluster"))
+    assert starts["network"] >= max(ends[n] for n in ("app", "sgw", "generic", "cluster"))
+    assert starts["config"] >= ends["network"]
+
+
+def test_task_graph_2():
+    log = []
+    graph = TaskGraph(max_workers=1, fail_fast=True)
+    graph.add("app", recorder(log, "app", fail=True))
+    graph.add("sgw", recorder(log, "sgw"), ["app"])
+    graph.add("generic", recorder(log, "generic"))
+
+    with pytest.raises(SystemExit):
+        graph.run()
+    assert graph.status["app"] == "failed"
+    assert graph.status["sgw"] == "skipped"
+
+
+def test_task_graph_3():
+    log = []
+    graph = TaskGraph(max_workers=2, fail_fast=False)
+    graph.add("app", recorder(log, "app", fail=True))
+    graph.add("generic", recorder(log, "generic", 0.1))
+    graph.add("cluster", recorder(log, "cluster", 0.1))
+    graph.add("network", recorder(log, "network"), ["app", "generic", "cluster"])
+
+    with pytest.raises(SystemExit):
+        graph.run()
+    assert graph.status == {"app": "failed", "generic": "complete", "cluster": "complete", "network": "skipped"}
+
+
+def test_task_graph_4(monkeypatch):
+    monkeypatch.setattr(config, "stack_workers", 2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    graph = TaskGraph()
+    for n in range(6):
+        graph.add(f"stack{n}", task)
+    graph.run()
+    assert max(peak) == 2
+
+
+class LedgerNetwork(object):
+    cidr_list = []
+
+
+def test_env_remove_ledger_1(tmp_path, monkeypatch):
+    location = str(tmp_path)
+    monkeypatch.setattr(config, "catalog_root", location)
+    monkeypatch.setattr(config, "catalog_engine", "json")
+    monkeypatch.setattr(config, "env_name", "test-01")
+    monkeypatch.setattr(config, "cache_refresh", False)
+    CatalogManager(location).update("inventory", {"test-01": {"aws": {"network": f"{location}/network", "cluster": f"{location}/cluster"}}})
+    ledgers = []
+
+    def from_cloud(cloud: str):
+        ledgers.append(cloud)
+        return NetworkLedger(cloud, ("123456789012", "us-east-2"), LedgerNetwork(), root=location)
+
+    ledger = NetworkLedger("aws", ("123456789012", "us-east-2"), LedgerNetwork(), root=location)
+    ledger.allocate(NetworkDriver(), "test-01")
+    ledger.allocate(NetworkDriver(), "test-02")
+    monkeypatch.setattr(NetworkLedger, "from_cloud", staticmethod(from_cloud))
+    monkeypatch.setattr("lib.util.envmgr.Inquire.ask_yn", lambda self, question, default=False: True)
+    monkeypatch.setattr(EnvUtil, "remove_element", lambda self, element: None)
+
+    EnvUtil().env_remove()
+    assert ledgers == ["aws"]
+    ledger.read()
+    assert [item["env"] for item in ledger.networks.values()] == ["test-02"]
+    assert list(CatalogManager(location).get_environment("test-01")) == []
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import hashlib
+import lib.config as config
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from lib.util.filemgr import SSHKeyIndex, FileManager
+
+JUNK_FILE_COUNT = 2000
+
+
+def write_key(filename: str) -> rsa.RSAPrivateKey:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with open(filename, 'wb') as key_file:
+        key_file.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption()
+        ))
+    return key
+
+
+def fingerprint(data: bytes, algorithm) -> str:
+    digest = algorithm(data).hexdigest()
+    return ':'.join(digest[i:i + 2] for i in range(0, len(digest), 2))
+
+
+class CountingIndex(SSHKeyIndex):
+    inspected = []
+
+    def inspect(self, path: str, signature: list[int]) -> dict:
+        CountingIndex.inspected.append(os.path.basename(path))
+        return super().inspect(path, signature)
+
+
+def test_key_index_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    ssh_dir = tmp_path / "ssh"
+    downloads = tmp_path / "downloads"
+    ssh_dir.mkdir()
+    downloads.mkdir()
+    index_file = str(tmp_path / "index.json")
+    locations = [str(ssh_dir), str(downloads)]
+
+    key = write_key(str(ssh_dir / "cf-test.pem"))
+    write_key(str(ssh_dir / "id_rsa"))
+    public_key = key.public_key().public_bytes(serialization.Encoding.OpenSSH, serialization.PublicFormat.OpenSSH).decode('utf-8')
+    (ssh_dir / "cf-test.pub").write_text(public_key + "\n")
+    (ssh_dir / "notes.key").write_text("not a key\n")
+    (downloads / "large.bin").write_bytes(os.urandom(SSHKeyIndex.MAX_KEY_SIZE + 1))
+
+    CountingIndex.inspected = []
+    index = CountingIndex(locations, index_file)
+    key_file = str(ssh_dir / "cf-test.pem")
+    pri_der = key.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    pub_der = key.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    assert sorted(os.path.basename(k['file']) for k in index.private_keys()) == ["cf-test.pem", "id_rsa"]
+    assert index.by_fingerprint(fingerprint(pri_der, hashlib.sha1)) == key_file
+    assert index.by_fingerprint(fingerprint(pub_der, hashlib.md5)) == key_file
+    assert index.public_key(key_file) == public_key == FileManager.get_ssh_public_key(key_file)
+    assert index.public_key_file(public_key) == str(ssh_dir / "cf-test.pub")
+    assert len(CountingIndex.inspected) == 5
+
+    CountingIndex.inspected = []
+    time.sleep(0.01)
+    (ssh_dir / "notes.key").write_text("still not a key\n")
+    os.remove(ssh_dir / "id_rsa")
+    index = CountingIndex(locations, index_file)
+    assert CountingIndex.inspected == ["notes.key"]
+    assert [os.path.basename(k['file']) for k in index.private_keys()] == ["cf-test.pem"]
+    assert index.by_fingerprint(fingerprint(pub_der, hashlib.md5)) == key_file
+
+    monkeypatch.setattr(config, "cache_refresh", True)
+    CountingIndex.inspected = []
+    CountingIndex(locations, index_file)
+    assert len(CountingIndex.inspected) == 4
+
+
+def test_key_index_warm_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    ssh_dir = tmp_path / "ssh"
+    downloads = tmp_path / "downloads"
+    ssh_dir.mkdir()
+    downloads.mkdir()
+    for n in range(JUNK_FILE_COUNT):
+        (downloads / f"file-{n:05d}.txt").write_text(f"download {n}\n" * 64)
+    for n in range(10):
+        write_key(str(ssh_dir / f"key-{n}.pem"))
+    locations = [str(ssh_dir), str(downloads)]
+    index_file = str(tmp_path / "index.json")
+
+    CountingIndex.inspected = []
+    first = CountingIndex(locations, index_file).private_keys()
+    assert len(CountingIndex.inspected) == JUNK_FILE_COUNT + 10
+
+    CountingIndex.inspected = []
+    second = CountingIndex(locations, index_file).private_keys()
+    assert CountingIndex.inspected == []
+    assert first == second
+    assert len(second) == 10
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import lib.config
+from lib.drivers.aws import CloudBase as AWSBase
+from lib.drivers.azure import CloudBase as AzureBase
+from lib.drivers.gcp import CloudBase as GCPBase
+
+
+def test_aws_tag_filters_1():
+    assert AWSBase.tag_filters() == []
+    assert AWSBase.tag_filters({}) == []
+    assert AWSBase.tag_filters({'Environment': 'test'}) == [{'Name': 'tag:Environment', 'Values': ['test']}]
+    assert AWSBase.tag_filters({'Environment': None}) == [{'Name': 'tag-key', 'Values': ['Environment']}]
+    assert AWSBase.tag_filters({'Environment': 'test', 'Role': None, 'Type': 'couchbase'}) == [
+        {'Name': 'tag:Environment', 'Values': ['test']},
+        {'Name': 'tag-key', 'Values': ['Role']},
+        {'Name': 'tag:Type', 'Values': ['couchbase']}
+    ]
+
+
+def test_azure_tag_filter_1():
+    assert AzureBase.tag_filter() is None
+    assert AzureBase.tag_filter({}) is None
+    assert AzureBase.tag_filter({'environment': 'test'}) == "tagName eq 'environment' and tagValue eq 'test'"
+    assert AzureBase.tag_filter({'environment': None}) == "tagName eq 'environment'"
+    assert AzureBase.tag_filter({'environment': 'test', 'role': 'data'}) == "tagName eq 'environment' and tagValue eq 'test'"
+    assert AzureBase.tag_filter({'role': None, 'environment': 'test'}) == "tagName eq 'role'"
+
+
+def test_azure_tags_match_1():
+    tags = {'Environment': 'test', 'Role': 'data'}
+    assert AzureBase.tags_match(tags) is True
+    assert AzureBase.tags_match(None) is True
+    assert AzureBase.tags_match(tags, {'environment': 'test'}) is True
+    assert AzureBase.tags_match(tags, {'environment': 'prod'}) is False
+    assert AzureBase.tags_match(tags, {'environment': 'test', 'role': 'data'}) is True
+    assert AzureBase.tags_match(tags, {'environment': 'test', 'role': 'index'}) is False
+    assert AzureBase.tags_match(tags, {'environment': None, 'role': None}) is True
+    assert AzureBase.tags_match(tags, {'environment': 'test', 'type': None}) is False
+    assert AzureBase.tags_match(None, {'environment': None}) is False
+    assert AzureBase.tags_match({}, {'environment': 'test'}) is False
+
+
+def test_gcp_label_filter_1():
+    assert GCPBase.label_filter() is None
+    assert GCPBase.label_filter({}) is None
+    assert GCPBase.label_filter({'environment': 'test'}) == '(labels.environment = "test")'
+    assert GCPBase.label_filter({'Environment': None}) == '(labels.environment:*)'
+    assert GCPBase.label_filter({'Environment': 'test', 'role': None}) == '(labels.environment = "test") (labels.role:*)'
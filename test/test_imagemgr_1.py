@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import logging
+import time
+import threading
+import shutil
+import pytest
+import lib.config as config
+from lib.util.envmgr import PathMap, PathType, CatalogRoot, ConfigFile
+from lib.util.imagemgr import ImageMatrix, ImageTarget, ImageBuildKey
+from lib.util.cachemgr import MetadataCache
+from lib.hcl.aws_image import AWSImageDataRecord
+
+BUILD_CONFIG = {
+    "ubuntu": [{"version": "bionic"}, {"version": "focal"}],
+    "rhel": [{"version": "8"}],
+}
+
+
+class ConcurrentMatrix(ImageMatrix):
+
+    def __init__(self, targets: list[ImageTarget], parties: int = 0):
+        super().__init__(targets)
+        self.barrier = threading.Barrier(parties if parties else len(targets), timeout=5)
+
+    def generate(self) -> None:
+        pass
+
+    def build(self, target: ImageTarget) -> list[str]:
+        start_time = time.perf_counter()
+        # every build has to be running at once for the barrier to open
+        self.barrier.wait()
+        self.durations[target.name] = time.perf_counter() - start_time
+        if target.os == "rhel":
+            raise RuntimeError("build failed")
+        self.images[target.name] = [f"us-east-2:ami-{target.variant}"]
+        return self.images[target.name]
+
+
+def write_matrix(tmp_path, entries) -> str:
+    filename = str(tmp_path / "matrix.json")
+    with open(filename, 'w') as matrix_file:
+        json.dump(entries, matrix_file)
+    return filename
+
+
+def test_matrix_file_1(tmp_path):
+    matrix = ImageMatrix.from_file(write_matrix(tmp_path, [
+        {"cloud": "aws", "os": "ubuntu", "os_release": ["bionic", "focal"], "cb_version": ["7.1.4-3601", "7.2.0-5325"]},
+        {"cloud": "aws", "os": "ubuntu", "os_release": "focal", "cb_version": "7.2.0-5325"},
+        {"cloud": "gcp", "os": "rhel", "os_release": 8},
+    ]))
+
+    assert len(matrix.targets) == 5
+    assert matrix.targets[-1] == ImageTarget.build("gcp", "rhel", "8", "latest")
+    assert matrix.targets[0].variant == "ubuntu-bionic-7-1-4-3601"
+
+    ImageMatrix.check(matrix.targets[0], BUILD_CONFIG)
+    with pytest.raises(SystemExit):
+        ImageMatrix.check(ImageTarget.build("aws", "ubuntu", "jammy"), BUILD_CONFIG)
+    with pytest.raises(SystemExit):
+        ImageMatrix.from_file(write_matrix(tmp_path, [{"cloud": "aws", "os": "ubuntu"}]))
+
+
+def test_matrix_leaf_1(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLOUD_MANAGER_DATABASE_LOCATION", str(tmp_path))
+    monkeypatch.setattr(config, "catalog_target", CatalogRoot.IMAGE)
+    path_map = PathMap("aws", "aws")
+    paths = set()
+    for variant in (None, "ubuntu-focal-7-2-0-5325", "rhel-8-7-2-0-5325"):
+        path_map.map(PathType.IMAGE, variant)
+        paths.add(path_map.get_path(PathType.IMAGE))
+
+    assert len(paths) == 3
+    assert all(os.path.isdir(path) for path in paths)
+    assert sorted(path_map.cm.read_file()["images"]["aws"]) == ["image", "image-rhel-8-7-2-0-5325", "image-ubuntu-focal-7-2-0-5325"]
+
+
+class FakeDriver(object):
+    generated = []
+
+    def __init__(self):
+        self.config = type("BuildConfig", (), {"build": BUILD_CONFIG})
+
+    def image_config(self, target: ImageTarget, variant=None):
+        FakeDriver.generated.append(target.name)
+        return ConfigFile(f"/tmp/{variant}", "main.pkr.json")
+
+    def find_image(self, target: ImageTarget):
+        return None
+
+
+def test_matrix_generate_1(monkeypatch, capsys):
+    monkeypatch.setattr(config, "enable_cloud", lambda cloud: None)
+    monkeypatch.setattr(config, "cloud_operator", FakeDriver)
+    monkeypatch.setattr(config, "image_rebuild", False)
+    monkeypatch.setattr(ImageMatrix, "resolve", staticmethod(lambda t: setattr(t, "cb_version", "7.2.0-5325") if t.cb_version == "latest" else None))
+    FakeDriver.generated = []
+    matrix = ImageMatrix([
+        ImageTarget.build("aws", "ubuntu", "focal", "latest"),
+        ImageTarget.build("aws", "ubuntu", "focal", "7.2.0-5325"),
+        ImageTarget.build("aws", "ubuntu", "bionic", "7.2.0-5325"),
+    ])
+    matrix.generate()
+
+    assert FakeDriver.generated == ["aws-ubuntu-focal-7.2.0-5325", "aws-ubuntu-bionic-7.2.0-5325"]
+    assert [t.name for t in matrix.targets] == FakeDriver.generated
+    assert "Skipping duplicate target aws-ubuntu-focal-7.2.0-5325" in capsys.readouterr().out
+
+
+def test_matrix_run_1(capsys):
+    targets = [ImageTarget.build("aws", "ubuntu", release, "7.2.0-5325") for release in ("bionic", "focal")]
+    targets.append(ImageTarget.build("aws", "rhel", "8", "7.2.0-5325"))
+    matrix = ConcurrentMatrix(targets)
+
+    with pytest.raises(SystemExit):
+        matrix.run(max_workers=3)
+
+    assert matrix.barrier.broken is False
+    rows = {row["target"]: row for row in matrix.summary()}
+    assert rows["aws-ubuntu-focal-7.2.0-5325"]["status"] == "complete"
+    assert rows["aws-ubuntu-focal-7.2.0-5325"]["image"] == "us-east-2:ami-ubuntu-focal-7-2-0-5325"
+    assert rows["aws-rhel-8-7.2.0-5325"]["status"] == "failed"
+    assert rows["aws-rhel-8-7.2.0-5325"]["image"] == "-"
+    assert "Image build summary" in capsys.readouterr().out
+
+
+def test_build_key_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path))
+    revisions = iter(["abc123", "def456"])
+    monkeypatch.setattr(ImageBuildKey, "get_revision", staticmethod(lambda repo: next(revisions)))
+    record = AWSImageDataRecord.by_version("ubuntu", "focal", {"ubuntu": [{"version": "focal", "image": "ubuntu-focal", "owner": "099720109477", "user": "ubuntu"}]})
+    template = [{"variable": {"region_name": [{"default": "us-east-2"}]}}]
+
+    key = ImageBuildKey.compute(record, "7.2.0-5325", "couchbaselabs/couchbase-hostprep", template)
+    assert len(key) == ImageBuildKey.LENGTH
+    assert ImageBuildKey.compute(record, "7.2.0-5325", "couchbaselabs/couchbase-hostprep", template) == key
+    assert ImageBuildKey.compute(record, "7.1.4-3601", "couchbaselabs/couchbase-hostprep", template) != key
+    assert ImageBuildKey.compute(record, "7.2.0-5325", "couchbaselabs/couchbase-hostprep", [{"variable": {"region_name": [{"default": "us-west-2"}]}}]) != key
+
+    os.mkdir(tmp_path / "refresh")
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path / "refresh"))
+    assert ImageBuildKey.compute(record, "7.2.0-5325", "couchbaselabs/couchbase-hostprep", template) != key
+
+
+def test_build_key_offline_1(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path))
+    calls = []
+
+    def get_revision(repo):
+        calls.append(repo)
+        if len(calls) > 1:
+            raise OSError("network is unreachable")
+        return "abc123"
+
+    monkeypatch.setattr(ImageBuildKey, "get_revision", staticmethod(get_revision))
+    repo = "couchbaselabs/couchbase-hostprep"
+    assert ImageBuildKey.host_prep_revision(repo) == "abc123"
+
+    monkeypatch.setattr(config, "cache_refresh", True)
+    monkeypatch.setattr(MetadataCache, "refreshed", set())
+    assert ImageBuildKey.host_prep_revision(repo) == "abc123"
+    assert ImageBuildKey.host_prep_revision(repo) == "abc123"
+    assert len(calls) == 2
+
+    os.mkdir(tmp_path / "offline")
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path / "offline"))
+    with caplog.at_level(logging.WARNING):
+        assert ImageBuildKey.host_prep_revision(repo) == ImageBuildKey.UNKNOWN_REVISION
+    assert "unknown" in caplog.text
+    assert len(calls) == 3
+
+
+def test_matrix_reuse_1():
+    targets = [ImageTarget.build("aws", "ubuntu", release, "7.2.0-5325") for release in ("bionic", "focal")]
+    matrix = ConcurrentMatrix(targets, parties=1)
+    matrix.reused.add(targets[0].name)
+    matrix.images[targets[0].name] = ["ami-existing"]
+    matrix.run(max_workers=2)
+
+    rows = {row["target"]: row for row in matrix.summary()}
+    assert rows[targets[0].name]["status"] == "reused"
+    assert rows[targets[0].name]["image"] == "ami-existing"
+    assert rows[targets[0].name]["duration"] == "-"
+    assert rows[targets[1].name]["status"] == "complete"
+
+
+@pytest.mark.skipif(not shutil.which("packer"), reason="packer is not installed")
+def test_packer_artifact_1(tmp_path):
+    from lib.invoke import packer_run
+    pr = packer_run(working_dir=str(tmp_path))
+    pr.parse_output(b"1700000000,amazon-ebs.cb-node,artifact,0,builder-id,mitchellh.amazonebs\n")
+    pr.parse_output(b"1700000000,amazon-ebs.cb-node,artifact,0,id,us-east-1:ami-1%!(PACKER_COMMA)us-east-2:ami-2\n")
+    assert pr.artifacts == ["us-east-1:ami-1,us-east-2:ami-2"]
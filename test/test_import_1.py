@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import subprocess
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CLOUD_SDK_MODULES = {
+    "aws": ["boto3", "botocore"],
+    "gcp": ["googleapiclient", "google.oauth2"],
+    "azure": ["azure.identity", "azure.mgmt"],
+    "vmware": ["pyVmomi", "pyVim", "passlib"],
+}
+
+CLOUDMGR_LOADER = """
+import sys
+import importlib.util
+sys.argv = {argv}
+spec = importlib.util.spec_from_file_location("cloudmgr", "bin/cloudmgr.py")
+cloudmgr = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cloudmgr)
+cloudmgr.CloudManager(cloudmgr.Parameters().args)
+"""
+
+
+def import_profile(argv: list[str], skip_missing: bool = False) -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = PACKAGE_DIR
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CLOUDMGR_LOADER.format(argv=repr(argv))],
+                            cwd=PACKAGE_DIR,
+                            env=env,
+                            capture_output=True,
+                            text=True)
+    if skip_missing and result.returncode != 0 and 'ModuleNotFoundError' in result.stderr:
+        pytest.skip(result.stderr.strip().splitlines()[-1])
+    assert result.returncode == 0, result.stderr
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def sdk_modules_loaded(modules: dict, clouds: list[str]) -> list[str]:
+    return [name for name in modules
+            for cloud in clouds
+            for prefix in CLOUD_SDK_MODULES[cloud]
+            if name == prefix or name.startswith(prefix + '.')]
+
+
+@pytest.mark.parametrize("argv", [
+    ['cloudmgr.py', 'logs', 'cluster', '--name', 'test'],
+    ['cloudmgr.py', 'db', 'check'],
+    ['cloudmgr.py', 'remove', '--name', 'test'],
+])
+def test_import_no_cloud_1(argv):
+    modules = import_profile(argv)
+    assert sdk_modules_loaded(modules, list(CLOUD_SDK_MODULES)) == []
+
+
+@pytest.mark.parametrize("cloud", ["aws", "gcp", "azure", "vmware"])
+def test_import_one_cloud_1(cloud):
+    modules = import_profile(['cloudmgr.py', 'version', '--cloud', cloud], skip_missing=True)
+    others = [c for c in CLOUD_SDK_MODULES if c != cloud]
+    assert sdk_modules_loaded(modules, others) == []
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import io
+import copy
+import contextlib
+import lib.config as config
+from lib.util.inquire import Inquire, TableModel
+
+ROW_COUNT = 100000
+
+
+def legacy_field_lengths(table: list[dict], hide_key: list[str]) -> tuple[int]:
+    vector = []
+    for item in table:
+        for del_key in hide_key:
+            item.pop(del_key, None)
+    row_len = max(len(row) for row in table)
+    for item in table:
+        columns = ()
+        for key in item.keys():
+            lv = 0 if item[key] is None else len(str(item[key]))
+            columns = columns + (max(len(key), lv),)
+        columns = columns + (0,) * (row_len - len(columns))
+        vector.append(columns)
+    final = ()
+    for x in range(row_len):
+        max_value = max(vector, key=lambda t: t[x])
+        final = final + (max_value[x],)
+    return final
+
+
+def option_list(count: int) -> list[dict]:
+    return [
+        {
+            "name": f"ubuntu-{n % 7}-{n:06d}",
+            "id": f"ami-{n:017x}",
+            "description": f"Canonical, Ubuntu, 22.04 LTS, amd64 build {n}",
+            "date": f"2023-{n % 12 + 1:02d}-{n % 28 + 1:02d}",
+            "link": f"https://example.com/images/{n}"
+        } for n in range(count)
+    ]
+
+
+def test_table_model_1():
+    rows = option_list(45)
+    original = copy.deepcopy(rows)
+    table = TableModel(rows, hide_key=["link"])
+
+    assert table.header == ["name", "id", "description", "date"]
+    assert table.widths == legacy_field_lengths(copy.deepcopy(rows), ["link"])
+    assert table.page_count(20) == 3
+    assert len(table.page(2, 20)) == 5
+    assert rows == original
+
+    header, divider = table.render_header(table.widths)
+    assert header.startswith("#      Name ")
+    assert divider.split() == ["------"] + ["-" * w for w in table.widths]
+    line = table.render_row(table.widths, rows[0], 1)
+    assert line.startswith("    1) ubuntu-0-000000")
+    assert "https://" not in line
+
+
+def test_ask_list_dict_1(monkeypatch, capsys):
+    rows = option_list(45)
+    answers = iter(["n", "25"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+    selection = Inquire().ask_list_dict("Select image", rows, sort_key="name", hide_key=["link", "id"])
+
+    expected = sorted(rows, key=lambda r: r["name"])[24]
+    assert selection == expected
+    assert selection["link"] == expected["link"]
+    output = capsys.readouterr().out
+    assert output.count("#      Name") == 2
+    assert "ami-" not in output
+
+
+class CountingModel(TableModel):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.measured = []
+
+    def column_widths(self, rows: list[dict]) -> tuple[int]:
+        self.measured.append(len(rows))
+        return super().column_widths(rows)
+
+
+def test_table_lazy_1():
+    rows = option_list(ROW_COUNT)
+    original_first = copy.deepcopy(rows[0])
+
+    table = CountingModel(rows, hide_key=["link"])
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        table.print_page(3, 20)
+    assert table.lazy is True
+    assert table.measured == [20]
+    assert table.page_widths(3, 20) == legacy_field_lengths(copy.deepcopy(rows[60:80]), ["link"])
+    assert output.getvalue().splitlines()[2].startswith("   61) ")
+
+    eager = CountingModel(rows, hide_key=["link"], lazy=False)
+    assert eager.widths == legacy_field_lengths(copy.deepcopy(rows), ["link"])
+    eager.page_widths(0, 20)
+    eager.page_widths(1, 20)
+    assert eager.measured == [ROW_COUNT]
+    assert rows[0] == original_first
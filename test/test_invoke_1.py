@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import gzip
+import time
+import lib.config as config
+from lib.invoke import LogFile, ResourceTimer, BinaryProbe, RunPolicy, tf_run
+from lib.util.envmgr import DatastoreTuple, PathType, ExecType
+
+APPLY_EVENTS = [
+    {"@level": "info", "@message": "Terraform 1.5.7", "@timestamp": "2023-09-01T10:00:00.000000Z", "type": "version"},
+    {"@message": "aws_instance.node[0]: Creating...", "@timestamp": "2023-09-01T10:00:01.000000Z", "type": "apply_start",
+     "hook": {"resource": {"addr": "aws_instance.node[0]"}, "action": "create"}},
+    {"@message": "aws_instance.node[1]: Creating...", "@timestamp": "2023-09-01T10:00:01.500000Z", "type": "apply_start",
+     "hook": {"resource": {"addr": "aws_instance.node[1]"}, "action": "create"}},
+    {"@message": "aws_instance.node[0]: Provisioning with 'remote-exec'...", "@timestamp": "2023-09-01T10:00:20.000000Z", "type": "provision_start",
+     "hook": {"resource": {"addr": "aws_instance.node[0]"}, "provisioner": "remote-exec"}},
+    {"@message": "aws_instance.node[0]: (remote-exec): Connected!", "@timestamp": "2023-09-01T10:00:21.000000Z", "type": "provision_progress",
+     "hook": {"resource": {"addr": "aws_instance.node[0]"}, "provisioner": "remote-exec", "output": "Connected!"}},
+    {"@message": "aws_instance.node[0]: (remote-exec) Provisioning complete", "@timestamp": "2023-09-01T10:00:50.000000Z", "type": "provision_complete",
+     "hook": {"resource": {"addr": "aws_instance.node[0]"}, "provisioner": "remote-exec"}},
+    {"@message": "aws_instance.node[0]: Creation complete after 52s", "@timestamp": "2023-09-01T10:00:53.000000Z", "type": "apply_complete",
+     "hook": {"resource": {"addr": "aws_instance.node[0]"}, "action": "create", "elapsed_seconds": 52}},
+    {"@message": "aws_instance.node[1]: Creation errored after 10s", "@timestamp": "2023-09-01T10:00:11.500000Z", "type": "apply_errored",
+     "hook": {"resource": {"addr": "aws_instance.node[1]"}, "action": "create", "elapsed_seconds": 10}},
+    {"@level": "error", "@message": "Error: quota exceeded", "type": "diagnostic",
+     "diagnostic": {"severity": "error", "summary": "quota exceeded"}},
+    {"@message": "Apply complete! Resources: 1 added, 0 changed, 0 destroyed.", "type": "change_summary",
+     "changes": {"add": 1, "change": 0, "remove": 0, "operation": "apply"}},
+]
+
+
+def test_resource_timer_1(tmp_path):
+    events = ResourceTimer('apply')
+    for message in APPLY_EVENTS:
+        events.process(message)
+
+    node0 = events.resources["aws_instance.node[0]"]
+    assert node0["status"] == "complete"
+    assert node0["elapsed"] == 52
+    assert node0["provisioners"]["remote-exec"] == {
+        "status": "complete",
+        "start": node0["provisioners"]["remote-exec"]["start"],
+        "end": node0["provisioners"]["remote-exec"]["end"],
+        "elapsed": 30.0,
+        "lines": 1
+    }
+    assert events.resources["aws_instance.node[1]"]["status"] == "errored"
+    assert [r["resource"] for r in events.slowest()] == ["aws_instance.node[0]", "aws_instance.node[1]"]
+    assert events.errors == ["quota exceeded"]
+    assert events.changes["add"] == 1
+
+    report_file = events.write(str(tmp_path))
+    assert report_file == os.path.join(str(tmp_path), ResourceTimer.REPORT_FILE)
+    with open(report_file, 'r') as report:
+        data = json.load(report)
+    assert data["command"] == "apply"
+    assert data["resources"][0]["resource"] == "aws_instance.node[0]"
+
+
+def test_log_file_1(tmp_path):
+    log = LogFile("tf_run", str(tmp_path))
+    for n in range(1000):
+        log.write(f"line {n}")
+    log.close()
+
+    with open(log.log_file, 'r') as log_data:
+        lines = log_data.readlines()
+    assert len(lines) == 1000
+    assert lines[-1].endswith("tf_run: line 999\n")
+
+
+def test_log_file_idle_1(tmp_path, monkeypatch):
+    deadline = time.monotonic() + 3 * LogFile.FLUSH_INTERVAL
+    while LogFile.flusher and time.monotonic() < deadline:
+        time.sleep(0.05)
+    monkeypatch.setattr(LogFile, "FLUSH_INTERVAL", 0.2)
+    log = LogFile("tf_run", str(tmp_path))
+    log.write("first line")
+    time.sleep(0.5)
+    with open(log.log_file, 'r') as log_data:
+        assert log_data.read().endswith("tf_run: first line\n")
+
+    log.write("second line")
+    time.sleep(0.5)
+    with open(log.log_file, 'r') as log_data:
+        assert len(log_data.readlines()) == 2
+    log.close()
+    time.sleep(0.5)
+    assert LogFile.flusher is None
+
+
+def test_log_file_rotate_1(tmp_path):
+    log = LogFile("tf_run", str(tmp_path), max_size=100000, backup_count=2)
+    for n in range(20000):
+        log.write(f"line {n:06d} " + "x" * 32)
+    log.close()
+
+    assert sorted(os.listdir(str(tmp_path))) == ["deploy.log", "deploy.log.1.gz", "deploy.log.2.gz"]
+    with gzip.open(os.path.join(str(tmp_path), "deploy.log.1.gz"), 'rt') as segment:
+        last_line = segment.readlines()[-1]
+    with open(log.log_file, 'r') as log_data:
+        first_line = log_data.readline()
+    assert int(first_line.split()[5]) == int(last_line.split()[5]) + 1
+    assert os.path.getsize(log.log_file) < 100000
+
+
+class CountingHandle(object):
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.writes = 0
+
+    def write(self, data: str):
+        self.writes += 1
+        return self.handle.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self.handle, name)
+
+
+class CountingLog(LogFile):
+    writes = 0
+
+    def open(self):
+        super().open()
+        self.log_handle = CountingHandle(self.log_handle)
+
+    def close(self):
+        if self.log_handle:
+            CountingLog.writes += self.log_handle.writes
+        super().close()
+
+
+def test_log_file_buffered_1(tmp_path):
+    line_count = 100000
+    lines = [f"aws_instance.node[{n % 30}]: Still creating... [{n}s elapsed]" for n in range(line_count)]
+
+    CountingLog.writes = 0
+    log = CountingLog("tf_run", str(tmp_path), max_size=0)
+    for line in lines:
+        log.write(line)
+    log.close()
+
+    with open(log.log_file, 'r') as log_data:
+        written = log_data.readlines()
+    assert [line.split(" tf_run: ", 1)[1].rstrip("\n") for line in written] == lines
+    assert 0 < CountingLog.writes < line_count / 100
+
+
+def test_binary_probe_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path))
+    monkeypatch.setattr(BinaryProbe, "versions", {})
+    calls = []
+    probe = BinaryProbe.run
+
+    def counted_run(path, *args):
+        calls.append(args)
+        return probe(path, *args)
+
+    monkeypatch.setattr(BinaryProbe, "run", staticmethod(counted_run))
+    args = ('-c', 'import json; print(json.dumps({"terraform_version": "1.5.7"}))')
+
+    assert BinaryProbe.version(sys.executable, *args) == {"terraform_version": "1.5.7"}
+    assert BinaryProbe.version(sys.executable, *args) == {"terraform_version": "1.5.7"}
+    assert len(calls) == 1
+
+    monkeypatch.setattr(BinaryProbe, "versions", {})
+    assert BinaryProbe.version(sys.executable, *args) == {"terraform_version": "1.5.7"}
+    assert len(calls) == 1
+    assert os.listdir(os.path.join(str(tmp_path), "cache"))
+
+
+def test_datastore_lazy_1(tmp_path):
+    element = DatastoreTuple.build("aws", PathType.NETWORK, str(tmp_path), "main.tf.json")
+    assert element.exec is None
+    assert element.switch == ExecType.TF_EXEC
+    assert DatastoreTuple.build("aws", PathType.CONFIG, str(tmp_path), "config.json").executor is None
+
+
+def test_plan_summary_1():
+    plan_data = {
+        "format_version": "1.2",
+        "resource_changes": [
+            {"address": "aws_instance.node[0]", "change": {"actions": ["no-op"]}},
+            {"address": "aws_instance.node[1]", "change": {"actions": ["create"]}},
+            {"address": "aws_instance.node[2]", "change": {"actions": ["update"]}},
+            {"address": "aws_instance.node[3]", "change": {"actions": ["delete", "create"]}},
+            {"address": "aws_instance.node[4]", "change": {"actions": ["delete"]}},
+            {"address": "data.aws_ami.image", "change": {"actions": ["read"]}},
+        ],
+        "output_changes": {
+            "node-private": {"actions": ["update"]},
+            "node-public": {"actions": ["no-op"]}
+        }
+    }
+    summary = tf_run.summarize_plan(plan_data)
+    assert summary == {
+        "add": ["aws_instance.node[1]"],
+        "change": ["aws_instance.node[2]"],
+        "replace": ["aws_instance.node[3]"],
+        "destroy": ["aws_instance.node[4]"],
+        "outputs": ["node-private"]
+    }
+    assert tf_run.plan_empty(summary) is False
+
+    no_op = {"resource_changes": [{"address": "aws_instance.node[0]", "change": {"actions": ["no-op"]}}],
+             "output_changes": {"node-private": {"actions": ["no-op"]}}}
+    assert tf_run.plan_empty(tf_run.summarize_plan(no_op)) is True
+
+
+def write_stack(path: str, nodes: int, source: str = "hashicorp/aws"):
+    main = {
+        "terraform": [{"required_providers": [{"aws": {"source": source}}]}],
+        "variable": {
+            "cluster_spec": [{"default": {f"cb-node-{n}": {"node_number": n} for n in range(nodes)}, "type": "map"}],
+            "region_name": [{"default": "us-east-2", "type": "string"}]
+        }
+    }
+    with open(os.path.join(path, "main.tf.json"), 'w') as tf_file:
+        json.dump(main, tf_file)
+
+
+def test_run_policy_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "tf_rate_limit", None)
+    path = str(tmp_path)
+
+    write_stack(path, 3)
+    assert RunPolicy(path).settings() == {"parallelism": 10, "nodes": 3, "providers": ["aws"], "refresh": True}
+
+    write_stack(path, 20)
+    assert RunPolicy(path).parallelism() == 40
+
+    write_stack(path, 100)
+    assert RunPolicy(path).parallelism() == RunPolicy.RATE_LIMITS["aws"]
+    assert RunPolicy(path, rate_limit=25).parallelism() == 25
+
+    write_stack(path, 100, source="hashicorp/azurerm")
+    assert RunPolicy(path).settings(refresh=False)["parallelism"] == RunPolicy.RATE_LIMITS["azurerm"]
+
+    assert RunPolicy(str(tmp_path / "missing")).parallelism() == RunPolicy.DEFAULT_PARALLELISM
+
+
+def test_run_policy_limit_1(tmp_path, monkeypatch, caplog):
+    path = str(tmp_path)
+    write_stack(path, 100)
+
+    monkeypatch.setattr(config, "tf_rate_limit", "30")
+    assert RunPolicy(path).parallelism() == 30
+
+    for value in ("fast", "0", "-5", " "):
+        monkeypatch.setattr(config, "tf_rate_limit", value)
+        assert RunPolicy(path).rate_limit is None
+        assert RunPolicy(path).parallelism() == RunPolicy.RATE_LIMITS["aws"]
+    assert "ignoring terraform rate limit 'fast'" in caplog.text
+    assert "ignoring terraform rate limit -5: must be at least 1" in caplog.text
+
+    monkeypatch.setattr(config, "tf_rate_limit", None)
+    assert RunPolicy(path, rate_limit=0).parallelism() == RunPolicy.RATE_LIMITS["aws"]
+
+
+def fake_terraform(path: str) -> str:
+    script = os.path.join(path, "terraform")
+    with open(script, 'w') as tf_file:
+        tf_file.write("#!/bin/sh\n"
+                      "if [ \"$1\" = \"version\" ]; then echo '{\"terraform_version\": \"1.5.7\"}'; exit 0; fi\n"
+                      "echo '{\"@message\": \"Destruction complete\", \"type\": \"log\"}'\n"
+                      "sleep 1\n")
+    os.chmod(script, 0o755)
+    return script
+
+
+def test_tf_run_quiet_1(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path))
+    monkeypatch.setattr(config, "tf_rate_limit", None)
+    monkeypatch.setattr(BinaryProbe, "paths", {})
+    monkeypatch.setattr(BinaryProbe, "versions", {})
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake_terraform(str(bin_dir))
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    stack = tmp_path / "stack"
+    stack.mkdir()
+
+    tf_run(working_dir=str(stack), quiet=True).destroy()
+    assert capsys.readouterr().out == ""
+    log_text = (stack / "deploy.log").read_text()
+    assert "tf_run: >>> Removing resources" in log_text
+    assert "tf_run: >>> Step complete in" in log_text
+    assert "Destruction complete" in log_text
+
+    tf_run(working_dir=str(stack)).destroy()
+    output = capsys.readouterr().out
+    assert "Removing resources" in output
+    assert "please wait" in output
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import pytest
+import lib.config as config
+from lib.drivers.network import NetworkDriver
+from lib.util.cidrmgr import NetworkLedger
+
+
+class AccountNetwork(object):
+
+    def __init__(self, networks: list[str]):
+        self.networks = networks
+        self.scans = 0
+
+    @property
+    def cidr_list(self):
+        self.scans += 1
+        for cidr in self.networks:
+            yield cidr
+
+
+class ClusterNetwork(object):
+
+    def __init__(self, clusters: dict):
+        self.clusters = clusters
+        self.fetched = []
+
+    def cidr_since(self, cursor=None):
+        seen = set(cursor) if cursor else set()
+        cidr_list = []
+        for cluster_id, cidr in self.clusters.items():
+            if cluster_id in seen:
+                continue
+            self.fetched.append(cluster_id)
+            cidr_list.append(cidr)
+            seen.add(cluster_id)
+        return cidr_list, sorted(seen)
+
+
+def test_ledger_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    network = AccountNetwork(["10.0.0.0/16", "10.1.0.0/16"])
+    ledger = NetworkLedger("aws", ("123456789012", "us-east-2"), network, root=str(tmp_path))
+
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.2.0.0/16"
+    assert network.scans == 1
+
+    network.networks.append("10.3.0.0/16")
+    ledger = NetworkLedger("aws", ("123456789012", "us-east-2"), network, root=str(tmp_path))
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.4.0.0/16"
+    assert network.scans == 2
+
+    other = NetworkLedger("aws", ("123456789012", "us-west-2"), network, root=str(tmp_path))
+    assert other.ledger_file != ledger.ledger_file
+    assert other.allocate(NetworkDriver(), "test-03") == "10.2.0.0/16"
+    assert network.scans == 3
+
+    with open(ledger.ledger_file, 'r') as ledger_file:
+        contents = json.load(ledger_file)
+    assert contents["networks"]["10.2.0.0/16"]["source"] == NetworkLedger.ALLOCATED
+    assert contents["networks"]["10.3.0.0/16"]["source"] == NetworkLedger.PROVIDER
+    assert contents["networks"]["10.4.0.0/16"]["env"] == "test-02"
+    assert sorted(os.listdir(tmp_path)) == [NetworkLedger.LEDGER_DIR]
+
+
+def test_ledger_sync_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    network = AccountNetwork(["10.0.0.0/16"])
+    ledger = NetworkLedger("gcp", ("project",), network, root=str(tmp_path))
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.1.0.0/16"
+
+    network.networks.append("10.2.0.0/16")
+    ledger.conflict("10.1.0.0/16")
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.1.0.0/16"
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.3.0.0/16"
+
+    assert ledger.release("test-01") == ["10.1.0.0/16"]
+    network.networks.append("10.1.0.0/16")
+    assert ledger.allocate(NetworkDriver(), "test-03") == "10.4.0.0/16"
+    assert network.scans == 4
+
+    expired = NetworkLedger("gcp", ("project",), network, root=str(tmp_path), ttl=0)
+    network.networks = ["10.0.0.0/16"]
+    assert expired.allocate(NetworkDriver(), "test-04") == "10.1.0.0/16"
+    assert sorted(expired.networks) == ["10.0.0.0/16", "10.1.0.0/16"]
+
+
+def test_ledger_cursor_1(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_refresh", False)
+    network = ClusterNetwork({"a1": "10.0.0.0/23", "b2": "10.1.0.0/23"})
+    ledger = NetworkLedger("capella", ("capella", "key"), network, root=str(tmp_path))
+    cidr_util = NetworkDriver()
+    assert ledger.allocate(cidr_util, "test-01") == "10.2.0.0/16"
+    assert list(cidr_util.get_next_subnet(prefix=23))[1] == "10.2.2.0/23"
+
+    network.clusters["c3"] = "10.3.0.0/23"
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.4.0.0/16"
+    assert network.fetched == ["a1", "b2", "c3"]
+    assert ledger.data["cursor"] == ["a1", "b2", "c3"]
+
+    monkeypatch.setattr(config, "cache_refresh", True)
+    ledger.allocate(NetworkDriver(), "test-03")
+    assert network.fetched == ["a1", "b2", "c3", "a1", "b2", "c3"]
+
+
+def test_ledger_scope_1(tmp_path):
+    with pytest.raises(SystemExit):
+        NetworkLedger("aws", (None, "us-east-2"), AccountNetwork([]), root=str(tmp_path))
+    with pytest.raises(SystemExit):
+        NetworkLedger("gcp", (), AccountNetwork([]), root=str(tmp_path))
+
+
+class FakeEC2(object):
+
+    def __init__(self, vpcs: list[dict]):
+        self.vpcs = vpcs
+        self.filters = []
+
+    def describe_vpcs(self, Filters=None):
+        self.filters.append(Filters)
+        keys = [v for f in Filters or [] if f['Name'] == 'tag-key' for v in f['Values']]
+        return {'Vpcs': [v for v in self.vpcs if all(k in [t['Key'] for t in v.get('Tags', [])] for k in keys)]}
+
+
+def test_ledger_aws_1(tmp_path, monkeypatch):
+    from lib.drivers.aws import Network
+    monkeypatch.setattr(config, "cache_refresh", False)
+    network = object.__new__(Network)
+    network.ec2_client = FakeEC2([
+        {'VpcId': 'vpc-1', 'CidrBlock': '10.0.0.0/16', 'IsDefault': True},
+        {'VpcId': 'vpc-2', 'CidrBlock': '10.1.0.0/16', 'IsDefault': False, 'Tags': [{'Key': 'Environment', 'Value': 'a'}]}
+    ])
+    ledger = NetworkLedger("aws", ("123456789012", "us-east-2"), network, root=str(tmp_path))
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.2.0.0/16"
+    assert network.ec2_client.filters == [None]
+
+    network.ec2_client.vpcs.append({'VpcId': 'vpc-3', 'CidrBlock': '10.3.0.0/16', 'IsDefault': False, 'Tags': [{'Key': 'Environment', 'Value': 'b'}]})
+    network.ec2_client.vpcs.append({'VpcId': 'vpc-4', 'CidrBlock': '10.4.0.0/16', 'IsDefault': False})
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.4.0.0/16"
+    assert network.ec2_client.filters[1] == [{'Name': 'tag-key', 'Values': ['Environment']}]
+    assert ledger.data["cursor"] == ["vpc-1", "vpc-2", "vpc-3"]
+
+
+class FakeRequest(object):
+
+    def __init__(self, response: dict):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeSubnetworks(object):
+
+    def __init__(self, subnets: list[dict]):
+        self.subnets = subnets
+        self.filters = []
+
+    def list(self, project: str, region: str, filter=None):
+        self.filters.append(filter)
+        return FakeRequest({'items': list(self.subnets)})
+
+    @staticmethod
+    def list_next(previous_request, previous_response):
+        return None
+
+
+def test_ledger_gcp_1(tmp_path, monkeypatch):
+    from lib.drivers.gcp import Network
+    monkeypatch.setattr(config, "cache_refresh", False)
+    subnetworks = FakeSubnetworks([{'id': '1', 'ipCidrRange': '10.0.1.0/24'}])
+    network = object.__new__(Network)
+    network.gcp_project = "project"
+    network.gcp_region = "us-central1"
+    network.gcp_client = type("FakeCompute", (object,), {"subnetworks": lambda self: subnetworks})()
+    ledger = NetworkLedger("gcp", ("project",), network, root=str(tmp_path))
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.1.0.0/16"
+
+    subnetworks.subnets.append({'id': '2', 'ipCidrRange': '10.1.0.0/24'})
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.2.0.0/16"
+    assert subnetworks.filters == [None, 'name eq ".*-subnet"']
+    assert ledger.data["cursor"] == ["1", "2"]
+
+
+def test_ledger_azure_1(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from lib.drivers.azure import Network
+    monkeypatch.setattr(config, "cache_refresh", False)
+
+    def vnet(name: str, prefix: str):
+        return SimpleNamespace(id=f"/subscriptions/s/resourceGroups/rg/providers/Microsoft.Network/virtualNetworks/{name}", name=name,
+                               location="eastus", tags={"environment": name}, subnets=[], address_space=SimpleNamespace(address_prefixes=[prefix]))
+
+    vnets = {"a": vnet("a", "10.0.0.0/16")}
+    filters = []
+
+    def list_by_resource_group(resource_group: str, filter=None):
+        filters.append(filter)
+        return [SimpleNamespace(id=v.id.upper(), name=v.name, type=Network.VNET_TYPE, location=v.location) for v in vnets.values()]
+
+    network = object.__new__(Network)
+    network.azure_resource_group = "rg"
+    network.azure_location = "eastus"
+    network.network_client = SimpleNamespace(virtual_networks=SimpleNamespace(list=lambda rg: list(vnets.values()), get=lambda rg, name: vnets[name]))
+    network.resource_client = SimpleNamespace(resources=SimpleNamespace(list_by_resource_group=list_by_resource_group))
+    ledger = NetworkLedger("azure", ("subscription", "rg"), network, root=str(tmp_path))
+    assert ledger.allocate(NetworkDriver(), "test-01") == "10.1.0.0/16"
+    assert filters == []
+
+    vnets["b"] = vnet("b", "10.2.0.0/16")
+    assert ledger.allocate(NetworkDriver(), "test-02") == "10.3.0.0/16"
+    assert filters == ["tagName eq 'environment'"]
+    assert len(ledger.data["cursor"]) == 2
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import random
+import ipaddress
+from typing import Union
+import lib.config as config
+from lib.drivers.network import NetworkDriver, CIDRAllocator
+
+NETWORK_COUNT = 5000
+
+
+def legacy_next_network(ip_space: list) -> Union[str, None]:
+    candidates = list(ipaddress.ip_network("10.0.0.0/8").subnets(new_prefix=16))
+    for network in ip_space:
+        available = []
+        for candidate in candidates:
+            try:
+                if network.prefixlen < 16:
+                    list(network.address_exclude(candidate))
+                else:
+                    list(candidate.address_exclude(network))
+            except ValueError:
+                available.append(candidate)
+        candidates = available
+    return candidates[0].exploded if candidates else None
+
+
+def cidr_list(count: int, seed: int = 1) -> list[str]:
+    generator = random.Random(seed)
+    supernets = [ipaddress.ip_network(s) for s in CIDRAllocator.SUPERNETS]
+    networks = []
+    for n in range(count):
+        supernet = supernets[0] if n % 4 else generator.choice(supernets)
+        prefix = generator.randint(max(16, supernet.prefixlen), 24)
+        offset = generator.randrange(supernet.num_addresses >> (32 - prefix))
+        networks.append(ipaddress.ip_network((int(supernet.network_address) + (offset << (32 - prefix)), prefix)).exploded)
+    return networks
+
+
+def test_allocator_1():
+    allocator = CIDRAllocator()
+    allocator.reserve("10.0.0.0/16")
+    allocator.reserve("10.1.4.0/24")
+    allocator.reserve("10.1.0.0/16")
+    allocator.reserve("10.3.0.0/16")
+
+    assert allocator.overlaps("10.1.4.128/25") is True
+    assert allocator.overlaps("10.2.0.0/16") is False
+    assert allocator.allocate(16) == "10.2.0.0/16"
+    assert allocator.allocate(15) == "10.4.0.0/15"
+    assert allocator.allocate(20, "10.0.0.0/14") is None
+
+    assert allocator.release("10.1.0.0/16") is True
+    assert allocator.release("10.1.0.0/16") is False
+    assert allocator.overlaps("10.1.4.0/24") is True
+    assert allocator.overlaps("10.1.5.0/24") is False
+    assert allocator.allocate(22, "10.0.0.0/14") == "10.1.0.0/22"
+    assert allocator.allocate(24, "10.0.0.0/14") == "10.1.5.0/24"
+
+
+def test_allocator_supernets_1():
+    allocator = CIDRAllocator()
+    allocator.reserve("10.0.0.0/8")
+    allocator.reserve("172.16.0.0/13")
+    assert allocator.allocate(16) == "172.24.0.0/16"
+    allocator.reserve("172.16.0.0/12")
+    assert allocator.allocate(16) == "192.168.0.0/16"
+    assert allocator.allocate(16) is None
+    assert allocator.allocate(24) is None
+    assert allocator.release("192.168.0.0/16") is True
+    assert allocator.allocate(24) == "192.168.0.0/24"
+
+
+def test_allocator_state_1(tmp_path):
+    state_file = str(tmp_path / "cidr.json")
+    allocator = CIDRAllocator(state_file=state_file)
+    first = allocator.allocate(16)
+    second = allocator.allocate(20)
+
+    restored = CIDRAllocator(state_file=state_file)
+    assert restored.as_list() == [first, second]
+    assert restored.allocate(16) not in (first, second)
+
+
+def test_network_driver_1():
+    driver = NetworkDriver()
+    for cidr in ("10.0.0.0/16", "10.1.0.0/16", "10.2.0.0/24"):
+        driver.add_network(cidr)
+    assert driver.get_next_network() == "10.3.0.0/16"
+    driver.add_network("10.3.0.0/24")
+    driver.add_network("10.3.2.0/23")
+    assert list(driver.get_next_subnet())[:3] == ["10.3.1.0/24", "10.3.4.0/24", "10.3.5.0/24"]
+    assert len(list(driver.get_next_subnet(prefix=23))) == 126
+
+
+def test_network_driver_2():
+    for seed in range(10):
+        networks = cidr_list(300, seed)
+        driver = NetworkDriver()
+        for cidr in networks:
+            driver.add_network(cidr)
+        assert driver.get_next_network() == legacy_next_network([ipaddress.ip_network(n) for n in networks])
+
+
+def test_network_churn_1():
+    networks = cidr_list(NETWORK_COUNT)
+    driver = NetworkDriver()
+    for cidr in networks:
+        driver.add_network(cidr)
+    assert driver.get_next_network() == legacy_next_network([ipaddress.ip_network(n) for n in networks])
+
+    allocator = driver.allocator
+    assert len(allocator.starts) < NETWORK_COUNT
+    assert all(allocator.ends[n] < allocator.starts[n + 1] for n in range(len(allocator.starts) - 1))
+    starts, ends = list(allocator.starts), list(allocator.ends)
+
+    allocated = [allocator.allocate(24) for _ in range(1000)]
+    assert None not in allocated
+    assert len(set(allocated)) == len(allocated)
+    space = [ipaddress.ip_network(n) for n in networks]
+    assert not any(ipaddress.ip_network(a).overlaps(n) for a in allocated[::50] for n in space)
+
+    for cidr in allocated:
+        assert allocator.release(cidr) is True
+    assert (allocator.starts, allocator.ends) == (starts, ends)
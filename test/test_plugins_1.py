@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import shutil
+import pytest
+import lib.config as config
+from lib.invoke import PluginCache, StackFingerprint
+
+LOCK_TEMPLATE = """# This file is maintained automatically by "terraform init".
+provider "registry.terraform.io/{provider}" {{
+  version     = "{version}"
+  constraints = ">= 1.0.0"
+  hashes = [
+    "h1:0000000000000000000000000000000000000000000=",
+  ]
+}}
+"""
+
+
+def make_stack(path: str, provider: str = "example/null", version: str = None):
+    os.makedirs(path, exist_ok=True)
+    main = {
+        "terraform": {
+            "required_providers": {
+                "null": {
+                    "source": provider
+                }
+            }
+        }
+    }
+    with open(os.path.join(path, "main.tf.json"), 'w') as tf_file:
+        json.dump(main, tf_file)
+    if version:
+        with open(os.path.join(path, PluginCache.LOCK_FILE), 'w') as lock_file:
+            lock_file.write(LOCK_TEMPLATE.format(provider=provider, version=version))
+
+
+def make_provider(root: str, provider: str, version: str) -> str:
+    path = os.path.join(root, "registry.terraform.io", provider, version, "linux_amd64")
+    os.makedirs(path)
+    binary = os.path.join(path, f"terraform-provider-{provider.split('/')[1]}_v{version}")
+    with open(binary, 'w') as provider_file:
+        provider_file.write("#!/bin/sh\n")
+    os.chmod(binary, 0o755)
+    return binary
+
+
+def test_plugin_lock_1(tmp_path):
+    cache = PluginCache(root=str(tmp_path / "plugins"))
+    cache.environment()
+    first = str(tmp_path / "leaf1")
+    second = str(tmp_path / "leaf2")
+    make_stack(first, version="1.2.0")
+    make_stack(second)
+
+    assert PluginCache.lock_versions(os.path.join(first, PluginCache.LOCK_FILE)) == {("registry.terraform.io/example/null", "1.2.0")}
+    assert cache.provider_key(first) == cache.provider_key(second)
+
+    cache.save(first)
+    assert cache.seed(second) is True
+    assert cache.seed(second) is False
+    assert PluginCache.lock_versions(os.path.join(second, PluginCache.LOCK_FILE)) == {("registry.terraform.io/example/null", "1.2.0")}
+
+
+def test_plugin_prune_1(tmp_path):
+    root = str(tmp_path)
+    cache = PluginCache(root=os.path.join(root, "plugins"))
+    cache.environment()
+    make_provider(cache.root, "example/null", "1.1.0")
+    make_provider(cache.root, "example/null", "1.2.0")
+    make_stack(os.path.join(root, "leaf1"), version="1.2.0")
+
+    assert cache.prune(root, dry_run=True) == [os.path.join(cache.root, "registry.terraform.io/example/null", "1.1.0")]
+    assert os.path.exists(os.path.join(cache.root, "registry.terraform.io/example/null", "1.1.0"))
+
+    cache.prune(root)
+    assert cache.cached_versions() == {("registry.terraform.io/example/null", "1.2.0")}
+
+
+def test_plugin_link_1(tmp_path):
+    cache = PluginCache(root=str(tmp_path / "plugins"), hard_link=True)
+    cache.environment()
+    binary = make_provider(cache.root, "example/null", "1.2.0")
+    leaf = str(tmp_path / "leaf1")
+    provider_dir = os.path.join(leaf, ".terraform", "providers", "registry.terraform.io", "example", "null", "1.2.0")
+    os.makedirs(provider_dir)
+    os.symlink(os.path.dirname(binary), os.path.join(provider_dir, "linux_amd64"))
+
+    cache.link(leaf)
+    linked = os.path.join(provider_dir, "linux_amd64", os.path.basename(binary))
+    assert not os.path.islink(os.path.join(provider_dir, "linux_amd64"))
+    assert os.stat(linked).st_ino == os.stat(binary).st_ino
+
+    shutil.rmtree(os.path.join(cache.root, "registry.terraform.io"))
+    assert os.path.exists(linked)
+
+
+@pytest.mark.skipif(not shutil.which("terraform"), reason="terraform is not installed")
+def test_plugin_mirror_1(tmp_path, monkeypatch):
+    mirror = str(tmp_path / "mirror")
+    make_provider(mirror, "example/null", "1.2.0")
+    cli_config = str(tmp_path / "terraform.rc")
+    with open(cli_config, 'w') as config_file:
+        config_file.write(f'provider_installation {{\n  filesystem_mirror {{\n    path = "{mirror}"\n  }}\n}}\n')
+    monkeypatch.setenv("TF_CLI_CONFIG_FILE", cli_config)
+    monkeypatch.setattr(config, "catalog_root", str(tmp_path))
+
+    from lib.invoke import tf_run
+    for leaf in ("leaf1", "leaf2"):
+        make_stack(str(tmp_path / leaf))
+        tf_run(working_dir=str(tmp_path / leaf)).init()
+
+    cache = PluginCache()
+    assert ("registry.terraform.io/example/null", "1.2.0") in cache.cached_versions()
+    assert os.path.exists(cache.shared_lock_file(str(tmp_path / "leaf1")))
+    installed = tmp_path / "leaf2" / ".terraform" / "providers" / "registry.terraform.io" / "example" / "null" / "1.2.0" / "linux_amd64"
+    assert os.path.realpath(installed).startswith(os.path.realpath(cache.root))
+
+
+def test_stack_fingerprint_1(tmp_path):
+    leaf = str(tmp_path / "leaf1")
+    make_stack(leaf, version="1.2.0")
+    os.makedirs(os.path.join(leaf, ".terraform", "providers", "registry.terraform.io", "example", "null", "1.2.0", "linux_amd64"))
+    fingerprint = StackFingerprint(leaf)
+
+    assert fingerprint.matches() is False
+    fingerprint.record()
+    assert fingerprint.matches() is True
+
+    with open(os.path.join(leaf, "variables.tf.json"), 'w') as var_file:
+        json.dump({"variable": {"region": {"default": "us-east-2"}}}, var_file)
+    assert fingerprint.matches() is False
+    fingerprint.record()
+    assert fingerprint.matches() is True
+
+    make_stack(leaf, version="1.3.0")
+    assert fingerprint.matches() is False
+    fingerprint.record()
+
+    os.makedirs(os.path.join(leaf, ".terraform", "providers", "registry.terraform.io", "example", "null", "1.3.0", "linux_amd64"))
+    assert fingerprint.matches() is False
+
+    fingerprint.clear()
+    assert not os.path.exists(fingerprint.fingerprint_file)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import threading
+import lib.config as config
+from lib.drivers.session import SessionRegistry
+
+
+def aws_environment(monkeypatch, registry: SessionRegistry, region: str):
+    for name in ("AWS_REGION", "AWS_PROFILE", "AWS_ACCESS_KEY_ID"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AWS_DEFAULT_REGION", region)
+    session = registry.session('aws', region, None, None)
+    session.set('zone_list', [f"{region}a", f"{region}b"])
+    return session
+
+
+def test_session_shared_1(monkeypatch):
+    from lib.drivers.aws import Network, Subnet
+    registry = SessionRegistry()
+    monkeypatch.setattr(config, "session_registry", registry)
+    monkeypatch.setattr(config, "cloud_zone_cycle", None)
+    session = aws_environment(monkeypatch, registry, "us-east-2")
+
+    network = Network()
+    subnet = Subnet()
+    assert network.session is session
+    assert subnet.session is session
+    assert network.ec2_client is subnet.ec2_client
+    assert registry.count == 1
+
+    other = aws_environment(monkeypatch, registry, "us-west-2")
+    network = Network()
+    assert network.session is other
+    assert network.ec2_client is not subnet.ec2_client
+    assert registry.count == 2
+
+
+def test_session_clear_1():
+    registry = SessionRegistry()
+    aws_east = registry.session('aws', 'us-east-2', None, None)
+    assert registry.session('aws', 'us-east-2', None, None) is aws_east
+    assert registry.session('aws', 'us-west-2', None, None) is not aws_east
+    registry.session('gcp', 'project', 'us-central1')
+    assert registry.count == 3
+
+    registry.clear('aws')
+    assert registry.exists('aws', 'us-east-2', None, None) is False
+    assert registry.exists('aws', 'us-west-2', None, None) is False
+    assert registry.exists('gcp', 'project', 'us-central1') is True
+    assert registry.session('aws', 'us-east-2', None, None) is not aws_east
+
+    registry.clear()
+    assert registry.count == 0
+
+
+def test_session_factory_1():
+    session = SessionRegistry().session('azure', 'subscription')
+    calls = []
+    barrier = threading.Barrier(4, timeout=5)
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    def worker(results: list):
+        barrier.wait()
+        results.append(session.get_or_create('client', factory))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(item is results[0] for item in results)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+from lib.invoke import StateReader
+
+STATE = {
+    "version": 4,
+    "terraform_version": "1.5.7",
+    "serial": 12,
+    "lineage": "4d1c6a52-0ac3-8a1c-5a1b-23d4c5e6f7a8",
+    "outputs": {
+        "node-private": {
+            "value": {"cb-node-1": "10.1.1.10", "cb-node-2": "10.1.2.10"},
+            "type": ["object", {"cb-node-1": "string", "cb-node-2": "string"}]
+        },
+        "admin-password": {
+            "value": "password",
+            "type": "string",
+            "sensitive": True
+        }
+    },
+    "resources": []
+}
+
+
+def write_state(path: str, state: dict):
+    with open(os.path.join(path, "terraform.tfstate"), 'w') as state_file:
+        json.dump(state, state_file)
+
+
+def test_state_reader_1(tmp_path):
+    path = str(tmp_path)
+    write_state(path, STATE)
+    outputs = StateReader(path).outputs()
+
+    assert outputs["node-private"] == {
+        "sensitive": False,
+        "type": ["object", {"cb-node-1": "string", "cb-node-2": "string"}],
+        "value": {"cb-node-1": "10.1.1.10", "cb-node-2": "10.1.2.10"}
+    }
+    assert outputs["admin-password"]["sensitive"] is True
+
+    outputs["node-private"]["value"].clear()
+    assert StateReader(path).outputs()["node-private"]["value"]["cb-node-1"] == "10.1.1.10"
+
+    time.sleep(0.01)
+    write_state(path, dict(STATE, serial=13, outputs={}))
+    assert StateReader(path).outputs() == {}
+
+
+def test_state_reader_2(tmp_path):
+    path = str(tmp_path)
+    assert StateReader(path).outputs() == {}
+
+    write_state(path, dict(STATE, version=3))
+    assert StateReader(path).outputs() is None
+
+    write_state(path, STATE)
+    os.makedirs(os.path.join(path, ".terraform"))
+    with open(os.path.join(path, ".terraform", "terraform.tfstate"), 'w') as backend_file:
+        json.dump({"version": 3, "backend": {"type": "s3", "config": {"bucket": "state"}}}, backend_file)
+    assert StateReader(path).outputs() is None
+
+
+def test_state_reader_3(tmp_path):
+    path = str(tmp_path)
+    os.makedirs(os.path.join(path, ".terraform"))
+    os.makedirs(os.path.join(path, "terraform.tfstate.d", "blue"))
+    with open(os.path.join(path, ".terraform", "environment"), 'w') as workspace_file:
+        workspace_file.write("blue")
+    write_state(os.path.join(path, "terraform.tfstate.d", "blue"), STATE)
+    assert "node-private" in StateReader(path).outputs()
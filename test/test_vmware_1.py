@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+import time
+import threading
+import pytest
+import lib.config as config
+from pyVmomi import vim, vmodl
+from lib.drivers.session import SessionRegistry
+import lib.drivers.vmware as vmware
+from lib.drivers.vmware import VMwareConnection
+
+
+class SessionManager(object):
+
+    def __init__(self):
+        self.expired = False
+
+    @property
+    def currentSession(self):
+        if self.expired:
+            raise vim.fault.NotAuthenticated()
+        return "session"
+
+
+class ServiceContent(object):
+
+    def __init__(self):
+        self.sessionManager = SessionManager()
+
+
+class ServiceInstance(object):
+
+    def __init__(self, number: int):
+        self.number = number
+        self.content = ServiceContent()
+        self.pings = 0
+        self.pinged = threading.Event()
+
+    def RetrieveContent(self):
+        return self.content
+
+    def CurrentTime(self):
+        self.pings += 1
+        self.pinged.set()
+
+
+class ContainerView(vim.view.ContainerView):
+    destroyed = False
+
+    def Destroy(self):
+        self.destroyed = True
+
+
+class ViewManager(object):
+
+    def __init__(self):
+        self.views = []
+
+    def CreateContainerView(self, container, obj_type, recursive):
+        view = ContainerView(f"view-{len(self.views) + 1}")
+        self.views.append(view)
+        return view
+
+
+class Property(object):
+
+    def __init__(self, name, val):
+        self.name = name
+        self.val = val
+
+
+class ObjectContent(object):
+
+    def __init__(self, obj, **properties):
+        self.obj = obj
+        self.propSet = [Property(name, val) for name, val in properties.items()]
+
+
+class RetrieveResult(object):
+
+    def __init__(self, objects: list, token: str = None):
+        self.objects = objects
+        self.token = token
+
+
+class PropertyCollector(object):
+
+    def __init__(self, pages: list):
+        self.pages = pages
+        self.specs = []
+        self.tokens = []
+
+    def RetrievePropertiesEx(self, specs, options):
+        self.specs.append((specs, options))
+        return self.page(0)
+
+    def ContinueRetrievePropertiesEx(self, token):
+        self.tokens.append(token)
+        return self.page(int(token.split('-')[1]))
+
+    def page(self, number: int):
+        if number >= len(self.pages):
+            return None
+        token = f"page-{number + 1}" if number + 1 < len(self.pages) else None
+        return RetrieveResult(self.pages[number], token)
+
+
+class FakeVCenter(object):
+
+    def __init__(self):
+        self.connected = []
+        self.disconnected = []
+
+    def connect(self, **kwargs):
+        si = ServiceInstance(len(self.connected) + 1)
+        self.connected.append(kwargs)
+        return si
+
+    def disconnect(self, si):
+        self.disconnected.append(si)
+
+
+@pytest.fixture
+def vcenter(monkeypatch):
+    server = FakeVCenter()
+    monkeypatch.setattr(vmware, "SmartConnect", server.connect)
+    monkeypatch.setattr(vmware, "Disconnect", server.disconnect)
+    monkeypatch.setattr(config, "session_registry", SessionRegistry())
+    yield server
+
+
+def driver(password: str = "password") -> vmware.Network:
+    network = object.__new__(vmware.Network)
+    network.vmware_hostname = "vcenter.example.com"
+    network.vmware_username = "administrator@vsphere.local"
+    network.vmware_password = password
+    return network
+
+
+def test_vmware_connection_shared_1(vcenter):
+    first = driver()
+    second = driver()
+    assert first.connection is second.connection
+
+    si = first.connection.service_instance
+    assert second.connection.service_instance is si
+    assert len(vcenter.connected) == 1
+    assert vcenter.connected[0]["host"] == "vcenter.example.com"
+    first.connection.disconnect()
+
+
+def test_vmware_connection_password_1(vcenter):
+    connection = driver().connection
+    si = connection.service_instance
+
+    changed = driver("changed")
+    assert changed.connection is connection
+    assert vcenter.disconnected == [si]
+    assert connection.service_instance is not si
+    assert vcenter.connected[-1]["pwd"] == "changed"
+    connection.disconnect()
+
+
+def test_vmware_connection_expired_1(vcenter):
+    connection = driver().connection
+    si = connection.service_instance
+    connection.cache['dc'] = "folders"
+
+    connection.last_used = time.time()
+    si.content.sessionManager.expired = True
+    assert connection.service_instance is si
+
+    connection.last_used = time.time() - connection.SESSION_CHECK_INTERVAL - 1
+    renewed = connection.service_instance
+    assert renewed is not si
+    assert connection.service_content is renewed.content
+    assert connection.generation == 2
+    assert connection.cache == {}
+    assert len(vcenter.connected) == 2
+    connection.disconnect()
+
+
+def test_vmware_connection_error_1(monkeypatch, vcenter):
+    def refuse(**kwargs):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(vmware, "SmartConnect", refuse)
+    connection = driver().connection
+    with pytest.raises(SystemExit):
+        _ = connection.service_instance
+    assert connection.si is None
+    assert connection.service_content is None
+
+
+def test_vmware_keepalive_1(monkeypatch, vcenter):
+    monkeypatch.setattr(VMwareConnection, "KEEPALIVE_INTERVAL", 0.01)
+    connection = driver().connection
+    si = connection.service_instance
+    assert si.pinged.wait(5)
+
+    thread = connection.keepalive_thread
+    connection.disconnect()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert vcenter.disconnected == [si]
+    assert connection.si is None
+
+
+def test_vmware_keepalive_restart_1(monkeypatch, vcenter):
+    monkeypatch.setattr(VMwareConnection, "KEEPALIVE_INTERVAL", 0.01)
+    connection = driver().connection
+    _ = connection.service_instance
+    stopped = connection.keepalive_thread
+
+    connection.disconnect()
+    si = connection.service_instance
+    assert connection.keepalive_thread is not stopped
+    assert si.pinged.wait(5)
+    stopped.join(5)
+    assert not stopped.is_alive()
+    connection.disconnect()
+
+
+def test_vmware_disconnect_1(monkeypatch, vcenter):
+    registered = []
+    monkeypatch.setattr(vmware.atexit, "register", registered.append)
+    connection = VMwareConnection("vcenter.example.com", "administrator@vsphere.local", "password")
+    assert registered == [connection.disconnect]
+
+    connection.disconnect()
+    assert vcenter.disconnected == []
+
+    si = connection.service_instance
+    registered[0]()
+    registered[0]()
+    assert vcenter.disconnected == [si]
+    assert connection.stop_event.is_set()
+
+
+def paged_content(pages: list):
+    content = ServiceContent()
+    content.rootFolder = vim.Folder("group-d1")
+    content.viewManager = ViewManager()
+    content.propertyCollector = PropertyCollector(pages)
+    return content
+
+
+def test_vmware_retrieve_pages_1(monkeypatch, vcenter):
+    monkeypatch.setattr(VMwareConnection, "RETRIEVE_PAGE_SIZE", 2)
+    machines = [vim.VirtualMachine(f"vm-{n}") for n in range(5)]
+    objects = [ObjectContent(vm, name=f"node-{n}", **{'config.template': n == 4}) for n, vm in enumerate(machines)]
+    pages = [objects[0:2], objects[2:4], objects[4:5]]
+    content = paged_content(pages)
+    connection = driver().connection
+    _ = connection.service_instance
+    connection.service_content = content
+
+    results = connection.retrieve(vim.VirtualMachine, ['name', 'config.template'])
+    assert [r['obj'] for r in results] == machines
+    assert [r['name'] for r in results] == [f"node-{n}" for n in range(5)]
+    assert [r['config.template'] for r in results] == [False, False, False, False, True]
+
+    collector = content.propertyCollector
+    assert collector.tokens == ["page-1", "page-2"]
+    specs, options = collector.specs[0]
+    assert options.maxObjects == 2
+    assert isinstance(specs[0], vmodl.query.PropertyCollector.FilterSpec)
+    assert specs[0].propSet[0].pathSet == ['name', 'config.template']
+    assert content.viewManager.views[0].destroyed
+    connection.disconnect()
+
+
+def test_vmware_retrieve_single_1(vcenter):
+    content = paged_content([[ObjectContent(vim.HostSystem("host-1"), name="esxi-1")]])
+    connection = driver().connection
+    _ = connection.service_instance
+    connection.service_content = content
+
+    results = connection.retrieve(vim.HostSystem, ['name'])
+    assert results == [{'obj': vim.HostSystem("host-1"), 'name': "esxi-1"}]
+    assert content.propertyCollector.tokens == []
+    assert content.viewManager.views[0].destroyed
+    connection.disconnect()
+
+
+def test_vmware_retrieve_empty_1(vcenter):
+    content = paged_content([])
+    connection = driver().connection
+    _ = connection.service_instance
+    connection.service_content = content
+
+    assert connection.retrieve(vim.VirtualMachine, ['name']) == []
+    assert content.viewManager.views[0].destroyed
+    connection.disconnect()